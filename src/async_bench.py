@@ -0,0 +1,230 @@
+## @file async_bench.py
+#  This file contains a benchmark which compares running a small task set
+#  with @c cotask.TaskList.pri_sched() and with @c cotask_async.Dispatcher,
+#  when one of the tasks has to wait for input, as the UI task waits for a
+#  line from the UART.
+#
+#  The task set has a motor task and a control task, which only compute,
+#  and a UI task which needs a line that takes @c IO_MS to arrive each time.
+#  With @c pri_sched() the UI task waits for the line inside its run, as a
+#  blocking @c readline() would, and the other tasks wait with it. With the
+#  dispatcher, the line is written to a stand-in UART and awaited by a
+#  @c cotask_async.LineReader, which calls the UI task's @c go() when it has
+#  come, and the other tasks run in the meantime. The
+#  benchmark prints the lateness of the motor and control tasks and the
+#  number of UI runs under each. It runs in real time, on the Romi from the
+#  REPL with @c import async_bench then @c async_bench.main(), or on a
+#  computer:
+#  @code
+#  python async_bench.py 5
+#  @endcode
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import sys
+
+try:
+    import pyb
+except ImportError:
+    import sim_platform
+    sim_platform.install()
+
+import utime
+import cotask
+import cotask_async
+from cotask_async import asyncio
+
+## The time in milliseconds the UI task's line takes to arrive
+IO_MS = 3
+
+## The time in milliseconds between lines
+LINE_MS = 20
+
+## The compute tasks: name, priority, period in ms and run time in us
+COMPUTE_TASKS = (('motor', 7, 5, 300),
+                 ('control', 6, 10, 800))
+
+
+## @brief Keep the processor busy for a number of microseconds.
+#  @param usec The time to spend
+def spin(usec):
+    start = utime.ticks_us()
+    while utime.ticks_diff(utime.ticks_us(), start) < usec:
+        pass
+
+
+## @brief Make a task function which computes for a fixed time on each run.
+#  @param run_us The run time in microseconds
+#  <b> Returns </b>
+#  <blockquote>
+#  The generator function
+def compute(run_us):
+    def compute_fun():
+        while True:
+            spin(run_us)
+            yield 0
+    return compute_fun
+
+
+## @brief A UI task function which waits for its line inside the run, as a
+#         blocking @c readline() does.
+def blocking_ui():
+    while True:
+        spin(IO_MS * 1000)
+        spin(100)
+        yield 0
+
+
+## @brief A stand-in for the UART, into which the benchmark puts lines as if
+#         they had come in. It has the methods of a @c pyb.UART which
+#         @c cotask_async.LineReader uses.
+class LineStream:
+
+    ## @brief Make a stream with no lines in it.
+    def __init__(self):
+        self._lines = []
+
+    ## @brief Put a line into the stream, as if it had come in.
+    #  @param line The line as bytes
+    def feed(self, line):
+        self._lines.append(line)
+
+    ## @brief Check whether a line has come in.
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The number of lines waiting
+    def any(self):
+        return len(self._lines)
+
+    ## @brief Get the oldest line.
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The line as bytes, or @c None if there is none
+    def readline(self):
+        if self._lines:
+            return self._lines.pop(0)
+        return None
+
+    ## @brief Pretend to write to the stream.
+    #  @param data The bytes to be written
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The number of bytes written
+    def write(self, data):
+        return len(data)
+
+
+## @brief A UI task which only handles a line which has already come in,
+#         from a @c cotask_async.LineReader.
+class ReadyUI:
+
+    ## @brief Make the task; its reader is given once it has been made.
+    def __init__(self):
+        ## The @c cotask_async.LineReader from which lines are read
+        self.reader = None
+
+        ## The number of lines handled
+        self.lines = 0
+
+    ## @brief The task function, which reads a line if one has come in.
+    def run(self):
+        while True:
+            if self.reader.readline() is not None:
+                self.lines += 1
+            spin(100)
+            yield 0
+
+
+## @brief Make a task list holding the compute tasks and a UI task.
+#  @param ui_fun The UI task function
+#  @param ui_period The UI task's period in ms, or @c None to run it by
+#         @c go()
+#  <b> Returns </b>
+#  <blockquote>
+#  The task list and the UI task
+def make_list(ui_fun, ui_period):
+    task_list = cotask.TaskList()
+    for name, priority, period, run_us in COMPUTE_TASKS:
+        task_list.append(cotask.Task(compute(run_us), name=name,
+                                     priority=priority, period=period,
+                                     profile=True))
+    ui_task = cotask.Task(ui_fun, name='ui', priority=1, period=ui_period,
+                          profile=True)
+    task_list.append(ui_task)
+    task_list.align_releases()
+    return task_list, ui_task
+
+
+## @brief Run the task set with @c pri_sched(), the UI task waiting for its
+#         lines.
+#  @param seconds How long to run
+#  <b> Returns </b>
+#  <blockquote>
+#  The task list after the run, and @c None for the UI task object and line
+#  reader, which aren't used
+def run_blocking(seconds):
+    task_list, _ = make_list(blocking_ui, LINE_MS)
+    task_list.idle_fun = cotask.wfi_idle
+    end = utime.ticks_add(utime.ticks_ms(), int(seconds * 1000))
+    while utime.ticks_diff(end, utime.ticks_ms()) > 0:
+        task_list.pri_sched()
+    return task_list, None, None
+
+
+## @brief Run the task set with a dispatcher, the UI task's lines awaited
+#         in a coroutine.
+#  @param seconds How long to run
+#  <b> Returns </b>
+#  <blockquote>
+#  The task list after the run, the UI task object and the line reader
+def run_async(seconds):
+    ui_obj = ReadyUI()
+    task_list, ui_task = make_list(ui_obj.run, None)
+    dispatcher = cotask_async.Dispatcher(task_list)
+    stream = LineStream()
+    ui_obj.reader = cotask_async.LineReader(stream, ui_task, dispatcher,
+                                            poll_ms=1)
+
+    # A line comes in every LINE_MS; the time it takes to arrive is spent
+    # here, in the event loop, rather than in the UI task
+    async def lines():
+        while True:
+            await cotask_async.sleep_ms(LINE_MS)
+            stream.feed(b'line\r\n')
+
+    async def timed():
+        feeder = asyncio.create_task(lines())
+        reader = asyncio.create_task(ui_obj.reader.run())
+        await cotask_async.sleep_ms(int(seconds * 1000))
+        dispatcher.stop()
+        feeder.cancel()
+        reader.cancel()
+
+    async def both():
+        await asyncio.gather(dispatcher.run(), timed())
+
+    asyncio.run(both())
+    return task_list, ui_obj, ui_obj.reader
+
+
+## @brief Run both versions and print how late the compute tasks were.
+#  @param seconds How long to run each version
+def main(seconds=3.0):
+    print(f"{'SCHEDULER':<14s}{'TASK':<10s}{'RUNS':>7s}{'AVG LATE':>10s}"
+          f"{'MAX LATE':>10s}{'MISSED':>8s}")
+    for desc, runner in (('pri_sched', run_blocking),
+                         ('asyncio', run_async)):
+        task_list, ui_obj, reader = runner(seconds)
+        for task in task_list._tasks:
+            runs = task._runs
+            avg = task._late_sum / runs / 1000.0 if runs else 0.0
+            print(f"{desc:<14s}{task.name:<10s}{runs: 7d}{avg: 10.3f}"
+                  f"{(task._latest / 1000.0): 10.3f}{task._missed: 8d}")
+        if reader is not None:
+            print(f"{'':<14s}{ui_obj.lines} lines read by the UI task, "
+                  f"{reader.dropped} dropped")
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
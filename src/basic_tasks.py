@@ -27,7 +27,7 @@ def task1_fun(shares):
     counter = 0
     while True:
         my_share.put(counter)
-        my_queue.put(counter)
+        my_queue.try_put(counter)
         counter += 1
 
         yield 0
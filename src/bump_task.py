@@ -22,6 +22,16 @@ class Bump_Task:
         self.bump_on_off=bump_on_off
         self.bump_flg=bump_flg
         self.bump_flg.put(0)
+        self.task = None
+
+    ## @brief Gives this object the cotask task which runs it.
+    #
+    # While the bump sensors are off the task suspends itself, so the scheduler spends no time on it. It
+    # subscribes to bump_on_off so that turning the sensors on resumes it.
+    # @param task The cotask.Task made from this object's run generator
+    def set_task(self, task):
+        self.task = task
+        self.bump_on_off.subscribe(task, resume=True)
 
     ## @brief This function runs via the cooperative scheduler.
     # 
@@ -38,6 +48,9 @@ class Bump_Task:
             if self.state==0:
                 if self.bump_on_off.get() ==1:
                     self.state=1
+                elif self.task:
+                    # Wait to be resumed when the sensors are turned on
+                    self.task.suspend()
                     
                 yield
             # bump sensor on
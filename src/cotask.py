@@ -28,8 +28,66 @@
 #  POSSIBILITY OF SUCH DAMAGE.
 
 import gc                              # Memory allocation garbage collector
+import array                           # Preallocated storage for traces
+import struct                          # Packs trace dump headers
 import utime                           # Micropython version of time library
 import micropython                     # This shuts up incorrect warnings
+import pyb                             # Wait-for-interrupt and IRQ control
+import machine                         # Light sleep for idle periods
+
+
+## Overrun policy for a timed task which falls behind: each missed release
+#  is run later, back to back, until the task has caught up with its schedule.
+CATCH_UP = 0
+
+## Overrun policy for a timed task which falls behind: missed releases are
+#  dropped and the task's schedule restarts one period after the late release.
+SKIP = 1
+
+## Overrun policy for a timed task which falls behind: missed releases are 
+#  merged into the late one and the task keeps to its original release times.
+COALESCE = 2
+
+
+## The number of buckets in each of a profiled task's histograms. Bucket 0
+#  counts times of 0 or 1 microsecond and bucket @c k counts times from
+#  2<sup>k</sup> to 2<sup>k+1</sup> - 1 microseconds; the last bucket also
+#  counts all longer times.
+HIST_BUCKETS = 16
+
+
+## Find the histogram bucket into which a time falls.
+#  @param usec The time in microseconds
+#  @return The index of the bucket, 0 to @c HIST_BUCKETS - 1
+@micropython.native
+def _bucket(usec):
+    idx = 0
+    while usec > 1 and idx < HIST_BUCKETS - 1:
+        usec >>= 1
+        idx += 1
+    return idx
+
+
+## Estimate a percentile of the times counted in a histogram. Since the
+#  buckets are a factor of two wide, the result is the upper edge of the
+#  bucket in which the percentile falls, or the longest time counted if that
+#  is less.
+#  @param hist The histogram, an array of @c HIST_BUCKETS counts
+#  @param fraction The percentile as a fraction, such as 0.95
+#  @param longest The longest time in microseconds counted in the histogram
+#  @return A time in microseconds which at least that fraction of the counted
+#          times didn't exceed, or 0 if the histogram is empty
+def _percentile(hist, fraction, longest):
+    total = sum(hist)
+    if total == 0:
+        return 0
+    target = fraction * total
+    count = 0
+    for idx in range(HIST_BUCKETS):
+        count += hist[idx]
+        if count >= target:
+            break
+    return min(1 << (idx + 1), longest)
 
 
 ## Implements multitasking with scheduling and some performance logging.
@@ -81,20 +139,47 @@ class Task:
     #         The time can be given in a @c float or @c int; it will be 
     #         converted to microseconds for internal use by the scheduler.
     #  @param profile Set to @c True to enable run-time profiling 
-    #  @param trace Set to @c True to generate a list of transitions between
-    #         states. @b Note: This slows things down and allocates memory.
+    #  @param trace Set to @c True to record each run of the task, with its
+    #         start time, duration and state transition, in the trace buffer
+    #         @c cotask.trace_buffer, which is created the first time a traced
+    #         task is made if the program hasn't made one already
     #  @param shares A list or tuple of shares and queues used by this task.
     #         If no list is given, no shares are passed to the task
+    #  @param overrun What to do with the releases a timed task misses when it
+    #         falls more than a period behind: @c CATCH_UP (the default), 
+    #         @c SKIP or @c COALESCE
+    #  @param phase The time in milliseconds after the start of the task list
+    #         at which a timed task is first run, or @c None to run it first
+    #         one period after it is made. Giving tasks different phases
+    #         keeps their releases from piling up at the same moments; see
+    #         @c TaskList.align_releases()
+    #  @param alloc Set to @c True to measure the heap memory allocated by
+    #         each run of the task with @c gc.mem_alloc(). This has no effect
+    #         where @c gc.mem_alloc() doesn't exist
+    #  @param critical Set to @c True if the task's timing matters most; when
+    #         load shedding is on, sustained lateness of critical tasks makes
+    #         the task list slow down sheddable tasks. See
+    #         @c TaskList.shed_load()
+    #  @param sheddable Set to @c True if the task may be run less often when
+    #         critical tasks are running late
     def __init__(self, run_fun, name="NoName", priority=0, period=None,
-                 profile=False, trace=False, shares=()):
+                 profile=False, trace=False, shares=(), overrun=CATCH_UP,
+                 phase=None, alloc=False, critical=False, sheddable=False):
         # The function which is run to implement this task's code. Since it 
         # is a generator, we "run" it here, which doesn't actually run it but
-        # gets it going as a generator which is ready to yield values
-        if shares:
+        # gets it going as a generator which is ready to yield values. A
+        # CallTask has no generator
+        if run_fun is None:
+            self._run_gen = None
+        elif shares:
             self._run_gen = run_fun(shares)
         else:
             self._run_gen = run_fun()
 
+        # A function called with no arguments on each run instead of resuming
+        # a generator; see class CallTask
+        self._call = None
+
         ## The name of the task, hopefully a short and descriptive string.
         self.name = name
 
@@ -109,29 +194,87 @@ class Task:
         #  @c go() method. 
         if period != None:
             self.period = int(period * 1000)
-            self._next_run = utime.ticks_us() + self.period
         else:
             self.period = period
-            self._next_run = None
+
+        ## Whether the task's timing is watched for load shedding
+        self.critical = critical
+
+        ## Whether the task may be run less often to shed load
+        self.sheddable = sheddable
+
+        # The period the task is given, which is stretched while shedding
+        self._base_period = self.period
+
+        ## The time, in microseconds after the start of the task list, at
+        #  which a timed task is first run, or @c None if the task is first
+        #  run one period after it starts
+        self.phase = None if phase is None else int(phase * 1000)
+        self._next_run = None
+        if self.period != None:
+            self._next_run = utime.ticks_add(utime.ticks_us(),
+                self.period if self.phase is None else self.phase)
+
+        # How releases missed by falling behind are handled
+        self._overrun = overrun
 
         # Flag which causes the task to be profiled, in which the execution
         #  time of the @c run() method is measured and basic statistics kept. 
+        #  Profiled tasks also keep histograms of run time and lateness
         self._prof = profile
+        if profile:
+            self._run_hist = array.array('L', range(HIST_BUCKETS))
+            self._late_hist = array.array('L', range(HIST_BUCKETS))
+
+        # Flag which causes the memory allocated by each run to be measured,
+        # with a histogram of bytes allocated per run
+        self._alloc = alloc and hasattr(gc, 'mem_alloc')
+        if self._alloc:
+            self._alloc_hist = array.array('L', range(HIST_BUCKETS))
+
+        # Whether the task has been suspended, and when it last was
+        self._suspended = False
+        self._susp_mark = 0
         self.reset_profile()
 
         # The previous state in which the task last ran. It is used to watch
         # for and track state transitions.
         self._prev_state = 0
 
-        # If transition tracing has been enabled, create an empty list in 
-        # which to store transition (time, to-state) stamps
+        # If transition tracing has been enabled, find the trace buffer and
+        # get the number by which it knows this task
         self._trace = trace
-        self._tr_data = []
-        self._prev_time = utime.ticks_us()
+        if trace:
+            global trace_buffer
+            if trace_buffer is None:
+                trace_buffer = TraceBuffer()
+            self._tr_buf = trace_buffer
+            self._tr_id = trace_buffer.register(name)
+
+        # Flag which is set true when the task is ready to be run by the
+        # scheduler; see go_flag
+        self._go = False
+
+        # Used by TaskList.heap_sched(): the sort key of the task in the heap
+        # of ready tasks, whether the task is waiting in that heap, and 
+        # whether a timed task has been taken out of the timer heap by its
+        # release and not yet run
+        self._key = 0
+        self._queued = False
+        self._released = False
+
+        # The bit which marks this task as ready in the task list's ready
+        # masks, or zero if it has none, and the time of its latest release
+        # by a timer
+        self._bit = 0
+        self._rel_time = 0
+
+        # Set while the task is run in the minor frames of a cyclic executive
+        # rather than by its period; see TaskList.frame_release()
+        self._framed = False
 
-        ## Flag which is set true when the task is ready to be run by the
-        #  scheduler
-        self.go_flag = False
+        # The task list to which this task has been appended, if any
+        self._list = None
 
 
     ## This method is called by the scheduler; it attempts to run this task.
@@ -142,50 +285,90 @@ class Task:
     #  @return @c True if the task ran or @c False if it did not
     def schedule(self) -> bool:
         if self.ready():
+            self._dispatch()
+            return True
+        else:
+            return False
+
+
+    ## This method runs the task's generator up to its next @c yield and
+    #  keeps the profiling and tracing records. It is called by @c schedule()
+    #  once the task is known to be ready, or directly by a scheduler which
+    #  keeps track of readiness itself.
+    def _dispatch(self):
+        # Reset the go flag for the next run
+        self._go = False
 
-            # Reset the go flag for the next run
-            self.go_flag = False
+        # If measuring allocation, see how much of the heap is in use
+        if self._alloc:
+            before = gc.mem_alloc()
 
-            # If profiling, save the start time
-            if self._prof:
-                stime = utime.ticks_us()
+        # If profiling or tracing, save the start time
+        if self._prof or self._trace:
+            stime = utime.ticks_us()
 
-            # Run the method belonging to the state which should be run next
+        # Run the method belonging to the state which should be run next, or
+        # call the task's function
+        if note_running:
+            curr_state = self._run_noted()
+        elif self._call is None:
             curr_state = next(self._run_gen)
+        else:
+            curr_state = self._call()
 
-            # If profiling or tracing, save timing data
-            if self._prof or self._trace:
-                etime = utime.ticks_us()
-
-            # If profiling, save timing data
-            if self._prof:
-                self._runs += 1
-                runt = utime.ticks_diff(etime, stime)
-                if self._runs > 2:
-                    self._run_sum += runt
-                    if runt > self._slowest:
-                        self._slowest = runt
-
-            # If transition logic tracing is on, record a transition; if not,
-            # ignore the state. If out of memory, switch tracing off and 
-            # run the memory allocation garbage collector
-            if self._trace:
-                try:
-                    if curr_state != self._prev_state:
-                        self._tr_data.append(
-                            (utime.ticks_diff(etime, self._prev_time),
-                             curr_state))
-                except MemoryError:
-                    self._trace = False
-                    gc.collect()
-
-                self._prev_state = curr_state
-                self._prev_time = etime
+        # If profiling or tracing, save timing data
+        if self._prof or self._trace:
+            etime = utime.ticks_us()
 
-            return True
+        # If measuring allocation, record how much the run allocated. Less
+        # memory in use than before means the heap was collected during the
+        # run, and the amount allocated can't be known
+        if self._alloc:
+            used = gc.mem_alloc() - before
+            self._alloc_runs += 1
+            if used < 0:
+                self._gc_runs += 1
+            else:
+                self._alloc_sum += used
+                if used > self._alloc_max:
+                    self._alloc_max = used
+                self._alloc_hist[_bucket(used)] += 1
 
-        else:
-            return False
+        # If profiling, save timing data
+        if self._prof:
+            self._runs += 1
+            runt = utime.ticks_diff(etime, stime)
+            if self._runs > 2:
+                self._run_sum += runt
+                if runt > self._slowest:
+                    self._slowest = runt
+                self._run_hist[_bucket(runt)] += 1
+
+        # If tracing, record this run and the transition it made, if any.
+        # States which aren't small integers are recorded as 255
+        if self._trace:
+            if curr_state is None:
+                curr_state = 255
+            else:
+                curr_state = int(curr_state) & 255
+            self._tr_buf.record(stime, utime.ticks_diff(etime, stime),
+                                self._tr_id, self._prev_state, curr_state)
+            self._prev_state = curr_state
+
+
+    ## Run the task once, noting it in @c running so that other modules,
+    #  such as @c task_share, can tell which task did something. The note is
+    #  cleared even if the task raises an exception.
+    #  @return The state which the task returned
+    def _run_noted(self):
+        global running
+        running = self
+        try:
+            if self._call is None:
+                return next(self._run_gen)
+            return self._call()
+        finally:
+            running = None
 
 
     ## This method checks if the task is ready to run.
@@ -200,29 +383,99 @@ class Task:
         if self.period != None:
             late = utime.ticks_diff(utime.ticks_us(), self._next_run)
             if late > 0:
-                self.go_flag = True
-                self._next_run = utime.ticks_diff(self.period, 
-                                                  -self._next_run)
+                self._release(late)
 
-                # If keeping a latency profile, record the data
-                if self._prof:
-                    self._late_sum += late
-                    if late > self._latest:
-                        self._latest = late
+        # If the task doesn't use a timer, we rely on the go flag to signal ready
+        return self._go
 
-        # If the task doesn't use a timer, we rely on go_flag to signal ready
-        return self.go_flag
+
+    ## This method releases a timed task whose run time has come. It sets the
+    #  go flag and moves the next run time forward as @c _advance() does, and
+    #  records how late the release was if profiling.
+    #  @param late How many microseconds after its run time the task was found
+    #         to be due
+    @micropython.native
+    def _release(self, late):
+        self._advance(late)
+
+        # If keeping a latency profile, record the data
+        if self._prof:
+            self._note_late(late)
+
+        # A critical task's lateness tells the task list when to shed load
+        if self.critical and self._list is not None:
+            self._list._watch(self, late)
+
+
+    ## This method sets the go flag of a timed task whose run time has come
+    #  and moves its next run time forward, without recording lateness. If
+    #  the task is a whole period or more behind, the releases it has missed
+    #  are counted and handled according to the task's overrun policy.
+    #  @param late How many microseconds after its run time the task was found
+    #         to be due
+    @micropython.native
+    def _advance(self, late):
+        self._go = True
+        period = self.period
+        if late < period or period <= 0:
+            self._next_run = utime.ticks_add(self._next_run, period)
+
+        # This release is so late that the next one is already due. When
+        # catching up, the next one will run late too; otherwise the releases
+        # which were due in the meantime are dropped
+        elif self._overrun == CATCH_UP:
+            self._missed += 1
+            self._next_run = utime.ticks_add(self._next_run, period)
+        else:
+            missed = late // period
+            self._missed += missed
+            if self._overrun == SKIP:
+                self._next_run = utime.ticks_add(self._next_run, 
+                                                 late + period)
+            else:
+                self._next_run = utime.ticks_add(self._next_run,
+                                                 (missed + 1) * period)
+
+
+    ## This method adds a release's lateness to the task's latency profile.
+    #  @param late How many microseconds after its release time the task was
+    #         found to be due or, with timer release, was run
+    @micropython.native
+    def _note_late(self, late):
+        self._late_sum += late
+        if late > self._latest:
+            self._latest = late
+        self._late_hist[_bucket(late)] += 1
 
 
     ## This method sets the period between runs of the task to the given
     #  number of milliseconds, or @c None if the task is triggered by calls
-    #  to @c go() rather than time.
+    #  to @c go() rather than time. A task which starts running on a timer
+    #  is first run one period from now. A task may change its own period, 
+    #  for example to wait for a share it has subscribed to without being run
+    #  on a timer, and go back to running on a timer once it has work to do.
+    #  A sheddable task's new period is stretched if the task list is 
+    #  shedding load.
     #  @param new_period The new period in milliseconds between task runs
     def set_period(self, new_period):
+        was_timed = self.period != None
         if new_period is None:
             self.period = None
+            self._next_run = None
         else:
             self.period = int(new_period) * 1000
+            if not was_timed:
+                self._next_run = utime.ticks_add(utime.ticks_us(), 
+                                                 self.period)
+        self._base_period = self.period
+        if self.sheddable and self.period != None and self._list is not None:
+            self.period <<= self._list.shed_level
+
+        # The task list keeps timed and untimed tasks apart, and a list which
+        # releases tasks from a timer needs to know the new period
+        if self._list is not None and (was_timed != (new_period != None)
+                                       or self._list._timer is not None):
+            self._list._regroup()
 
 
     ## This method resets the variables used for execution time profiling.
@@ -233,33 +486,170 @@ class Task:
         self._slowest = 0
         self._late_sum = 0
         self._latest = 0
+        self._missed = 0
+        if self._prof:
+            for idx in range(HIST_BUCKETS):
+                self._run_hist[idx] = 0
+                self._late_hist[idx] = 0
+        self._alloc_runs = 0
+        self._alloc_sum = 0
+        self._alloc_max = 0
+        self._gc_runs = 0
+        if self._alloc:
+            for idx in range(HIST_BUCKETS):
+                self._alloc_hist[idx] = 0
+
+        # Time spent suspended is counted from here
+        self._prof_mark = utime.ticks_us()
+        self._susp_sum = 0
+        self._suspends = 0
+        if self._suspended:
+            self._susp_mark = self._prof_mark
 
 
     ## This method returns a string containing the task's transition trace.
-    #  The trace is a set of tuples, each of which contains a time and the
-    #  states from and to which the system transitioned. 
+    #  The trace lists the times, in seconds since the oldest record in the
+    #  trace buffer, at which the task changed state and the states from and
+    #  to which it went. Only transitions still in the buffer are shown. 
     #  @return A possibly quite large string showing state transitions
     def get_trace(self):
         tr_str = 'Task ' + self.name + ':'
         if self._trace:
             tr_str += '\n'
-            last_state = 0
-            total_time = 0.0
-            for item in self._tr_data:
-                total_time += item[0] / 1000000.0
-                tr_str += '{: 12.6f}: {: 2d} -> {:d}\n'.format (total_time, 
-                    last_state, item[1])
-                last_state = item[1]
+            buf = self._tr_buf
+            first = None
+            for (stime, dur, task_id, from_st, to_st) in buf.records():
+                if first is None:
+                    first = stime
+                if task_id == self._tr_id and from_st != to_st:
+                    tr_str += '{: 12.6f}: {: 2d} -> {:d}\n'.format (
+                        utime.ticks_diff(stime, first) / 1000000.0, 
+                        from_st, to_st)
         else:
             tr_str += ' not traced'
         return tr_str
 
 
+    ## This method makes a line of text showing percentiles of the task's run
+    #  time and lateness, estimated from its histograms, in milliseconds.
+    #  @return The line of text, or @c None if the task isn't profiled
+    def hist_str(self):
+        if not self._prof:
+            return None
+        rst = f"{self.name:<16s}"
+        for hist, longest in ((self._run_hist, self._slowest),
+                              (self._late_hist, self._latest)):
+            for fraction in (0.5, 0.95, 0.99):
+                usec = _percentile(hist, fraction, longest)
+                rst += f"{(usec / 1000.0): 10.3f}"
+        return rst
+
+
+    ## This method makes a line of text showing how much heap memory the
+    #  task's runs allocate: the average and largest number of bytes per run,
+    #  the 95th percentile estimated from the histogram, the total in 
+    #  kilobytes, and the number of runs during which the heap was collected.
+    #  @return The line of text, or @c None if allocation isn't measured
+    def alloc_str(self):
+        if not self._alloc:
+            return None
+        measured = self._alloc_runs - self._gc_runs
+        avg = self._alloc_sum / measured if measured else 0.0
+        rst = f"{self.name:<16s}{self._alloc_runs: 8d}{avg: 10.1f}"
+        rst += f"{_percentile(self._alloc_hist, 0.95, self._alloc_max): 10d}"
+        rst += f"{self._alloc_max: 10d}{(self._alloc_sum / 1024.0): 10.1f}"
+        rst += f"{self._gc_runs: 8d}"
+        return rst
+
+
     ## Method to set a flag so that this task indicates that it's ready to run.
     #  This method may be called from an interrupt service routine or from
-    #  another task which has data that this task needs to process soon.
+    #  another task which has data that this task needs to process soon. It
+    #  is also called when a share or queue to which this task has subscribed
+    #  gets new data. Besides setting the go flag, it marks the task in its
+    #  task list's ready mask, so the schedulers can find the task without
+    #  asking every task whether it's ready; the interrupts are held off
+    #  while the mask is changed, as an interrupt may be calling @c go() too.
+    #  Calling this for a suspended task has no effect.
+    @micropython.native
     def go(self):
-        self.go_flag = True
+        if self._suspended:
+            return
+        self._go = True
+        if self._bit and not self._framed:
+            task_list = self._list
+            irq_state = pyb.disable_irq()
+            task_list._pending |= self._bit
+            pyb.enable_irq(irq_state)
+
+
+    ## Flag which is true when the task is ready to be run by the scheduler.
+    #  Setting it to @c True is the same as calling @c go(), so the task is
+    #  also marked in its task list's ready mask and the schedulers find it;
+    #  setting it to @c False makes the task not ready.
+    @property
+    def go_flag(self):
+        return self._go
+
+
+    @go_flag.setter
+    def go_flag(self, value):
+        if value:
+            self.go()
+        else:
+            self._go = False
+
+
+    ## This method stops the task from being run until @c resume() is called.
+    #  A suspended task is taken out of its task list's priority lists and
+    #  heaps, so the schedulers don't spend any time on it, and calls to
+    #  @c go() have no effect until it is resumed. A task may suspend itself
+    #  when it has nothing to do; its current run continues to its @c yield.
+    def suspend(self):
+        if self._suspended:
+            return
+        self._suspended = True
+        self._suspends += 1
+        self._susp_mark = utime.ticks_us()
+        self._go = False
+        if self._list is not None:
+            self._list._remove(self)
+
+
+    ## This method lets a suspended task be run again. A timed task is due
+    #  right away and then once per period; a task run by @c go() waits for
+    #  its next call to @c go(). Resuming a task which isn't suspended does
+    #  nothing, so another task may call this each time it needs the task.
+    def resume(self):
+        if not self._suspended:
+            return
+        now = utime.ticks_us()
+        self._suspended = False
+        self._susp_sum += utime.ticks_diff(now, self._susp_mark)
+        if self.period != None:
+            self._next_run = now
+        if self._list is not None:
+            self._list._insert(self)
+
+
+    ## This method makes a line of text showing how long the task has been
+    #  active and suspended, in seconds, since profiling started.
+    #  @return The line of text, or @c None if the task has never been
+    #          suspended
+    def suspend_str(self):
+        if not self._suspends and not self._suspended:
+            return None
+        now = utime.ticks_us()
+        suspended = self._susp_sum
+        if self._suspended:
+            suspended += utime.ticks_diff(now, self._susp_mark)
+        total = utime.ticks_diff(now, self._prof_mark)
+        active = total - suspended
+        rst = f"{self.name:<16s}{(active / 1000000.0): 10.1f}"
+        rst += f"{(suspended / 1000000.0): 12.1f}"
+        rst += f"{(100.0 * active / total if total > 0 else 0.0): 10.1f}"
+        rst += f"{self._suspends: 10d}"
+        return rst
 
 
     ## This method converts the task to a string for diagnostic use.
@@ -280,11 +670,378 @@ class Task:
             rst += f"{avg_dur: 10.3f}{(self._slowest / 1000.0): 10.3f}"
             if self.period != None:
                 rst += f"{avg_late: 10.3f}{(self._latest / 1000.0): 10.3f}"
+                rst += f"{self._missed: 8d}"
         return rst
 
 
+## A task which runs a plain function rather than a generator.
+#  Many tasks are one function called every period, with nothing kept 
+#  between runs except in an object's attributes. Such a task can be made a
+#  @c CallTask, which calls the function directly on each run instead of
+#  resuming a generator; @c dispatch_bench.py compares the cost of the two
+#  on the board in use. Profiling, tracing and
+#  everything else work as they do for a @c Task; for tracing, the value the
+#  function returns is taken as the task's state.
+#  @code
+#  task8 = cotask.CallTask(observer_obj.step, name="observer", priority=4,
+#                          period=20, profile=True)
+#  @endcode
+class CallTask(Task):
+
+    ## Initialize a task which calls a function on each run.
+    #  @param call_fun The function, often a bound method, which is called on
+    #         each run of the task. It may return the task's state
+    #  @param args A tuple of arguments given to @c call_fun on each run, or
+    #         @c None to call it with none
+    #  @param shares A list or tuple of shares and queues used by the task.
+    #         If one is given, it is passed to @c call_fun after @c args, as
+    #         it is passed to a generator task's function
+    #  @param kwargs The other parameters are those of @c Task, except
+    #         @c run_fun
+    def __init__(self, call_fun, args=None, shares=(), **kwargs):
+        # There's no generator to make; the function is called directly
+        Task.__init__(self, None, **kwargs)
+        args = tuple(args) if args else ()
+        if shares:
+            args += (shares,)
+        self._call = _bind(call_fun, args)
+
+
+## Make a function which calls another with fixed arguments, so that a 
+#  @c CallTask's run is a call with no arguments. Up to three arguments are
+#  passed by name rather than by unpacking the tuple on each call.
+#  @param fun The function to be called
+#  @param args The tuple of arguments to give it
+#  @return A function of no arguments, or @c fun itself if there are none
+def _bind(fun, args):
+    if not args:
+        return fun
+    if len(args) == 1:
+        arg0, = args
+        return lambda: fun(arg0)
+    if len(args) == 2:
+        arg0, arg1 = args
+        return lambda: fun(arg0, arg1)
+    if len(args) == 3:
+        arg0, arg1, arg2 = args
+        return lambda: fun(arg0, arg1, arg2)
+    return lambda: fun(*args)
+
+
+# =============================================================================
+
+## The number of runs kept in a trace buffer unless another size is given.
+TRACE_SIZE = 256
+
+## The first bytes of a trace buffer dump, which identify the format.
+TRACE_MAGIC = b'CTRC'
+
+## The version of the trace dump format written by @c TraceBuffer.dump().
+TRACE_VERSION = 1
+
+
+## A ring buffer which records runs of traced tasks without allocating memory.
+#
+#  Each record holds the time at which a task started to run, how long it ran,
+#  the task's number and the states from and to which it went, packed into
+#  three 32-bit words of a preallocated array. Once the buffer is full, each
+#  new record overwrites the oldest one. 
+#
+#  The buffer can be written to a file or a UART with @c dump(). The dump
+#  starts with a header and the names of the traced tasks, followed by the 
+#  records from oldest to newest as little-endian 32-bit words:
+#  |      |      |
+#  |:-----|:-----|
+#  | 4 bytes | @c TRACE_MAGIC |
+#  | 1 byte | @c TRACE_VERSION |
+#  | 1 byte | Bytes per word, 4 |
+#  | 2 bytes | Number of task names |
+#  | 4 bytes | Period at which the microsecond tick count wraps around |
+#  | 4 bytes | Number of records in the dump |
+#  | 4 bytes | Number of records made since the buffer was cleared |
+#  | names | Each name as a length byte followed by UTF-8 characters |
+#  | records | Start time, duration, (task << 16) + (from << 8) + to |
+#
+#  The program @c trace_to_chrome.py converts a dump into a trace file which
+#  can be viewed in Chrome's @c about://tracing page or in Perfetto. 
+class TraceBuffer:
+
+    ## Create a trace buffer, allocating all the memory it will use.
+    #  @param size The number of runs which the buffer can hold
+    def __init__(self, size=TRACE_SIZE):
+        self._size = size
+        self._words = 3 * size
+        self._buf = array.array('i', range(self._words))
+        self._names = []
+        self.clear()
+
+
+    ## Give a traced task a number by which its records are identified.
+    #  @param name The name of the task
+    #  @return The number given to the task
+    def register(self, name):
+        self._names.append(name)
+        return len(self._names) - 1
+
+
+    ## Record one run of a task, overwriting the oldest record if the buffer
+    #  is full. This method doesn't allocate memory.
+    #  @param stime The value of @c utime.ticks_us() when the run started
+    #  @param dur The duration of the run in microseconds
+    #  @param task_id The number given to the task by @c register()
+    #  @param from_state The state of the task before the run, 0 to 255
+    #  @param to_state The state yielded by the task, 0 to 255
+    @micropython.native
+    def record(self, stime, dur, task_id, from_state, to_state):
+        buf = self._buf
+        idx = self._head
+        buf[idx] = stime
+        buf[idx + 1] = dur
+        buf[idx + 2] = (task_id << 16) | (from_state << 8) | to_state
+        idx += 3
+        if idx >= self._words:
+            idx = 0
+        self._head = idx
+        self._count += 1
+
+
+    ## Remove all records from the buffer.
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+
+    ## Find how many records are held in the buffer.
+    #  @return The number of records which can be read from the buffer
+    def num_records(self):
+        return self._count if self._count < self._size else self._size
+
+
+    ## A generator which produces the records in the buffer from oldest to
+    #  newest as tuples (start time, duration, task number, from, to).
+    def records(self):
+        buf = self._buf
+        held = self.num_records()
+        idx = self._head - 3 * held
+        if idx < 0:
+            idx += self._words
+        for _ in range(held):
+            packed = buf[idx + 2]
+            yield (buf[idx], buf[idx + 1], packed >> 16, 
+                   (packed >> 8) & 255, packed & 255)
+            idx += 3
+            if idx >= self._words:
+                idx = 0
+
+
+    ## Write the contents of the buffer in the binary format described for
+    #  this class to a stream such as an open file or a UART. 
+    #  @param stream An object with a @c write() method which takes bytes
+    def dump(self, stream):
+        held = self.num_records()
+        stream.write(TRACE_MAGIC)
+        stream.write(struct.pack('<BBHIII', TRACE_VERSION, 4, 
+                                 len(self._names), utime.ticks_add(0, -1) + 1,
+                                 held, self._count))
+        for name in self._names:
+            name = name.encode()
+            stream.write(bytes((len(name),)))
+            stream.write(name)
+
+        # The records are written straight from the array; when the buffer 
+        # has wrapped around, the oldest ones are at the write position
+        view = memoryview(self._buf)
+        if held == self._size:
+            stream.write(view[self._head:])
+        stream.write(view[:self._head])
+
+
+## The trace buffer which records the runs of all tasks created with 
+#  @c trace=True, or @c None if no task is traced. A program can put a 
+#  @c TraceBuffer of another size here before creating its traced tasks.
+trace_buffer = None
+
+## Whether the schedulers note which task is running in @c running. It is
+#  off unless something needs it, such as @c task_share.track_traffic(), so
+#  that runs don't pay for it otherwise.
+note_running = False
+
+## The task whose run is in progress, or @c None between runs or if
+#  @c note_running is off. Interrupt service routines see the task which 
+#  they interrupted.
+running = None
+
+
+# =============================================================================
+
+## The number of samples kept by a telemetry ring unless another size is
+#  given; at one sample every 250 ms this is half a minute.
+TELEMETRY_SIZE = 120
+
+
+## A ring buffer of periodic snapshots of how a task list is using the
+#  processor.
+#
+#  At each sample, the change since the last sample of each task's run time,
+#  number of runs and lateness is stored, along with the time spent idle and
+#  a tag, such as the state of the pathing task, so that the load can be
+#  plotted against what the robot was doing. The counters are those kept for
+#  profiling, so only tasks created with @c profile=True have run times and
+#  lateness. Each sample is kept as 16-bit numbers in a preallocated array,
+#  and taking a sample doesn't allocate memory unless it's also written to a
+#  live stream.
+#
+#  A telemetry ring is made and started with @c TaskList.telemetry(), which
+#  samples it from a task of its own. The samples are written as CSV, with
+#  one row per sample, by @c write_csv(); the columns are the time in
+#  seconds since sampling started, the tag, the idle percentage, and for
+#  each task its percentage of the processor's time, its number of runs and
+#  its average lateness in microseconds. The program @c telemetry_plot.py
+#  plots them.
+class Telemetry:
+
+    ## Make a telemetry ring for the tasks now in a task list.
+    #  @param task_list The task list whose tasks are sampled
+    #  @param size The number of samples kept
+    #  @param tag A function which returns a small integer to be stored with
+    #         each sample, or @c None
+    #  @param live A stream such as a UART to which each sample is written as
+    #         a line of CSV when it's taken, or @c None
+    def __init__(self, task_list, size=TELEMETRY_SIZE, tag=None, live=None):
+        self._list = task_list
+        self._tasks = list(task_list._tasks)
+        self._size = size
+        self._width = 2 + 3 * len(self._tasks)
+        self._times = array.array('l', [0] * size)
+        self._data = array.array('H', [0] * (size * self._width))
+        self._tag = tag
+        self._live = live
+
+        # Each task's run time, runs and lateness, then the list's idle
+        # time, at the last sample
+        self._prev = [0] * (3 * len(self._tasks) + 1)
+        self.clear()
+
+
+    ## Empty the ring and start sampling again from now.
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._start = utime.ticks_ms()
+        self._mark = utime.ticks_us()
+        prev = self._prev
+        for idx, task in enumerate(self._tasks):
+            prev[3 * idx] = task._run_sum
+            prev[3 * idx + 1] = task._runs
+            prev[3 * idx + 2] = task._late_sum
+        prev[-1] = self._list._idle_sum
+        if self._live is not None:
+            self._live.write(self.header() + '\r\n')
+
+
+    ## Take a sample. This is called by the telemetry task.
+    @micropython.native
+    def sample(self):
+        now = utime.ticks_us()
+        elapsed = utime.ticks_diff(now, self._mark)
+        if elapsed <= 0:
+            return
+        self._mark = now
+        prev = self._prev
+        data = self._data
+        base = self._head * self._width
+
+        data[base] = (self._tag() & 0xFFFF) if self._tag else 0
+        idle = self._list._idle_sum
+        used = idle - prev[-1] if idle >= prev[-1] else idle
+        prev[-1] = idle
+        data[base + 1] = min(1000, used * 1000 // elapsed)
+
+        # Profiles which have been reset since the last sample count from 0
+        tasks = self._tasks
+        for idx in range(len(tasks)):
+            task = tasks[idx]
+            pos = 3 * idx
+            value = task._run_sum
+            used = value - prev[pos] if value >= prev[pos] else value
+            prev[pos] = value
+            value = task._runs
+            runs = value - prev[pos + 1] if value >= prev[pos + 1] else value
+            prev[pos + 1] = value
+            value = task._late_sum
+            late = value - prev[pos + 2] if value >= prev[pos + 2] else value
+            prev[pos + 2] = value
+            data[base + 2 + pos] = min(1000, used * 1000 // elapsed)
+            data[base + 3 + pos] = min(0xFFFF, runs)
+            data[base + 4 + pos] = min(0xFFFF, late // runs) if runs else 0
+
+        self._times[self._head] = utime.ticks_diff(utime.ticks_ms(),
+                                                   self._start)
+        index = self._head
+        self._head = (self._head + 1) % self._size
+        self._count += 1
+        if self._live is not None:
+            self._live.write(self.row(index) + '\r\n')
+
+
+    ## Find how many samples the ring holds.
+    #  @return The number of samples, at most the ring's size
+    def num_samples(self):
+        return min(self._count, self._size)
+
+
+    ## Make the header line of the CSV made by @c write_csv().
+    #  @return The column names separated by commas
+    def header(self):
+        cols = 'time_s,tag,idle_pct'
+        for task in self._tasks:
+            name = task.name.replace(',', ' ')
+            cols += f",{name} cpu_pct,{name} runs,{name} late_us"
+        return cols
+
+
+    ## Make a line of CSV from one sample.
+    #  @param index The place of the sample in the ring
+    #  @return The values separated by commas
+    def row(self, index):
+        base = index * self._width
+        data = self._data
+        line = f"{(self._times[index] / 1000.0):.3f},{data[base]}," \
+            f"{(data[base + 1] / 10.0):.1f}"
+        for pos in range(base + 2, base + self._width, 3):
+            line += f",{(data[pos] / 10.0):.1f},{data[pos + 1]}," \
+                f"{data[pos + 2]}"
+        return line
+
+
+    ## Write the samples held in the ring as CSV, oldest first, to a stream
+    #  such as a UART, a file or @c sys.stdout.
+    #  @param stream An object with a @c write() method which takes text
+    #  @param header Whether to write the header line first
+    def write_csv(self, stream, header=True):
+        if header:
+            stream.write(self.header() + '\r\n')
+        held = self.num_samples()
+        first = (self._head - held) % self._size
+        for offset in range(held):
+            stream.write(self.row((first + offset) % self._size) + '\r\n')
+
+
 # =============================================================================
 
+## Dispatch policy for @c TaskList.heap_sched() which runs the ready task with
+#  the highest priority first, as @c TaskList.pri_sched() does.
+FIXED_PRIORITY = 0
+
+## Dispatch policy for @c TaskList.heap_sched() which runs the ready task with
+#  the earliest deadline first. The deadline of a timed task is the end of
+#  its current period; a task triggered by @c go() is due immediately.
+EDF = 1
+
+## The number of load shedding events kept in a task list's shedding log.
+SHED_LOG_SIZE = 16
+
+
 ## A list of tasks used internally by the task scheduler.
 #  This class holds the list of tasks which will be run by the task scheduler.
 #  The task list is usually not directly used by the programmer except when
@@ -296,11 +1053,25 @@ class Task:
 #  look through the list to find the highest priority task which is ready to
 #  run at any given time. Tasks can also be scheduled in a simpler
 #  "round-robin" fashion.
+#
+#  Timed tasks are also kept in a heap ordered by next run time, so that
+#  @c heap_sched() only has to look at the task which is due soonest rather
+#  than asking every task whether it is ready. Tasks which have been released
+#  wait in a second heap ordered by the list's dispatch policy, either
+#  @c FIXED_PRIORITY or @c EDF. 
 class TaskList:
 
     ## Initialize the task list. This creates the list of priorities in
     #  which tasks will be organized by priority.
-    def __init__(self):
+    #  @param policy The order in which @c heap_sched() runs ready tasks,
+    #         either @c FIXED_PRIORITY (the default) or @c EDF
+    #  @param idle A function which the schedulers call when no task is ready,
+    #         such as @c wfi_idle() or @c lightsleep_idle(), or @c None to 
+    #         keep polling. It is called as @c idle(task_list, wait_us) and
+    #         should return after @c wait_us microseconds, or sooner if 
+    #         @c task_list.go_pending() becomes true. @c wait_us is @c None if
+    #         no task runs on a timer. 
+    def __init__(self, policy=FIXED_PRIORITY, idle=None):
 
         ## The list of priority lists. Each priority for which at least one 
         #  task has been created has a list whose first element is a task 
@@ -308,12 +1079,196 @@ class TaskList:
         #  that priority. 
         self.pri_list = []
 
+        # Every task in the list, in the order in which they were appended
+        self._tasks = []
+
+        ## The order in which @c heap_sched() runs tasks which are ready,
+        #  @c FIXED_PRIORITY or @c EDF
+        self.policy = policy
+
+        # The heap of timed tasks waiting to be released, ordered by next run
+        # time, and the heap of released tasks waiting to run, ordered by the
+        # dispatch policy. Both have room for every task in the list so that
+        # the scheduler never has to allocate memory
+        self._timers = []
+        self._n_timers = 0
+        self._ready = []
+        self._n_ready = 0
+
+        # Tasks which aren't run by a timer but by calls to their go() methods
+        self._events = []
+
+        # The tasks ranked by priority, the first 30 of which have bits in the
+        # ready masks, lowest bit first, and the rank of each bit. If there
+        # are more tasks, those left without bits are asked whether they're
+        # ready, as they were before there were masks
+        self._ranked = []
+        self._bit_index = {}
+        self._unranked = False
+
+        # Bits of tasks released by go() or by the timer since a scheduler
+        # last looked, and bits of those tasks which haven't yet been run.
+        # The first is changed by interrupts, the second only by schedulers
+        self._pending = 0
+        self._flagged = 0
+
+        # A time before which no timed task is due, known once pri_sched()
+        # has found nothing ready, so that it can then go straight to the
+        # ready mask; it's forgotten when a task's next run may have moved
+        # earlier
+        self._due_bound = 0
+        self._bound_ok = False
+
+        ## The function called to wait for the next task release when no task
+        #  is ready to run, or @c None to keep polling
+        self.idle_fun = idle
+
+        # Microseconds spent in the idle function and in total since the
+        # idle statistics were started, and the time at which they were last
+        # brought up to date
+        self._idle_sum = 0
+        self._total_sum = 0
+        self._idle_mark = utime.ticks_us()
+
+        # Garbage collection in idle time: the bytes which may be allocated
+        # before a collection is wanted (zero if the list doesn't manage
+        # collection), how soon a task at or above the given priority may be
+        # due for a collection to start, and the heap use after the last one
+        self._gc_limit = 0
+        self._gc_window = 0
+        self._gc_priority = 0
+        self._gc_mark = 0
+        self.reset_gc()
+
+        # Timer release, used by tick_sched(): the hardware timer, if any,
+        # the tick length, and whether the tick's work is deferred with
+        # micropython.schedule(). The release table holds for each rank the
+        # ticks left until the task's next release and the ticks between
+        # releases
+        self._timer = None
+        self._tick_us = 0
+        self._soft = False
+        self._left = array.array('i')
+        self._reload = array.array('i')
+
+        # Set while a deferred tick is waiting to be run
+        self._tick_busy = False
+        self._due = 0
+
+        ## The number of timer ticks since timer release was started
+        self.ticks = 0
+
+        ## The number of timer ticks whose work couldn't be done in time: a
+        #  deferred tick still waiting when the next one came, or one which
+        #  @c micropython.schedule() had no room to queue
+        self.tick_overruns = 0
+
+        # Cyclic executive, used by frame_sched(): the timer which starts the
+        # minor frames, the tasks run in frames, the frame table of bit masks
+        # over those tasks, the frame length, how close to the next frame
+        # other tasks may still be started, the index of the frame last run,
+        # the number of frames started but not yet run, and the times at 
+        # which the latest frame started and the next one will
+        self._frame_timer = None
+        self._frame_tasks = ()
+        self._frame_table = ()
+        self._frame_us = 0
+        self._frame_guard = 0
+        self._frame_idx = -1
+        self._frame_due = 0
+        self._frame_start = 0
+        self._frame_next = 0
+        self.reset_frames()
+
+        # Load shedding: whether it's on, how late a critical task must be
+        # to count, how many late releases within the window start shedding,
+        # and how long critical tasks must be on time before shedding is
+        # eased. The count of late releases in the current window, when the
+        # window started, and when a release was last late or the shedding
+        # level last changed
+        self._shed_on = False
+        self._shed_late = 0
+        self._shed_count = 0
+        self._shed_window = 0
+        self._shed_recover = 0
+        self._shed_max = 0
+        self._late_run = 0
+        self._late_mark = 0
+        self._calm_mark = 0
+
+        ## How far load is being shed: sheddable tasks' periods are
+        #  multiplied by two to this power
+        self.shed_level = 0
+
+        ## The number of times the shedding level has changed
+        self.shed_events = 0
+
+        # A ring of the latest shedding events, each a tuple of the time, 
+        # the new level, the critical task which caused it and its lateness
+        self._shed_log = [None] * SHED_LOG_SIZE
+        self._shed_idx = 0
+
+        # Bound methods made now so the interrupt handler doesn't allocate
+        # memory by making them each time
+        self._isr_ref = self._isr
+        self._tick_ref = self._tick
+        self._frame_isr_ref = self._frame_isr
+
 
     ## Append a task to the task list. The list will be sorted by task 
     #  priorities so that the scheduler can quickly find the highest priority
     #  task which is ready to run at any given time. 
     #  @param task The task to be appended to the list
     def append(self, task):
+        self._tasks.append(task)
+        task._list = self
+        self._timers.append(None)
+        self._ready.append(None)
+        self._rank()
+        if not task._suspended:
+            self._insert(task)
+
+
+    ## Rank the tasks by priority and give the first 30 their bits in the
+    #  ready masks, in which the lowest set bit is the highest priority
+    #  ready task. Tasks with the same priority are ranked in the order in
+    #  which they were appended. This is done when a task is appended.
+    def _rank(self):
+        tasks = self._tasks
+        order = sorted(range(len(tasks)),
+                       key=lambda idx: (-tasks[idx].priority, idx))
+        ranked = [tasks[idx] for idx in order]
+        bit_index = {}
+        flagged = 0
+        for rank, task in enumerate(ranked):
+            if rank < 30:
+                task._bit = 1 << rank
+                bit_index[task._bit] = rank
+                if task._go and not task._framed:
+                    flagged |= task._bit
+            else:
+                task._bit = 0
+
+        # Bits may have moved, so ready tasks are found from their flags
+        irq_state = pyb.disable_irq()
+        self._ranked = ranked
+        self._bit_index = bit_index
+        self._unranked = len(ranked) > 30
+        self._pending = 0
+        self._flagged = flagged
+        pyb.enable_irq(irq_state)
+
+
+    ## Put a task into the priority lists and the heaps used by the
+    #  schedulers. This is done when a task is appended, unless it is 
+    #  suspended, and when a suspended task is resumed.
+    #  @param task The task, which must already be in @c _tasks
+    def _insert(self, task):
+        # Tasks run in frames are kept out of the lists until frames stop
+        if task._framed:
+            return
+        self._bound_ok = False
+
         # See if there's a tasklist with the given priority in the main list
         new_pri = task.priority
         for pri in self.pri_list:
@@ -333,6 +1288,70 @@ class TaskList:
         # Make sure the main list (of lists at each priority) is sorted
         self.pri_list.sort(key=lambda pri: pri[0], reverse=True)
 
+        # Put the task into the heaps used by heap_sched()
+        if task.period is None:
+            self._events.append(task)
+        elif not task._released:
+            self._push_timer(task)
+        if self._timer is not None:
+            self._build_release_table()
+
+
+    ## Take a suspended task out of the priority lists and heaps, so that 
+    #  the schedulers no longer look at it. A priority list left empty is
+    #  kept, as a scheduler may be going through the lists.
+    #  @param task The task being suspended
+    def _remove(self, task):
+        for pri in self.pri_list:
+            if pri[0] == task.priority and task in pri:
+                pri.remove(task)
+                if pri[1] >= len(pri):
+                    pri[1] = 2
+                break
+        self._regroup()
+
+
+    ## Sort the tasks again into timed tasks, which are kept in the heap of
+    #  tasks waiting for release, and tasks run only by @c go(). This is done
+    #  when a task's period is changed to or from @c None, or changed at all
+    #  if tasks are released by a timer, and when a task is suspended. 
+    #  Suspended tasks and tasks run in frames are left out. Timed tasks
+    #  which have been released and are waiting to run or running are left
+    #  for @c heap_sched() to put back.
+    def _regroup(self):
+        self._bound_ok = False
+        for idx in range(self._n_timers):
+            self._timers[idx] = None
+        self._n_timers = 0
+        self._events = []
+        for task in self._tasks:
+            if task._suspended or task._framed:
+                continue
+            if task.period is None:
+                self._events.append(task)
+            elif not task._released:
+                self._push_timer(task)
+        if self._timer is not None:
+            self._build_release_table()
+
+
+    ## Start the timed tasks in the list from one common moment. Each task's
+    #  first run is set to its phase after that moment, or one period after
+    #  it if the task has no phase. This should be called just before the
+    #  scheduler loop starts, as tasks made one after another would otherwise
+    #  start from slightly different times and the phases would be off by the
+    #  time taken to set up the program.
+    #  @param start The tick count in microseconds from which the tasks
+    #         start, or @c None to start them now
+    def align_releases(self, start=None):
+        if start is None:
+            start = utime.ticks_us()
+        for task in self._tasks:
+            if task.period != None:
+                task._next_run = utime.ticks_add(start,
+                    task.period if task.phase is None else task.phase)
+        self._regroup()
+
 
     ## Run tasks in order, ignoring the tasks' priorities.
     #
@@ -343,53 +1362,1072 @@ class TaskList:
     #  tasks are given a chance to run each time through the list, and it takes
     #  about the same amount of time before each is given a chance to run 
     #  again.
+    #  @return @c True if a task was run or @c False if none was ready
     @micropython.native
-    def rr_sched(self):
+    def rr_sched(self) -> bool:
         # For each priority level, run all tasks at that level
+        ran = False
         for pri in self.pri_list:
             for task in pri[2:]:
-                task.schedule()
+                if task.schedule():
+                    ran = True
+
+        if not ran and (self.idle_fun or self._gc_limit):
+            self._idle()
+        return ran
 
 
     ## Run tasks according to their priorities.
     #
     #  This scheduler runs tasks in a priority based fashion. Each time it is
     #  called, it finds the highest priority task which is ready to run and
-    #  calls that task's @c run() method.
+    #  calls that task's @c run() method. Timed tasks are asked whether they
+    #  are due, but tasks run by @c go() are found from the ready mask. Once
+    #  a pass has found nothing ready, the scheduler knows when the next
+    #  timed task is due; until then, it goes straight to the priority of
+    #  the highest priority task marked in the mask, or to the idle function
+    #  if no task is marked, so a pass costs little more when many tasks
+    #  are waiting than when few are.
+    #  @return @c True if a task was run or @c False if none was ready
     @micropython.native
-    def pri_sched(self):
+    def pri_sched(self) -> bool:
+        flagged = self._flagged
+        if self._pending:
+            irq_state = pyb.disable_irq()
+            flagged |= self._pending
+            self._pending = 0
+            pyb.enable_irq(irq_state)
+
+        # If no timed task can be due yet, only a task marked in the mask can
+        # run. Marks left by tasks which have run since are dropped
+        top = None
+        if self._bound_ok and not self._unranked and utime.ticks_diff(
+                self._due_bound, utime.ticks_us()) > 0:
+            while flagged:
+                low = flagged & -flagged
+                task = self._ranked[self._bit_index[low]]
+                if task._go:
+                    top = task.priority
+                    break
+                flagged ^= low
+            if top is None:
+                self._flagged = 0
+                if self.idle_fun or self._gc_limit:
+                    self._idle()
+                return False
+
         # Go down the list of priorities, beginning with the highest
         for pri in self.pri_list:
+            if top is not None and pri[0] > top:
+                continue
+
             # Within each priority list, run tasks in round-robin order
             # Each priority list is [priority, index, task, task, ...] where
             # index is the index of the next task in the list to be run
             tries = 2
             length = len(pri)
             while tries < length:
-                ran = pri[pri[1]].schedule()
+                task = pri[pri[1]]
+                bit = task._bit
+                if bit and task.period is None:
+                    ran = False
+                    if flagged & bit and task._go:
+                        flagged ^= bit
+                        self._flagged = flagged
+                        task._dispatch()
+                        ran = True
+                else:
+                    ran = task.schedule()
                 tries += 1
                 pri[1] += 1
-                if pri[1] >= length:
+
+                # The list is measured again, as a task which has just run
+                # may have suspended itself or another task at this priority
+                if pri[1] >= len(pri):
                     pri[1] = 2
                 if ran:
-                    return
+                    self._flagged = flagged
+                    return True
+
+        # Nothing was due, so no timed task will be due before the soonest
+        # of their next run times
+        self._flagged = flagged
+        now = utime.ticks_us()
+        bound = utime.ticks_add(now, 1 << 28)
+        for task in self._tasks:
+            if task.period != None and not task._suspended and (
+                    not task._framed) and utime.ticks_diff(
+                    task._next_run, bound) < 0:
+                bound = task._next_run
+        self._due_bound = bound
+        self._bound_ok = True
+
+        if self.idle_fun or self._gc_limit:
+            self._idle()
+        return False
+
+
+    ## Run tasks according to their next run times and the list's policy.
+    #
+    #  Instead of asking every task whether it's ready, this scheduler reads
+    #  the time once and releases only those timed tasks at the top of the
+    #  heap whose run times have passed. It then runs the released task which
+    #  comes first under the list's policy: the one with the highest 
+    #  priority for @c FIXED_PRIORITY, or for @c EDF the one whose deadline
+    #  is soonest.
+    #
+    #  A profiled task's lateness is the time from its run time until it is
+    #  run, so it includes the time it waited behind other ready tasks, and
+    #  the lateness of critical tasks is watched for load shedding when they
+    #  run. Calling @c go() on a timed task has it run as soon as the policy
+    #  allows, as a task run by @c go() would, without moving its next
+    #  release; if that release comes while the task is still waiting, one
+    #  run serves both.
+    #  @return @c True if a task was run or @c False if none was ready
+    @micropython.native
+    def heap_sched(self) -> bool:
+        now = utime.ticks_us()
+        edf = self.policy == EDF
+
+        # Release the timed tasks whose run times have passed. A released task
+        # leaves the timer heap until it has run, so a task which is several 
+        # periods behind is released once per pass and catches up as it would
+        # under pri_sched(). Its lateness is counted from the run time just
+        # passed once it is run
+        timers = self._timers
+        while self._n_timers > 0:
+            task = timers[0]
+            late = utime.ticks_diff(now, task._next_run)
+            if late <= 0:
+                break
+            self._pop_timer()
+            task._rel_time = task._next_run
+            task._advance(late)
+            task._released = True
+            if not task._queued:
+                task._key = task._next_run if edf else -task.priority
+                self._push_ready(task)
+
+        # Tasks marked in the ready mask by go() are ready, and if the policy
+        # is EDF they are due right away. A timed task marked this way stays
+        # in the timer heap, so its releases keep to their times
+        flagged = self._flagged
+        if self._pending:
+            irq_state = pyb.disable_irq()
+            flagged |= self._pending
+            self._pending = 0
+            pyb.enable_irq(irq_state)
+        while flagged:
+            low = flagged & -flagged
+            flagged ^= low
+            task = self._ranked[self._bit_index[low]]
+            if task._go and not task._queued and not task._suspended:
+                task._key = now if edf else -task.priority
+                self._push_ready(task)
+        self._flagged = 0
+
+        # Tasks beyond the 30 which have bits are asked, as before
+        if self._unranked:
+            for task in self._tasks:
+                if not task._bit and task._go and not task._queued and (
+                        not task._suspended) and not task._framed:
+                    task._key = now if edf else -task.priority
+                    self._push_ready(task)
+
+        if self._n_ready == 0:
+            if self.idle_fun or self._gc_limit:
+                self._idle()
+            return False
+
+        # A task suspended while it waited isn't run; a timed one goes back
+        # into the timer heap when it's resumed
+        task = self._pop_ready()
+        while task._suspended:
+            task._queued = False
+            task._released = False
+            if self._n_ready == 0:
+                return False
+            task = self._pop_ready()
+
+        # A task released by its timer is as late as the time it has waited
+        # since its run time
+        if task._released and (task._prof or task.critical):
+            late = utime.ticks_diff(utime.ticks_us(), task._rel_time)
+            if task._prof:
+                task._note_late(late)
+            if task.critical:
+                self._watch(task, late)
+
+        # A task stays marked as queued and released while it runs, so that if
+        # it changes its own period or suspends itself it will be put into the
+        # right group here
+        task._dispatch()
+        task._queued = False
+        if task._released:
+            task._released = False
+            if task.period != None and not task._suspended:
+                self._push_timer(task)
+        return True
+
+
+    ## Release timed tasks from a hardware timer instead of asking each task
+    #  whether it's due. On each tick of the timer, its interrupt handler
+    #  counts down a small table holding the ticks left until each timed
+    #  task's next release; when a task's count runs out, the handler sets
+    #  the task's go flag and marks the task as released in a bit mask. The
+    #  scheduler @c tick_sched() then only has to look at the marked tasks.
+    #
+    #  Task periods and phases are rounded to whole ticks. Timer release
+    #  works for lists of up to 30 tasks, as MicroPython's small integers 
+    #  hold 30 bits, and it should be started after the tasks have been
+    #  appended and their releases aligned. Since the handler may run in an
+    #  interrupt, @c micropython.alloc_emergency_exception_buf() should be
+    #  called early in the program so that errors in it can be reported.
+    #  @code
+    #  cotask.task_list.align_releases()
+    #  cotask.task_list.timer_release(pyb.Timer(7, freq=1000), tick_ms=1)
+    #  while True:
+    #      cotask.task_list.tick_sched()
+    #  @endcode
+    #  @param timer The timer, already set running at one tick per 
+    #         @c tick_ms milliseconds, whose callback is to be used
+    #  @param tick_ms The time in milliseconds between the timer's ticks
+    #  @param soft If @c True, the interrupt handler only counts the tick and
+    #         uses @c micropython.schedule() to update the release table 
+    #         outside of the interrupt; ticks which come before the last one
+    #         has been handled are counted in @c tick_overruns but are not
+    #         lost, as the next update catches up
+    def timer_release(self, timer, tick_ms=1, soft=False):
+        if len(self._tasks) > 30:
+            raise ValueError("Timer release works with at most 30 tasks")
+        self._tick_us = int(tick_ms * 1000)
+        self._soft = soft
+        self._due = 0
+        self._timer = timer
+        self._build_release_table()
+        timer.callback(self._isr_ref)
+
+
+    ## Stop releasing tasks from the timer. Tasks are then released by 
+    #  @c pri_sched(), @c rr_sched() or @c heap_sched() comparing the time
+    #  with their next run times, which the timer has kept up to date.
+    def stop_timer_release(self):
+        if self._timer is not None:
+            self._timer.callback(None)
+            self._timer = None
+
+
+    ## Make the release table used by the timer's interrupt handler, in the
+    #  order in which the tasks are ranked. This is done when timer release
+    #  is started and whenever a task is added or has its period changed.
+    #  The count for each timed task starts from the task's next run time;
+    #  tasks run by @c go() have no entry in the table.
+    def _build_release_table(self):
+        ranked = self._ranked
+        left = array.array('i', [0] * len(ranked))
+        reload = array.array('i', [0] * len(ranked))
+        tick = self._tick_us
+        now = utime.ticks_us()
+        for rank, task in enumerate(ranked):
+            if task._suspended or task._framed:
+                continue
+            if task.period != None:
+                reload[rank] = max(1, (task.period + tick // 2) // tick)
+                until = utime.ticks_diff(task._next_run, now)
+                left[rank] = max(1, (until + tick - 1) // tick)
+
+        irq_state = pyb.disable_irq()
+        self._left = left
+        self._reload = reload
+        pyb.enable_irq(irq_state)
+
+
+    ## The timer's interrupt handler. It counts the tick, then either updates
+    #  the release table right away or has it updated soon after by 
+    #  @c micropython.schedule(). 
+    #  @param timer The timer which ticked
+    @micropython.native
+    def _isr(self, timer):
+        self._due += 1
+        if not self._soft:
+            self._tick(0)
+        elif self._tick_busy:
+            self.tick_overruns += 1
+        else:
+            self._tick_busy = True
+            try:
+                micropython.schedule(self._tick_ref, 0)
+            except RuntimeError:
+                # The schedule queue is full; the next tick will try again
+                self._tick_busy = False
+                self.tick_overruns += 1
+
+
+    ## Count down the release table by the ticks which have come since it 
+    #  was last updated and release the tasks whose counts run out. A task
+    #  released again before it has run is counted as having missed a 
+    #  release, and the two releases are merged into one.
+    #  @param arg Not used; required by @c micropython.schedule()
+    @micropython.native
+    def _tick(self, arg):
+        irq_state = pyb.disable_irq()
+        due = self._due
+        self._due = 0
+        self._tick_busy = False
+        pyb.enable_irq(irq_state)
+
+        self.ticks += due
+        now = utime.ticks_us()
+        left = self._left
+        reload = self._reload
+        ranked = self._ranked
+        released = 0
+        for rank in range(len(ranked)):
+            period = reload[rank]
+            if period:
+                count = left[rank] - due
+                if count <= 0:
+                    task = ranked[rank]
+                    if task._go:
+                        task._missed += 1
+                    task._go = True
+                    task._rel_time = now
+                    released |= task._bit
+                    while count <= 0:
+                        count += period
+                        if count <= 0:
+                            task._missed += 1
+                    task._next_run = utime.ticks_add(now,
+                                                     count * self._tick_us)
+                left[rank] = count
+        irq_state = pyb.disable_irq()
+        self._pending |= released
+        pyb.enable_irq(irq_state)
+
+
+    ## Run the highest priority task which has been released by the timer
+    #  or by @c go(). This scheduler is used with @c timer_release(); rather
+    #  than asking every task whether it's ready, it picks the lowest set
+    #  bit of the ready mask, in which the tasks are ranked by priority.
+    #  Tasks with the same priority are run in the order in which they were
+    #  appended rather than in turn.
+    #
+    #  A profiled task's lateness is the time from its release by the timer
+    #  until it is run.
+    #  @return @c True if a task was run or @c False if none was ready
+    @micropython.native
+    def tick_sched(self) -> bool:
+        flagged = self._flagged
+        if self._pending:
+            irq_state = pyb.disable_irq()
+            flagged |= self._pending
+            self._pending = 0
+            pyb.enable_irq(irq_state)
+
+        while flagged:
+            low = flagged & -flagged
+            flagged ^= low
+            task = self._ranked[self._bit_index[low]]
+            if task._go:
+                self._flagged = flagged
+                if task.period != None and (task._prof or task.critical):
+                    late = utime.ticks_diff(utime.ticks_us(), task._rel_time)
+                    if task._prof:
+                        task._note_late(late)
+                    if task.critical:
+                        self._watch(task, late)
+                task._dispatch()
+                return True
+
+        self._flagged = 0
+        if self.idle_fun or self._gc_limit:
+            self._idle()
+        return False
+
+
+    ## Run some tasks as a cyclic executive, in fixed minor frames started by
+    #  a hardware timer, rather than releasing them by their periods.
+    #  Each entry of the frame table is a bit mask over @c tasks; bit 0 is
+    #  the first task. When a frame starts, @c frame_sched() runs the tasks
+    #  whose bits are set in that frame's entry, in the order in which they
+    #  are given, before anything else, and goes on to the next entry at the
+    #  next frame. The table repeats, so its length times the frame length
+    #  is the major frame. A table can be made from the task list in
+    #  @c main.py by @c frame_planner.py.
+    #
+    #  Between frames, the other tasks in the list are run by @c pri_sched().
+    #  As no task is interrupted, a frame which starts while another task is
+    #  running is late by the rest of that run; a task isn't started between
+    #  frames if the next frame starts within @c guard_ms, so the guard
+    #  should be a little longer than the longest run of any other task.
+    #  @code
+    #  cotask.task_list.frame_release(pyb.Timer(7, freq=200), 5,
+    #                                 (task2, task3, task5), FRAME_TABLE)
+    #  while True:
+    #      cotask.task_list.frame_sched()
+    #  @endcode
+    #  @param timer The timer, already set running at one tick per frame,
+    #         whose callback is to be used
+    #  @param frame_ms The length of a minor frame in milliseconds
+    #  @param tasks The tasks run in frames, at most 30, which must already
+    #         have been appended to this list. The period of each task which
+    #         has one must be a whole number of frames, and the table must 
+    #         run the task at that period
+    #  @param table A list or tuple of bit masks, one for each minor frame
+    #  @param guard_ms Other tasks aren't started if the next frame starts
+    #         sooner than this
+    def frame_release(self, timer, frame_ms, tasks, table, guard_ms=0):
+        if len(tasks) > 30:
+            raise ValueError("A frame table works with at most 30 tasks")
+        if not table:
+            raise ValueError("The frame table is empty")
+        for mask in table:
+            if mask >> len(tasks):
+                raise ValueError(f"Frame mask {mask:#x} runs a task which "
+                                 "isn't in the list of frame tasks")
+        frame_us = int(frame_ms * 1000)
+        for bit, task in enumerate(tasks):
+            if task._list is not self:
+                raise ValueError(f"Task {task.name} hasn't been appended "
+                                 "to this task list")
+
+            # A task with a period must be run by the table at that period,
+            # so that the table doesn't quietly change it
+            if task.period != None:
+                runs = [idx for idx, mask in enumerate(table)
+                        if mask >> bit & 1]
+                step = task.period // frame_us
+                if (task.period % frame_us or not step or len(table) % step
+                        or not runs
+                        or runs != list(range(runs[0], len(table), step))):
+                    raise ValueError(f"The frame table doesn't run task "
+                                     f"{task.name} every "
+                                     f"{task.period // 1000} ms, its period")
+
+        self.stop_frame_release()
+        self._frame_tasks = tuple(tasks)
+        self._frame_table = tuple(table)
+        self._frame_us = frame_us
+        self._frame_guard = int(guard_ms * 1000)
+        self._frame_idx = -1
+        self._frame_due = 0
+        self._frame_next = utime.ticks_add(utime.ticks_us(), self._frame_us)
+        for task in self._frame_tasks:
+            task._framed = True
+            task._go = False
+            self._remove(task)
+        self.reset_frames()
+        self._frame_timer = timer
+        timer.callback(self._frame_isr_ref)
+
+
+    ## Stop running tasks in frames. The frame tasks go back to being run by
+    #  their periods, or by @c go(), starting one period from now.
+    def stop_frame_release(self):
+        if self._frame_timer is None:
+            return
+        self._frame_timer.callback(None)
+        self._frame_timer = None
+        now = utime.ticks_us()
+        for task in self._frame_tasks:
+            task._framed = False
+            if task.period != None:
+                task._next_run = utime.ticks_add(now, task.period)
+            if not task._suspended:
+                self._insert(task)
+        self._frame_tasks = ()
+
+
+    ## The frame timer's interrupt handler. It counts the frame and notes
+    #  when it started and when the next one will.
+    #  @param timer The timer which ticked
+    @micropython.native
+    def _frame_isr(self, timer):
+        now = utime.ticks_us()
+        self._frame_due += 1
+        self._frame_start = now
+        self._frame_next = utime.ticks_add(now, self._frame_us)
+
+
+    ## Run a cyclic executive's tasks when their minor frame starts, and
+    #  other tasks by priority in between. This scheduler is used with
+    #  @c frame_release(). Each pass either runs all of a frame's tasks or
+    #  makes one pass of @c pri_sched().
+    #
+    #  If more than one frame has started since the last was run, the frames
+    #  missed are counted in @c frames_skipped and only the latest is run. A
+    #  frame whose tasks haven't all finished when the next frame starts is
+    #  counted in @c frame_overruns. A profiled frame task's lateness is the
+    #  time from the start of its frame until it is run, which includes the
+    #  runs of the tasks before it in the frame; for load shedding, a frame
+    #  which runs critical tasks is watched once, with the frame's lateness.
+    #  @return @c True if a task was run or @c False if none was ready
+    @micropython.native
+    def frame_sched(self) -> bool:
+        if self._frame_due:
+            irq_state = pyb.disable_irq()
+            due = self._frame_due
+            self._frame_due = 0
+            start = self._frame_start
+            pyb.enable_irq(irq_state)
+            if due > 1:
+                self.frames_skipped += due - 1
+            idx = (self._frame_idx + due) % len(self._frame_table)
+            self._frame_idx = idx
+
+            late = utime.ticks_diff(utime.ticks_us(), start)
+            self._frame_late_sum += late
+            if late > self._frame_late_max:
+                self._frame_late_max = late
+
+            mask = self._frame_table[idx]
+            tasks = self._frame_tasks
+            idx = 0
+            watched = None
+            while mask:
+                if mask & 1:
+                    task = tasks[idx]
+                    if not task._suspended:
+                        if task._prof:
+                            task._note_late(utime.ticks_diff(
+                                utime.ticks_us(), start))
+                        if task.critical and watched is None:
+                            watched = task
+                        task._dispatch()
+                mask >>= 1
+                idx += 1
+
+            # A late frame counts once toward load shedding, however many
+            # critical tasks it runs
+            if watched is not None:
+                self._watch(watched, late)
+
+            self.frames += 1
+            if self._frame_due:
+                self.frame_overruns += 1
+            return True
+
+        # Don't start another task just before a frame
+        if self._frame_guard and utime.ticks_diff(
+                self._frame_next, utime.ticks_us()) < self._frame_guard:
+            if self.idle_fun or self._gc_limit:
+                self._idle()
+            return False
+        return self.pri_sched()
+
+
+    ## Restart the frame statistics from zero.
+    def reset_frames(self):
+        ## The number of minor frames which have been run
+        self.frames = 0
+
+        ## The number of minor frames whose tasks were still running when the
+        #  next frame started
+        self.frame_overruns = 0
+
+        ## The number of minor frames which weren't run because a later frame
+        #  had started by the time the scheduler got to them
+        self.frames_skipped = 0
+
+        # Microseconds from the start of each frame until it was run
+        self._frame_late_sum = 0
+        self._frame_late_max = 0
+
+
+    ## Shed load automatically when tasks marked critical keep running late.
+    #  Once @c count releases of critical tasks within @c window_ms have each
+    #  been more than @c late_ms late, the periods of the tasks marked 
+    #  sheddable are doubled, so they are run half as often; if critical
+    #  tasks are still late, the periods are doubled again, up to 
+    #  @c max_level times.
+    #  Once no critical task has been late for @c recover_ms, one doubling is
+    #  undone, and so on until the tasks are back at their own periods. Each
+    #  change is kept in a log which is printed with the task list.
+    #
+    #  A critical task's lateness is measured as in its profile: how long
+    #  after its run time it was found to be due, or with @c heap_sched()
+    #  how long after its run time it was run, or with @c tick_sched() how 
+    #  long after its release it was run. For a task run in frames it is how
+    #  late its frame was started. Only timed sheddable tasks are slowed.
+    #  @param late_ms How late in milliseconds a critical task's release must
+    #         be to count as late
+    #  @param count The number of late releases within the window which start
+    #         or add to shedding
+    #  @param window_ms The time in milliseconds within which late releases
+    #         are counted
+    #  @param recover_ms How long in milliseconds critical tasks must be on
+    #         time before shedding is eased by one step
+    #  @param max_level The most times sheddable periods may be doubled
+    def shed_load(self, late_ms=2, count=4, window_ms=100, recover_ms=1000,
+                  max_level=3):
+        self._shed_late = int(late_ms * 1000)
+        self._shed_count = count
+        self._shed_window = int(window_ms * 1000)
+        self._shed_recover = int(recover_ms * 1000)
+        self._shed_max = max_level
+        self._late_run = 0
+        self._late_mark = self._calm_mark = utime.ticks_us()
+        self._shed_on = True
+
+
+    ## Stop shedding load and put sheddable tasks back at their own periods.
+    def stop_shedding(self):
+        self._shed_on = False
+        if self.shed_level:
+            self._set_shed(0, None, 0)
+
+
+    ## Look at a critical task's lateness and change the shedding level if
+    #  critical tasks have been late too often or on time long enough.
+    #  @param task The critical task which was released or run
+    #  @param late How many microseconds late the task was
+    @micropython.native
+    def _watch(self, task, late):
+        if not self._shed_on:
+            return
+        now = utime.ticks_us()
+        if late > self._shed_late:
+            self._calm_mark = now
+            if utime.ticks_diff(now, self._late_mark) > self._shed_window:
+                self._late_run = 0
+                self._late_mark = now
+            self._late_run += 1
+            if (self._late_run >= self._shed_count
+                    and self.shed_level < self._shed_max):
+                self._late_run = 0
+                self._set_shed(self.shed_level + 1, task, late)
+        else:
+            if self.shed_level and utime.ticks_diff(
+                    now, self._calm_mark) > self._shed_recover:
+                self._calm_mark = now
+                self._set_shed(self.shed_level - 1, task, late)
+
+
+    ## Set the shedding level, stretch the periods of the sheddable tasks to
+    #  match and log the change. This allocates a little memory, but is only
+    #  done when the level changes.
+    #  @param level The new shedding level
+    #  @param task The critical task whose lateness caused the change, or
+    #         @c None if shedding was stopped
+    #  @param late How many microseconds late that task was
+    def _set_shed(self, level, task, late):
+        self.shed_level = level
+        for tsk in self._tasks:
+            if tsk.sheddable and tsk._base_period != None:
+                tsk.period = tsk._base_period << level
+        if self._timer is not None:
+            self._build_release_table()
+
+        self.shed_events += 1
+        self._shed_log[self._shed_idx] = (
+            utime.ticks_us(), level, '-' if task is None else task.name, late)
+        self._shed_idx = (self._shed_idx + 1) % SHED_LOG_SIZE
+
+
+    ## Get the latest load shedding events, oldest first.
+    #  @return A list of tuples (seconds ago, new shedding level, name of the
+    #          critical task which caused the change, its lateness in us)
+    def shed_log(self):
+        now = utime.ticks_us()
+        events = []
+        for offset in range(SHED_LOG_SIZE):
+            event = self._shed_log[(self._shed_idx + offset) % SHED_LOG_SIZE]
+            if event is not None:
+                stime, level, name, late = event
+                events.append((utime.ticks_diff(now, stime) / 1000000.0,
+                               level, name, late))
+        return events
+
+
+    ## Find how long it will be until the next timed task is due to run.
+    #  If tasks are run in frames, the start of the next frame counts as a
+    #  release whatever the priority.
+    #  @param priority If given, only tasks with at least this priority are
+    #         looked at
+    #  @return The number of microseconds until the next release, zero if a
+    #          release is already due, or @c None if no task runs on a timer
+    @micropython.native
+    def time_to_next(self, priority=None):
+        now = utime.ticks_us()
+        wait = None
+        if self._frame_timer is not None:
+            wait = utime.ticks_diff(self._frame_next, now)
+        for task in self._tasks:
+            if task.period != None and not task._suspended and (
+                    not task._framed) and (
+                    priority is None or task.priority >= priority):
+                until = utime.ticks_diff(task._next_run, now)
+                if wait is None or until < wait:
+                    wait = until
+        if wait is not None and wait < 0:
+            wait = 0
+        return wait
+
+
+    ## Check whether any task has had its go flag set, for example by an 
+    #  interrupt service routine calling the task's @c go() method, or a
+    #  minor frame has started. Idle functions check this so that they can
+    #  return early.
+    #  @return @c True if a task's go flag is set or a frame is due
+    @micropython.native
+    def go_pending(self) -> bool:
+        if self._frame_due:
+            return True
+        marked = self._pending | self._flagged
+        while marked:
+            low = marked & -marked
+            marked ^= low
+            if self._ranked[self._bit_index[low]]._go:
+                return True
+        if self._unranked:
+            for task in self._tasks:
+                if not task._bit and task._go and (
+                        not task._suspended) and not task._framed:
+                    return True
+        return False
+
+
+    ## Wait in the idle function until the next task release and keep count
+    #  of the time spent idle. This is called by the schedulers when no task
+    #  was ready to run.
+    def _idle(self):
+        if self._gc_limit:
+            self._idle_gc()
+        if not self.idle_fun:
+            return
+        wait = self.time_to_next()
+        start = utime.ticks_us()
+        self._total_sum += utime.ticks_diff(start, self._idle_mark)
+        if wait != 0:
+            self.idle_fun(self, wait)
+        self._idle_mark = utime.ticks_us()
+        slept = utime.ticks_diff(self._idle_mark, start)
+        self._idle_sum += slept
+        self._total_sum += slept
+
+
+    ## Have the task list collect garbage when the scheduler is idle, so that
+    #  tasks don't need to call @c gc.collect() and collections don't pause
+    #  tasks in the middle of their runs. 
+    #
+    #  A collection is made in idle time once @c threshold bytes have been 
+    #  allocated since the last one, unless a task with at least the given
+    #  priority is due within @c window_ms, in which case it is put off until
+    #  the next idle time. MicroPython's own automatic collection is left on
+    #  as a backstop, set with @c gc.threshold() to @c limit bytes, in case
+    #  there isn't enough idle time. The heap is collected once when this
+    #  method is called. There is no need for an idle function, but without
+    #  one the list collects only when nothing is ready.
+    #
+    #  This does nothing where @c gc.mem_alloc() doesn't exist, such as in
+    #  CPython unless @c sim_platform.install() was asked to provide it.
+    #  @param threshold The bytes allocated after which a collection is made
+    #  @param window_ms A collection isn't started if a task which matters is
+    #         due within this many milliseconds; it should be longer than a
+    #         collection takes
+    #  @param priority Tasks with at least this priority matter; by default,
+    #         all tasks do
+    #  @param limit The threshold for MicroPython's automatic collection, by
+    #         default four times @c threshold
+    def manage_gc(self, threshold=8192, window_ms=3, priority=None,
+                  limit=None):
+        if not hasattr(gc, 'mem_alloc'):
+            return
+        if hasattr(gc, 'threshold'):
+            gc.threshold(4 * threshold if limit is None else limit)
+        self._gc_window = int(window_ms * 1000)
+        self._gc_priority = priority
+        gc.collect()
+        self._gc_mark = gc.mem_alloc()
+        self._gc_limit = threshold
+
+
+    ## Collect garbage if enough has been allocated since the last collection
+    #  and no task which matters is due soon. The length of each collection
+    #  is recorded.
+    def _idle_gc(self):
+        if gc.mem_alloc() - self._gc_mark < self._gc_limit:
+            return
+        wait = self.time_to_next(self._gc_priority)
+        if wait is not None and wait < self._gc_window:
+            self._gc_deferred += 1
+            return
+
+        start = utime.ticks_us()
+        gc.collect()
+        pause = utime.ticks_diff(utime.ticks_us(), start)
+        self._gc_mark = gc.mem_alloc()
+        self._gc_runs += 1
+        self._gc_sum += pause
+        if pause > self._gc_max:
+            self._gc_max = pause
+
+
+    ## Restart the garbage collection statistics from zero.
+    def reset_gc(self):
+        self._gc_runs = 0
+        self._gc_sum = 0
+        self._gc_max = 0
+        self._gc_deferred = 0
+
+
+    ## Find the percentage of time which the scheduler has spent in its idle
+    #  function since the statistics were last reset.
+    #  @return The idle time as a percentage of the elapsed time
+    def idle_percent(self):
+        total = self._total_sum + utime.ticks_diff(utime.ticks_us(),
+                                                   self._idle_mark)
+        if total <= 0:
+            return 0.0
+        return 100.0 * self._idle_sum / total
+
+
+    ## Restart the idle time statistics from zero.
+    def reset_idle(self):
+        self._idle_sum = 0
+        self._total_sum = 0
+        self._idle_mark = utime.ticks_us()
+
+
+    ## Sample how the tasks use the processor at regular intervals into a
+    #  @c Telemetry ring, from a task which is added to the list. This should
+    #  be called after the other tasks have been appended, as only those
+    #  tasks are sampled; the idle time is only measured if the list has an
+    #  idle function.
+    #  @code
+    #  telemetry = cotask.task_list.telemetry(250, tag=lambda: pathing_obj.state)
+    #  ...
+    #  telemetry.write_csv(uart)
+    #  @endcode
+    #  @param interval_ms The time in milliseconds between samples
+    #  @param size The number of samples kept
+    #  @param tag A function which returns a small integer to be stored with
+    #         each sample, or @c None
+    #  @param live A stream to which each sample is written as it's taken,
+    #         or @c None
+    #  @param priority The priority of the sampling task; by default, higher
+    #         than that of any other task, so samples are evenly spaced
+    #  @return The @c Telemetry object which holds the samples
+    def telemetry(self, interval_ms=250, size=TELEMETRY_SIZE, tag=None,
+                  live=None, priority=None):
+        ring = Telemetry(self, size, tag, live)
+        if priority is None:
+            priority = max([task.priority for task in self._tasks] + [0]) + 1
+        self.append(CallTask(ring.sample, name='telemetry', priority=priority,
+                             period=interval_ms, profile=True))
+        return ring
+
+
+    ## Put a timed task into the heap of tasks waiting to be released.
+    #  @param task The task, whose @c _next_run is the heap key
+    @micropython.native
+    def _push_timer(self, task):
+        heap = self._timers
+        idx = self._n_timers
+        self._n_timers = idx + 1
+        while idx > 0:
+            parent = (idx - 1) >> 1
+            if utime.ticks_diff(task._next_run, heap[parent]._next_run) >= 0:
+                break
+            heap[idx] = heap[parent]
+            idx = parent
+        heap[idx] = task
+
+
+    ## Take the task which is due soonest out of the heap of timed tasks.
+    #  @return The task which was at the top of the heap
+    @micropython.native
+    def _pop_timer(self):
+        heap = self._timers
+        top = heap[0]
+        count = self._n_timers - 1
+        self._n_timers = count
+        last = heap[count]
+        heap[count] = None
+        if count > 0:
+            idx = 0
+            while True:
+                child = 2 * idx + 1
+                if child >= count:
+                    break
+                if (child + 1 < count and utime.ticks_diff(
+                        heap[child + 1]._next_run, heap[child]._next_run) < 0):
+                    child += 1
+                if utime.ticks_diff(heap[child]._next_run, last._next_run) >= 0:
+                    break
+                heap[idx] = heap[child]
+                idx = child
+            heap[idx] = last
+        return top
+
+
+    ## Put a released task into the heap of tasks waiting to run.
+    #  @param task The task, whose @c _key has been set for the list's policy
+    @micropython.native
+    def _push_ready(self, task):
+        task._queued = True
+        heap = self._ready
+        idx = self._n_ready
+        self._n_ready = idx + 1
+        while idx > 0:
+            parent = (idx - 1) >> 1
+            if utime.ticks_diff(task._key, heap[parent]._key) >= 0:
+                break
+            heap[idx] = heap[parent]
+            idx = parent
+        heap[idx] = task
+
+
+    ## Take the task which should run next out of the heap of ready tasks.
+    #  @return The ready task which comes first under the list's policy
+    @micropython.native
+    def _pop_ready(self):
+        heap = self._ready
+        top = heap[0]
+        count = self._n_ready - 1
+        self._n_ready = count
+        last = heap[count]
+        heap[count] = None
+        if count > 0:
+            idx = 0
+            while True:
+                child = 2 * idx + 1
+                if child >= count:
+                    break
+                if (child + 1 < count and utime.ticks_diff(
+                        heap[child + 1]._key, heap[child]._key) < 0):
+                    child += 1
+                if utime.ticks_diff(heap[child]._key, last._key) >= 0:
+                    break
+                heap[idx] = heap[child]
+                idx = child
+            heap[idx] = last
+        return top
 
 
     ## Create some diagnostic text showing the tasks in the task list.
+    #  Suspended tasks, which aren't in the priority lists, are shown too.
     def __repr__(self):
+        tasks = sorted(self._tasks, key=lambda task: -task.priority)
         ret_str = 'TASK             PRI    PERIOD    RUNS   AVG DUR   MAX ' \
-            'DUR  AVG LATE  MAX LATE\n'
-        for pri in self.pri_list:
-            for task in pri[2:]:
-                ret_str += str(task) + '\n'
+            'DUR  AVG LATE  MAX LATE  MISSED\n'
+        for task in tasks:
+            ret_str += str(task) + '\n'
+
+        if self.idle_fun:
+            ret_str += f"{'IDLE':<20s}{self.idle_percent(): 10.1f}%\n"
+        if self._gc_limit:
+            avg = self._gc_sum / self._gc_runs / 1000.0 if self._gc_runs \
+                else 0.0
+            ret_str += f"{'GC':<20s}{self._gc_runs: 10d} collections, " \
+                f"{avg:.3f} ms avg, {(self._gc_max / 1000.0):.3f} ms max, " \
+                f"{self._gc_deferred} put off\n"
+        if self._timer is not None:
+            ret_str += f"{'TICK OVERRUNS':<20s}{self.tick_overruns: 10d} " \
+                f"in {self.ticks} ticks\n"
+        if self._frame_timer is not None:
+            avg = self._frame_late_sum / self.frames / 1000.0 if self.frames \
+                else 0.0
+            ret_str += f"{'FRAMES':<20s}{self.frames: 10d} run, " \
+                f"{self.frame_overruns} overruns, {self.frames_skipped} " \
+                f"skipped, start late {avg:.3f} ms avg, " \
+                f"{(self._frame_late_max / 1000.0):.3f} ms max\n"
+        if self.shed_events:
+            ret_str += f"{'SHED LEVEL':<20s}{self.shed_level: 10d}, " \
+                f"{self.shed_events} changes\n"
+
+        # Percentiles of run time and lateness are upper bucket edges of
+        # each profiled task's histograms
+        hist_str = ''
+        for task in tasks:
+            line = task.hist_str()
+            if line:
+                hist_str += line + '\n'
+        if hist_str:
+            ret_str += '\nTASK              RUN P50   RUN P95   RUN P99  ' \
+                'LATE P50  LATE P95  LATE P99\n' + hist_str
+
+        # Heap allocation of the tasks for which it's measured, in bytes
+        alloc_str = ''
+        for task in tasks:
+            line = task.alloc_str()
+            if line:
+                alloc_str += line + '\n'
+        if alloc_str:
+            ret_str += '\nTASK                RUNS AVG BYTES P95 BYTES MAX ' \
+                'BYTES  TOTAL KB GC RUNS\n' + alloc_str
 
+        # Active and suspended time of the tasks which have been suspended
+        susp_str = ''
+        for task in tasks:
+            line = task.suspend_str()
+            if line:
+                susp_str += line + '\n'
+        if susp_str:
+            ret_str += '\nTASK              ACTIVE S SUSPENDED S  ACTIVE %' \
+                '  SUSPENDS\n' + susp_str
+
+        # The latest changes of the load shedding level
+        events = self.shed_log()
+        if events:
+            ret_str += '\nSHED   S AGO  LEVEL  CRITICAL TASK     LATE MS\n'
+            for ago, level, name, late in events:
+                ret_str += f"{ago: 12.3f}{level: 7d}  {name:<16s}" \
+                    f"{(late / 1000.0): 8.3f}\n"
         return ret_str
 
 
-## This is @b the main task list which is created for scheduling when 
-#  @c cotask.py is imported into a program. 
-task_list = TaskList()
+## The longest time in microseconds between the processor's tick interrupts.
+#  @c wfi_idle() stops waiting for interrupts and polls the clock when the next
+#  task is due sooner than this, so a task is never released late by a wait.
+WFI_TICK_US = 1000
+
 
+## An idle function for @c TaskList which waits for interrupts until the next
+#  task is due. The processor's tick interrupt wakes it at least once every
+#  millisecond; an interrupt which calls a task's @c go() method ends the wait
+#  early. Interrupts are disabled while the go flags are checked, so that an
+#  interrupt which arrives just before @c pyb.wfi() still wakes the processor.
+#  @param task_list The task list on whose behalf the processor waits
+#  @param wait_us The number of microseconds until the next task is due, or 
+#         @c None if no task runs on a timer
+def wfi_idle(task_list, wait_us):
+    if wait_us is None:
+        wait_us = WFI_TICK_US + 1
+    deadline = utime.ticks_add(utime.ticks_us(), wait_us)
+    while True:
+        remaining = utime.ticks_diff(deadline, utime.ticks_us())
+        if remaining <= 0:
+            return
+        irq_state = pyb.disable_irq()
+        if task_list.go_pending():
+            pyb.enable_irq(irq_state)
+            return
+        if remaining > WFI_TICK_US:
+            pyb.wfi()
+        pyb.enable_irq(irq_state)
 
 
+## An idle function for @c TaskList which uses @c machine.lightsleep() for
+#  the whole milliseconds before the next task is due, then finishes the wait
+#  in @c wfi_idle(). This saves more power than @c wfi_idle(), but it should
+#  only be used on ports whose microsecond tick count keeps running in light
+#  sleep, and only interrupts which can wake the processor from light sleep
+#  will end the wait early.
+#  @param task_list The task list on whose behalf the processor waits
+#  @param wait_us The number of microseconds until the next task is due, or 
+#         @c None if no task runs on a timer
+def lightsleep_idle(task_list, wait_us):
+    if wait_us is not None and wait_us >= 2000:
+        start = utime.ticks_us()
+        if not task_list.go_pending():
+            machine.lightsleep(wait_us // 1000 - 1)
+        wait_us -= utime.ticks_diff(utime.ticks_us(), start)
+        if wait_us < 0:
+            wait_us = 0
+    wfi_idle(task_list, wait_us)
 
+
+## This is @b the main task list which is created for scheduling when 
+#  @c cotask.py is imported into a program. 
+task_list = TaskList()
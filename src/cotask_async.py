@@ -0,0 +1,279 @@
+## @file cotask_async.py
+#  This file contains an adapter which runs @c cotask tasks under an
+#  @c asyncio event loop (@c uasyncio on older MicroPython), so that tasks
+#  can share the processor with coroutines which wait for I/O.
+#
+#  The task objects and their generators are used as they are. A
+#  @c Dispatcher runs a task list's scheduler as one coroutine: each pass
+#  runs the task which the scheduler picks, so priorities, periods,
+#  profiling and the rest work as before, and between passes the event loop
+#  runs any other coroutine which is ready. When no task is ready, the
+#  dispatcher sleeps with @c asyncio.sleep_ms() until the next release
+#  rather than calling the task list's idle function. A single task can also
+#  be run as a coroutine of its own with @c as_coroutine().
+#
+#  A task which would block waiting for a line from the UART, such as the UI
+#  task, can be given a @c LineReader in place of the UART. The reader waits
+#  for lines in its own coroutine, using the UART's stream readiness, and
+#  has the @c any(), @c readline() and @c write() methods which the task
+#  already uses, so @c readline() returns at once with a whole line:
+#  @code
+#  dispatcher = cotask_async.Dispatcher(cotask.task_list)
+#  reader = cotask_async.LineReader(uart_obj, task4, dispatcher)
+#  ui_obj = ui(testing_flg, ..., delay, reader, fwd_ref, ...)
+#  ...
+#  asyncio.run(cotask_async.main(dispatcher, reader))
+#  @endcode
+#  @c pyb.I2C has no stream interface, so I2C transfers such as the IMU's
+#  still block; they can only be kept short. On a computer, where
+#  @c asyncio.StreamReader can't wrap a UART, and for objects which aren't
+#  MicroPython streams, the reader polls the stream's @c any() instead.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import sys
+try:
+    import asyncio
+except ImportError:
+    import uasyncio as asyncio
+import utime
+
+import cotask
+
+## The longest time in milliseconds the dispatcher sleeps before looking at
+#  the tasks' go flags again, which may be set by interrupts
+POLL_MS = 10
+
+
+## @brief Sleep in the event loop for a number of milliseconds.
+#
+#  MicroPython's @c asyncio has @c sleep_ms(); CPython's has only
+#  @c sleep(), which is used on the computer.
+#  @param msec The time to sleep in milliseconds
+#  <b> Returns </b>
+#  <blockquote>
+#  An awaitable which finishes after the time
+def sleep_ms(msec):
+    if hasattr(asyncio, 'sleep_ms'):
+        return asyncio.sleep_ms(msec)
+    return asyncio.sleep(msec / 1000.0)
+
+
+## @brief Wait for an event, but no longer than a number of milliseconds.
+#  @param event The @c asyncio.Event to wait for
+#  @param msec The longest time to wait in milliseconds
+async def wait_ms(event, msec):
+    try:
+        if hasattr(asyncio, 'wait_for_ms'):
+            await asyncio.wait_for_ms(event.wait(), msec)
+        else:
+            await asyncio.wait_for(event.wait(), msec / 1000.0)
+    except asyncio.TimeoutError:
+        pass
+
+
+## @brief Make a coroutine function which waits for the next line from a
+#         stream.
+#
+#  MicroPython's @c asyncio.StreamReader takes the stream itself and waits
+#  until the stream is readable. CPython's takes a buffer limit instead and
+#  must be fed by a transport, so there, and when @c poll_ms is given, the
+#  stream's @c any() is polled, as with a @c pyb.UART.
+#  @param stream The UART or other stream from which lines are read
+#  @param poll_ms How often to poll the stream, or @c None to use a
+#         @c StreamReader where one can wrap the stream
+#  <b> Returns </b>
+#  <blockquote>
+#  A coroutine function of no arguments which returns a line as bytes
+def line_source(stream, poll_ms=None):
+    if poll_ms is None and sys.implementation.name == 'micropython':
+        return asyncio.StreamReader(stream).readline
+    if poll_ms is None:
+        poll_ms = POLL_MS
+
+    async def poll_line():
+        while True:
+            if stream.any():
+                line = stream.readline()
+                if line:
+                    return line
+            await sleep_ms(poll_ms)
+    return poll_line
+
+
+## @brief Runs a @c cotask.TaskList's scheduler as a coroutine.
+class Dispatcher:
+
+    ## @brief Make a dispatcher for a task list.
+    #  @param task_list The task list whose tasks are run
+    #  @param sched The name of the scheduler method used to run them
+    #  @param poll_ms The longest time the dispatcher sleeps at once
+    def __init__(self, task_list=cotask.task_list, sched='pri_sched',
+                 poll_ms=POLL_MS):
+        self.task_list = task_list
+        self._sched = getattr(task_list, sched)
+        self._poll_ms = poll_ms
+        self._event = asyncio.Event()
+        self._running = False
+
+        ## The number of scheduler passes which ran a task
+        self.runs = 0
+
+        ## The number of times the dispatcher slept
+        self.sleeps = 0
+
+    ## @brief Wake the dispatcher if it's sleeping, after a coroutine has
+    #         called a task's @c go() method. Interrupts can't use this;
+    #         their @c go() calls are seen within @c poll_ms.
+    def wake(self):
+        self._event.set()
+
+    ## @brief Have @c run() return after its current scheduler pass.
+    def stop(self):
+        self._running = False
+        self._event.set()
+
+    ## @brief Run the tasks, one scheduler pass at a time, until @c stop()
+    #         is called. The task list's idle function isn't used, as the
+    #         event loop does the waiting.
+    async def run(self):
+        task_list = self.task_list
+        task_list.idle_fun = None
+        self._running = True
+        while self._running:
+            if self._sched():
+                self.runs += 1
+                await sleep_ms(0)
+                continue
+
+            # Nothing is ready; sleep until the next release or a wake().
+            # The sleep is rounded down to whole milliseconds, and the last
+            # part of a millisecond is spent letting other coroutines run
+            wait = task_list.time_to_next()
+            msec = self._poll_ms
+            if wait is not None and wait < msec * 1000:
+                msec = wait // 1000
+            self.sleeps += 1
+            self._event.clear()
+            if msec > 0:
+                await wait_ms(self._event, msec)
+            else:
+                await sleep_ms(0)
+
+
+## @brief Run one task as a coroutine of its own.
+#
+#  A timed task sleeps until each of its releases; a task run by @c go()
+#  looks at its go flag every @c poll_ms. The event loop runs the ready
+#  coroutines in turn, so tasks run this way don't have priorities; a
+#  @c Dispatcher should be used for tasks whose priorities matter. The task
+#  shouldn't also be in a task list which is being run.
+#  @param task The @c cotask.Task to be run
+#  @param poll_ms How often the go flag of a task without a period is read
+async def as_coroutine(task, poll_ms=POLL_MS):
+    while True:
+        if task._suspended:
+            await sleep_ms(poll_ms)
+            continue
+        if task.period != None:
+            wait = utime.ticks_diff(task._next_run, utime.ticks_us())
+            if wait > 0:
+                await sleep_ms(wait // 1000)
+                continue
+            task._release(-wait)
+        elif not task.go_flag:
+            await sleep_ms(poll_ms)
+            continue
+        task._dispatch()
+        await sleep_ms(0)
+
+
+## @brief Reads lines from a stream, such as a UART, in a coroutine, so that
+#         a task can get whole lines without waiting.
+#
+#  An object of this class can be given to a task in place of the UART it
+#  reads from; its @c any(), @c readline(), @c read() and @c write()
+#  methods work on the lines which have already arrived.
+class LineReader:
+
+    ## @brief Make a reader for a stream.
+    #  @param stream The UART or other stream from which lines are read
+    #  @param task A task whose @c go() method is called when a line comes
+    #         in, or @c None
+    #  @param dispatcher The @c Dispatcher to wake when a line comes in, or
+    #         @c None
+    #  @param size The most lines kept; when more come in before they are
+    #         read, the oldest are dropped
+    #  @param poll_ms How often to poll a stream which can't be waited for;
+    #         see @c line_source()
+    def __init__(self, stream, task=None, dispatcher=None, size=8,
+                 poll_ms=None):
+        self._stream = stream
+        self._poll_ms = poll_ms
+        self._task = task
+        self._dispatcher = dispatcher
+        self._size = size
+        self._lines = []
+
+        ## The number of lines dropped because they weren't read in time
+        self.dropped = 0
+
+    ## @brief Read lines from the stream for ever, waiting in the event loop
+    #         until each one has come in.
+    async def run(self):
+        next_line = line_source(self._stream, self._poll_ms)
+        while True:
+            line = await next_line()
+            if len(self._lines) >= self._size:
+                self._lines.pop(0)
+                self.dropped += 1
+            self._lines.append(line)
+            if self._task is not None:
+                self._task.go()
+            if self._dispatcher is not None:
+                self._dispatcher.wake()
+
+    ## @brief Check whether a line has come in.
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The number of lines waiting to be read
+    def any(self):
+        return len(self._lines)
+
+    ## @brief Get the oldest line which has come in.
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The line as bytes, with its line ending, or @c None if there is none
+    def readline(self):
+        if self._lines:
+            return self._lines.pop(0)
+        return None
+
+    ## @brief Get the oldest line which has come in; lines are read whole,
+    #         so the number of bytes asked for is ignored.
+    #  @param nbytes Not used
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The line as bytes, or @c None if there is none
+    def read(self, nbytes=None):
+        return self.readline()
+
+    ## @brief Write to the stream.
+    #  @param data The bytes to be written
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The number of bytes written
+    def write(self, data):
+        return self._stream.write(data)
+
+
+## @brief Run a dispatcher and any other coroutines together, until the
+#         dispatcher is stopped.
+#  @param dispatcher The @c Dispatcher which runs the task list
+#  @param readers @c LineReader objects, or other objects with a @c run()
+#         coroutine, to be run alongside it
+async def main(dispatcher, *readers):
+    for reader in readers:
+        asyncio.create_task(reader.run())
+    await dispatcher.run()
@@ -26,6 +26,16 @@ class data_collector:
         self.velocity_r = velocity_r
         self.velocity2 = velocity2 
         self.state = 1
+        self.task = None
+
+    ## @brief Gives this object the cotask task which runs it.
+    #
+    # While no test is running the task suspends itself, so the scheduler spends no time on it. It subscribes
+    # to the testing flag so that starting a test resumes it.
+    # @param task The cotask.Task made from this object's run generator
+    def set_task(self, task):
+        self.task = task
+        self.testing_flg.subscribe(task, resume=True)
     ## @brief Runs the various tasks Data Collector
     #
     # <b> State 1 </b> Wait for data collection call
@@ -46,37 +56,40 @@ class data_collector:
             if self.state == 1:
                 if self.testing_flg.get() != 0:
                     self.state = self.testing_flg.get()
+                elif self.task:
+                    # Wait to be resumed when a test starts
+                    self.task.suspend()
                 yield 1
             # Queue velocity of left motor
             elif self.state ==2:
                 if self.testing_flg.get() == 0:
                     self.state = 1
-                self.velocity.put(self.velocity_l.get())
+                self.velocity.try_put(self.velocity_l.get())
                 yield 2
             # Queue velocity of right motor
             elif self.state == 3:   
                 if self.testing_flg.get() == 0:
                     self.state = 1
-                self.velocity.put(self.velocity_r.get())
+                self.velocity.try_put(self.velocity_r.get())
                 yield 3
             # Queue position of left motor
             elif self.state == 4:
                 if self.testing_flg.get() == 0:
                     self.state = 1
-                self.position.put(self.position_l.get())
+                self.position.try_put(self.position_l.get())
                 yield 4
             # Queue position of right motor 
             elif self.state == 5:    
                 if self.testing_flg.get() == 0:
                     self.state = 1
-                self.position.put(self.position_r.get())
+                self.position.try_put(self.position_r.get())
                 yield 5
             # Queue both motor velocities at the same time
             elif self.state == 6:
                 if self.testing_flg.get() == 0:
                     self.state = 1
-                self.velocity.put(self.velocity_l.get())
-                self.velocity2.put(self.velocity_r.get())
+                self.velocity.try_put(self.velocity_l.get())
+                self.velocity2.try_put(self.velocity_r.get())
                 yield 6
             else:
                 raise ValueError("Not that many states")
@@ -0,0 +1,139 @@
+## @file dispatch_bench.py
+#  This file contains a benchmark which compares the cost of running a
+#  generator task, a @c cotask.Task, with that of running a task which calls
+#  a plain function, a @c cotask.CallTask.
+#
+#  Each kind of task is run many times, with and without profiling, both by
+#  calling the task's dispatch method directly and through
+#  @c TaskList.pri_sched(), and the average time per run is printed in
+#  microseconds. The saving is that of the direct runs compared with the
+#  generator task. The task functions do nothing, so the times are those of
+#  cotask itself. The benchmark can be run on the Romi, from the REPL with
+#  @c import dispatch_bench then @c dispatch_bench.main(), or on a computer,
+#  where @c sim_platform stands in for the MicroPython modules:
+#  @code
+#  python dispatch_bench.py 20000
+#  @endcode
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import sys
+
+try:
+    import pyb
+except ImportError:
+    import sim_platform
+    sim_platform.install()
+
+import utime
+import cotask
+
+## The number of runs of each kind of task timed unless another is given
+RUNS = 5000
+
+## The number of times each timing is repeated; the fastest is reported, as
+#  the slower ones were held up by something else such as a collection
+REPEATS = 5
+
+
+## @brief A generator task function which does nothing but yield.
+def gen_fun():
+    while True:
+        yield 0
+
+
+## @brief A task function which does nothing, called on each run.
+#  <b> Returns </b>
+#  <blockquote>
+#  The state, zero
+def call_fun():
+    return 0
+
+
+## @brief An object with a method which does nothing, standing in for a
+#         task class such as @c observer.
+class Stepper:
+
+    ## @brief Initializes the object.
+    def __init__(self):
+        self.state = 0
+
+    ## @brief Does nothing with the given arguments.
+    #  @param gain An argument, not used
+    #  @param offset Another argument, not used
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The state, zero
+    def step(self, gain, offset):
+        return self.state
+
+
+## @brief Make the tasks to be compared.
+#  @param profile Whether the tasks are profiled
+#  <b> Returns </b>
+#  <blockquote>
+#  A list of (description, task)
+def make_tasks(profile):
+    stepper = Stepper()
+    return [('generator Task', cotask.Task(gen_fun, name='gen',
+                                           profile=profile)),
+            ('CallTask, function', cotask.CallTask(call_fun, name='call',
+                                                   profile=profile)),
+            ('CallTask, method + args', cotask.CallTask(
+                stepper.step, args=(1.0, 0.0), name='method',
+                profile=profile))]
+
+
+## @brief Time the runs of one task, called directly.
+#  @param task The task to be run
+#  @param runs The number of runs to time
+#  <b> Returns </b>
+#  <blockquote>
+#  The average time per run in microseconds
+def time_dispatch(task, runs):
+    dispatch = task._dispatch
+    start = utime.ticks_us()
+    for _ in range(runs):
+        dispatch()
+    return utime.ticks_diff(utime.ticks_us(), start) / runs
+
+
+## @brief Time the runs of one task through the priority scheduler, with
+#         the task's @c go() method called before each pass.
+#  @param task The task to be run
+#  @param runs The number of runs to time
+#  <b> Returns </b>
+#  <blockquote>
+#  The average time per run in microseconds
+def time_sched(task, runs):
+    task_list = cotask.TaskList()
+    task_list.append(task)
+    sched = task_list.pri_sched
+    start = utime.ticks_us()
+    for _ in range(runs):
+        task.go()
+        sched()
+    return utime.ticks_diff(utime.ticks_us(), start) / runs
+
+
+## @brief Run the benchmark and print the average time per run of each kind
+#         of task.
+#  @param runs The number of runs of each task to time
+def main(runs=RUNS):
+    print(f"{'TASK':<26s}{'PROFILE':>8s}{'DISPATCH US':>13s}"
+          f"{'PRI_SCHED US':>14s}{'SAVING':>9s}")
+    for profile in (False, True):
+        base = None
+        for desc, task in make_tasks(profile):
+            direct = min(time_dispatch(task, runs) for _ in range(REPEATS))
+            sched = min(time_sched(task, runs) for _ in range(REPEATS))
+            if base is None:
+                base = direct
+            saving = 100.0 * (base - direct) / base if base else 0.0
+            print(f"{desc:<26s}{str(profile):>8s}{direct: 13.3f}"
+                  f"{sched: 14.3f}{saving: 8.1f}%")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else RUNS)
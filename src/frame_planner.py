@@ -0,0 +1,178 @@
+## @file frame_planner.py
+#  This file contains a desktop program which turns some of the tasks in
+#  the task table into the frame table of a cyclic executive, to be run by
+#  @c cotask.TaskList.frame_release() and @c frame_sched().
+#
+#  A cyclic executive divides time into minor frames of a fixed length,
+#  each started by one timer tick, and runs a fixed list of tasks at the
+#  start of each frame, so those tasks are run at the same moments every
+#  time rather than whenever the priority scheduler gets to them. The list
+#  for each frame is found here, offline: each frame task's period must be
+#  a whole number of frames, the table is as long as the
+#  least common multiple of those numbers (the major frame), and each task
+#  is given the starting frame at which the busiest frame it would run in
+#  has the least run time already in it. The tasks are placed, and run in
+#  each frame, in order of priority.
+#
+#  By default the motor, encoder and control tasks are put in frames. The
+#  run times and periods are those of a profile printed by the Romi with
+#  @c print(task_list), the MAX DUR and PERIOD columns, so they are the ones
+#  in @c main.py; other tasks' run times are the placeholders in
+#  @c sim_platform.MAIN_TASKS. A period which isn't a whole
+#  number of frames is an error rather than being rounded, so the periods
+#  in @c main.py must be changed first if frames are wanted:
+#  @code
+#  python frame_planner.py profile.txt --frame-ms 5
+#  @endcode
+#  The program prints each task's period in frames, the run time in the
+#  busiest frame and the guard time which keeps other tasks from delaying a
+#  frame, then the frame length, guard and table as Python to be pasted into
+#  @c main.py.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import argparse
+import sys
+
+import phase_planner
+import sim_platform
+
+## The tasks run in frames unless others are named on the command line
+FRAME_TASKS = ('motor_encoder_left', 'motor_encoder_right', 'control_task')
+
+## The most minor frames allowed in a major frame, so that the table stays
+#  small in the Romi's memory
+MAX_FRAMES = 256
+
+
+## @brief Make the frame table for a set of tasks.
+#  @param tasks A list of (name, priority, period in ms, run time in us) of
+#         the tasks to be run in frames
+#  @param frame_ms The length of a minor frame in milliseconds
+#  <b> Returns </b>
+#  <blockquote>
+#  A tuple of the task names in the order of their bits, a dictionary of
+#  task name: (period in frames, first frame), the list of bit masks, one
+#  for each minor frame, and the list of run times in us in each frame
+def plan_frames(tasks, frame_ms):
+    ordered = sorted(tasks, key=lambda tsk: -tsk[1])
+    every = []
+    for name, _, period, _ in ordered:
+        if period < frame_ms or period % frame_ms:
+            raise ValueError(f"The period of {name}, {period:g} ms, isn't a "
+                             f"whole number of {frame_ms:g} ms frames")
+        every.append(int(period // frame_ms))
+    n_frames = phase_planner.hyperperiod(every)
+    if n_frames > MAX_FRAMES:
+        raise ValueError(f"The major frame would have {n_frames} minor "
+                         f"frames; try another frame length")
+
+    table = [0] * n_frames
+    load = [0] * n_frames
+    placed = {}
+    for bit, ((name, _, _, run_us), step) in enumerate(zip(ordered, every)):
+        # Start in the frame whose busiest run is least busy
+        best = None
+        for first in range(step):
+            cost = max(load[first::step])
+            if best is None or cost < best:
+                best = cost
+                placed[name] = (step, first)
+        for frame in range(placed[name][1], n_frames, step):
+            table[frame] |= 1 << bit
+            load[frame] += run_us
+
+    return tuple(tsk[0] for tsk in ordered), placed, table, load
+
+
+## @brief Write a frame table as Python which can be pasted into
+#         @c main.py.
+#  @param names The frame task names in the order of their bits
+#  @param frame_ms The length of a minor frame in milliseconds
+#  @param table The list of bit masks, one for each minor frame
+#  @param guard_ms The guard time for the other tasks in milliseconds
+#  <b> Returns </b>
+#  <blockquote>
+#  The lines of Python as a string
+def format_table(names, frame_ms, table, guard_ms):
+    width = len(names)
+    lines = [f"# Frame table from frame_planner.py; bits from the lowest: "
+             f"{', '.join(names)}",
+             f"FRAME_MS = {frame_ms:g}",
+             f"FRAME_GUARD_MS = {guard_ms:.1f}",
+             "FRAME_TABLE = ("]
+    for start in range(0, len(table), 8):
+        masks = ', '.join(f"0b{mask:0{width}b}"
+                          for mask in table[start:start + 8])
+        lines.append(f"    {masks},")
+    lines.append(")")
+    return '\n'.join(lines)
+
+
+## @brief Plan the frames for the task table, using the run times in a
+#         profile if one is given, and print the plan and the frame table.
+#  @param argv The command line arguments; run with @c --help to list them
+def main(argv):
+    parser = argparse.ArgumentParser(description="Make a cyclic executive "
+                                     "frame table for cotask")
+    parser.add_argument('profile',
+                        help="profile printed by print(task_list) on the "
+                        "Romi, whose MAX DUR column gives the run times")
+    parser.add_argument('--frame-ms', type=float, default=5.0,
+                        help="length of a minor frame in ms")
+    parser.add_argument('--tasks', default=','.join(FRAME_TASKS),
+                        help="comma separated names of the frame tasks")
+    args = parser.parse_args(argv)
+
+    tasks = [list(task) for task in sim_platform.MAIN_TASKS]
+    with open(args.profile) as prof_file:
+        profile = phase_planner.parse_profile(prof_file.read())
+    for task in tasks:
+        if task[0] in profile:
+            _, period, max_dur = profile[task[0]]
+            if period is not None:
+                task[2] = period
+            if max_dur:
+                task[3] = max_dur
+
+    names = args.tasks.split(',')
+    by_name = {task[0]: tuple(task) for task in tasks}
+    for name in names:
+        if name not in by_name:
+            parser.error(f"unknown task '{name}'")
+        if not (name in profile and profile[name][2]):
+            parser.error(f"the profile has no MAX DUR for '{name}'")
+    framed = [by_name[name] for name in names]
+    others = [task for task in tasks if task[0] not in names]
+
+    try:
+        order, placed, table, load = plan_frames(framed, args.frame_ms)
+    except ValueError as err:
+        parser.error(str(err))
+    frame_us = int(args.frame_ms * 1000)
+    guard_us = max((task[3] for task in others), default=0)
+
+    print('TASK                 PRI    PERIOD   MAX DUR  EVERY  FIRST')
+    for name in order:
+        _, priority, period, run_us = by_name[name]
+        step, first = placed[name]
+        print(f"{name:<20s}{priority: 4d}{period: 10g}{run_us: 10d}"
+              f"{step: 7d}{first: 7d}")
+
+    print(f"\n{len(table)} frames of {args.frame_ms:g} ms; run time "
+          f"{max(load) / 1000.0:.1f} ms in the busiest frame, "
+          f"{sum(load) / len(load) / 1000.0:.2f} ms on average")
+    print(f"Guard for the other tasks: {guard_us / 1000.0:.1f} ms, the "
+          f"longest run of {', '.join(task[0] for task in others)}")
+    if max(load) + guard_us > frame_us:
+        print(f"WARNING: a frame's tasks and the guard take "
+              f"{(max(load) + guard_us) / 1000.0:.1f} ms, more than a "
+              f"frame; frames will start late or overrun")
+    print()
+    print(format_table(order, args.frame_ms, table, guard_us / 1000.0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
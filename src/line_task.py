@@ -19,7 +19,6 @@
 # 
 import line_sensor
 import os
-import gc
 SENSOR_START = 0
 SENSOR_END = 12
 ## @brief line_task class that can be initialized to be run with the cotask scheduler. See run for behavior. 
@@ -110,7 +109,6 @@ class line_task:
 
             # Reading state
             elif self.state == 2:
-                gc.collect()
                 self.centroid.put(self.lineSensor.getCentroid())
                 yield 2
             
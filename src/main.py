@@ -17,6 +17,7 @@
 import task_share
 import cotask
 import os
+import sys
 from motor import Motor
 from encoder import Encoder
 from pyb import Timer, Pin, UART, ExtInt, I2C
@@ -55,6 +56,10 @@ EFF_SAT_LINE=40
 
 ERR_SAT_YAW=.8
 EFF_SAT_YAW=100
+
+# Scheduler Defines
+USE_FRAMES = False      # True runs the motor, encoder and control tasks in frames; see the frame table
+TRACK_SHARES = False    # True counts each share's reads and writes, printed with the profile; slows every access
 #---------------------------------------------------------------------------------
 # Create All Shares                                                              #
 #---------------------------------------------------------------------------------
@@ -65,11 +70,15 @@ m_state_r = task_share.Share('b', thread_protect = False, name = "m_state_r")
 PWM_l = task_share.Share('f', thread_protect = False, name = "PWM_l")
 PWM_r = task_share.Share('f', thread_protect = False, name = "PWM_r")
 
-position_r = task_share.Share('f', thread_protect = False, name = "position_r")
-velocity_r = task_share.Share('f', thread_protect = False, name = "velocity_r")
+# Each wheel's position and velocity are published together in one record, so
+# readers always get a matching pair; tasks which need only one of them get a view
+wheel_r = task_share.RecordShare('f', ('position', 'velocity'), name = "wheel_r")
+position_r = wheel_r.field('position')
+velocity_r = wheel_r.field('velocity')
 
-position_l = task_share.Share('f', thread_protect = False, name = "position_l")
-velocity_l = task_share.Share('f', thread_protect = False, name = "velocity_l")
+wheel_l = task_share.RecordShare('f', ('position', 'velocity'), name = "wheel_l")
+position_l = wheel_l.field('position')
+velocity_l = wheel_l.field('velocity')
 
 testing_flg = task_share.Share('b', thread_protect = False, name = "testing_flg")
 delay = task_share.Share('b', thread_protect = False, name = "delay")
@@ -90,7 +99,7 @@ automatic_mode = task_share.Share('b', thread_protect = False, name = "automatic
 
 imu_flg = task_share.Share('b', thread_protect= False, name = "imu_flg")
 
-yaw = task_share.Share('f', thread_protect = False, name = "yaw")
+yaw = task_share.Share('f', thread_protect = False, name = "yaw", versioned = True)
 yaw_velocity = task_share.Share('f', thread_protect = False, name = "yaw_velocity")
 
 total_dist = task_share.Share("f", thread_protect = False, name = "S")
@@ -161,30 +170,60 @@ controller_obj_yaw = Controller(.8,.3,1, ERR_SAT_YAW, EFF_SAT_YAW)
 #---------------------------------------------------------------------------------
 # Create Task Class Objects with Shares.                                         #
 #---------------------------------------------------------------------------------
-motor_Left_class = motor_encoder_left_class(my_motor_Left, encoder_Left, m_state_l, position_l, velocity_l, times, PWM_l, delay)
-motor_Right_class = motor_encoder_right_class(my_motor_Right, encoder_Right, m_state_r, position_r, velocity_r, times, PWM_r, delay)
+motor_Left_class = motor_encoder_left_class(my_motor_Left, encoder_Left, m_state_l, wheel_l, times, PWM_l, delay)
+motor_Right_class = motor_encoder_right_class(my_motor_Right, encoder_Right, m_state_r, wheel_r, times, PWM_r, delay)
 ui_obj = ui(testing_flg, m_state_l, m_state_r, position, velocity, times, PWM_l, PWM_r, delay, uart_obj, fwd_ref, arc_ref, piv_ref, c_state, velocity2, need_Calibrate, ready_Black, ready_White, automatic_mode, imu_flg)
 data_collector_obj = data_collector(testing_flg, position, velocity, times, position_l, velocity_l, position_r, velocity_r, velocity2)
 control_task_obj = control_task(fwd_ref, arc_ref, piv_ref, c_state, controller_obj_left, controller_obj_right, position_l, velocity_l, position_r, velocity_r, PWM_l, PWM_r, encoder_Right, encoder_Left, m_state_l, m_state_r, centroid, controller_obj_line, automatic_mode, line_sensor_obj, need_Calibrate, yaw, centroid_goal, yaw_goal, controller_obj_yaw)
 line_task_obj = line_task(line_sensor_obj, l_state, need_Calibrate, ready_Black, ready_White,centroid)
 imu_task_obj = imu_task(imu_obj, imu_flg, yaw, yaw_velocity)
-observer_obj = observer(position_l, position_r, yaw, yaw_velocity, PWM_l, PWM_r, velocity_l, velocity_r, total_dist)
+observer_obj = observer(wheel_l, wheel_r, yaw, yaw_velocity, PWM_l, PWM_r, total_dist)
 pathing_obj = pathing_plan(total_dist, automatic_mode, c_state, fwd_ref, piv_ref, yaw, centroid_goal, yaw_goal, bump_on_off, bump_flg)
 bump_obj = Bump_Task(c_state, bump_sensor_right, bump_sensor_left, bump_on_off, bump_flg)
 
 #---------------------------------------------------------------------------------
 # Create All Tasks with Class Object Generator Function                          #
 #---------------------------------------------------------------------------------
-task1 = cotask.Task(data_collector_obj.run, name="data_collector", priority=2, period=18, profile=True, trace=False, shares=())
-task2 = cotask.Task(motor_Left_class.run, name="motor_encoder_left", priority=7, period=13, profile=True, trace=False, shares=())
-task3 = cotask.Task(motor_Right_class.run, name="motor_encoder_right", priority=7, period=13, profile=True, trace=False, shares=())
-task4 = cotask.Task(ui_obj.run, name="ui", priority=1, period=1, profile=True, trace=False, shares=())
-task5 = cotask.Task(control_task_obj.run, name="control_task", priority=6, period=15, profile = True, trace=False, shares=())
-task6 = cotask.Task(line_task_obj.run, name="line_task", priority = 5, period = 22, profile = True, trace = False, shares=())
-task7 = cotask.Task(imu_task_obj.run, name = "imu_task", priority = 6, period = 20, profile= True, trace= False, shares = ())
-task8 = cotask.Task(observer_obj.run, name = "observer", priority = 4, period = 20, profile = True, trace = False, shares = ())
-task9 = cotask.Task(pathing_obj.run, name= "pathing", priority = 3, period = 30, profile = True, trace = False, shares = ())
-task10 = cotask.Task(bump_obj.run, name = "bump task", priority = 2, period = 50, profile = True, trace = False, shares=())
+# Phases are from phase_planner.py; run it again with a new profile when the
+# run times of the tasks change. Heap allocation is measured for the tasks
+# suspected of allocating the most. The motor and control tasks are critical;
+# the UI, data collector, pathing and bump tasks are slowed down when those
+# run late. The observer is a plain function call rather than a generator. The
+# UI polls the UART every 10 ms, often enough for typed commands; at 1 ms it was
+# always due within a millisecond, so wfi_idle below never got to sleep
+task1 = cotask.Task(data_collector_obj.run, name="data_collector", priority=2, period=18, profile=True, trace=False, shares=(), phase=1, sheddable=True)
+task2 = cotask.Task(motor_Left_class.run, name="motor_encoder_left", priority=7, period=13, profile=True, trace=False, shares=(), phase=0, critical=True)
+task3 = cotask.Task(motor_Right_class.run, name="motor_encoder_right", priority=7, period=13, profile=True, trace=False, shares=(), phase=1, critical=True)
+task4 = cotask.Task(ui_obj.run, name="ui", priority=1, period=10, profile=True, trace=False, shares=(), phase=0, alloc=True, sheddable=True)
+task5 = cotask.Task(control_task_obj.run, name="control_task", priority=6, period=15, profile = True, trace=False, shares=(), phase=0, critical=True)
+task6 = cotask.Task(line_task_obj.run, name="line_task", priority = 5, period = 22, profile = True, trace = False, shares=(), overrun = cotask.COALESCE, phase = 0, alloc = True)
+task7 = cotask.Task(imu_task_obj.run, name = "imu_task", priority = 6, period = 20, profile= True, trace= False, shares = (), phase = 1)
+task8 = cotask.CallTask(observer_obj.step, name = "observer", priority = 4, period = 20, profile = True, trace = False, shares = (), phase = 3, alloc = True)
+task9 = cotask.Task(pathing_obj.run, name= "pathing", priority = 3, period = 30, profile = True, trace = False, shares = (), phase = 5, sheddable = True)
+task10 = cotask.Task(bump_obj.run, name = "bump task", priority = 2, period = 50, profile = True, trace = False, shares=(), phase = 7, sheddable = True)
+
+#---------------------------------------------------------------------------------
+# Frame Table for the Motor, Encoder and Control Tasks                           #
+#---------------------------------------------------------------------------------
+# Only used when USE_FRAMES is True. frame_release() checks that the table runs each
+# task at its period above, so first make the periods of motor_encoder_left,
+# motor_encoder_right and control_task whole multiples of FRAME_MS, then profile
+# the tasks on the Romi and paste the output of
+#   python frame_planner.py profile.txt --frame-ms 5
+# here in place of these lines
+FRAME_MS = 5
+FRAME_GUARD_MS = 0
+FRAME_TABLE = ()
+
+#---------------------------------------------------------------------------------
+# Wake or Resume Tasks When the Shares They Wait On Change                       #
+#---------------------------------------------------------------------------------
+data_collector_obj.set_task(task1)
+bump_obj.set_task(task10)
+automatic_mode.subscribe(task5)
+
+# Judge yaw staleness against the IMU task's period
+pathing_obj.set_imu_task(task7)
 
 #---------------------------------------------------------------------------------
 # Add Tasks to Scheduler                                                         #
@@ -203,12 +242,51 @@ cotask.task_list.append(task10)
 #---------------------------------------------------------------------------------
 # Run the Scheduler until Interrupt                                              #
 #---------------------------------------------------------------------------------
+# Sleep until the next task is due instead of polling when nothing is ready
+cotask.task_list.idle_fun = cotask.wfi_idle
+
+# Sample each task's share of the processor every 250 ms, tagged with the
+# pathing state, to find the busiest parts of the course. The samples are
+# printed after the profile for telemetry_plot.py
+telemetry = cotask.task_list.telemetry(250, tag=lambda: pathing_obj.state)
+
+# Collect garbage in idle time, never within 3 ms of a run of the motor,
+# control, IMU or line tasks
+cotask.task_list.manage_gc(threshold=8192, window_ms=3, priority=5)
+
+# Start every task's phase from the same moment so their releases stay apart
+cotask.task_list.align_releases()
+
+# If frames are used, run the motor, encoder and control tasks as a cyclic
+# executive, at the same point of every frame, and the other tasks by priority
+# between frames; otherwise every task is run by priority
+if USE_FRAMES:
+    cotask.task_list.frame_release(Timer(7, freq=1000 / FRAME_MS), FRAME_MS,
+                                   (task2, task3, task5), FRAME_TABLE,
+                                   guard_ms=FRAME_GUARD_MS)
+    scheduler = cotask.task_list.frame_sched
+else:
+    scheduler = cotask.task_list.pri_sched
+
+# Run the sheddable tasks less often while the critical tasks keep running
+# more than 2 ms late
+cotask.task_list.shed_load(late_ms=2, count=4, window_ms=100, recover_ms=1000)
+
+# Count each share's reads and writes, to be shown with the task profile
+if TRACK_SHARES:
+    task_share.track_traffic()
+
 try:
     while True:
-        cotask.task_list.pri_sched()
+        scheduler()
 
 except KeyboardInterrupt:
     # Task Profile once hit Ctr + C
     print("\nProfiler results:")
     print(cotask.task_list)
+    if TRACK_SHARES:
+        print("\nShare traffic:")
+        print(task_share.show_traffic())
+    print("\nTelemetry:")
+    telemetry.write_csv(sys.stdout)
     raise
\ No newline at end of file
@@ -1,6 +1,7 @@
 from motor import Motor
 from encoder import Encoder
 from pyb import Timer, Pin
+from array import array
 ## @brief Left Motor Encoder Class 
 #
 # This task class which contains a generator finite state machine that runs multiple functions.
@@ -13,23 +14,28 @@ class motor_encoder_left_class:
     # @param 2 Encoder Object
     # @param 3 Left Motor State in UI
     # @param 4 Left Encoder Position
-    # @param 5 Left Motor Position
-    # @param 6 Left Motor Velocity
-    # @param 7 Times
-    # @param 8 Left Motor PWM
-    # @param 9 Delay
-    def __init__(self, motor, encoder, m_state_l, position_l, velocity_l, times, PWM_l, delay):
+    # @param 5 Left Wheel Record of motor position and velocity, published together
+    # @param 6 Times
+    # @param 7 Left Motor PWM
+    # @param 8 Delay
+    def __init__(self, motor, encoder, m_state_l, wheel_l, times, PWM_l, delay):
         self.my_motor_Left = motor
         self.encoder_Left = encoder
         self.m_state_l = m_state_l
-        self.position_l = position_l
-        self.velocity_l = velocity_l
+        self.wheel_l = wheel_l
+        self.sample = array('f', (0.0, 0.0))
         self.times = times
         self.PWM_l = PWM_l
         self.delay_count = 0
         self.state = 0
         self.delay=delay
     
+    ## @brief Publishes the encoder's position and velocity together in the wheel record.
+    def publish(self):
+        self.sample[0] = self.encoder_Left.get_position()
+        self.sample[1] = self.encoder_Left.get_velocity()
+        self.wheel_l.put(self.sample)
+
     ## @brief Runs the tasks for the Right Motor
     #
     # <b> State 0 </b> Enable The Left Motor
@@ -59,8 +65,7 @@ class motor_encoder_left_class:
             elif self.state == 1:
 
                 self.encoder_Left.update()
-                self.position_l.put(self.encoder_Left.get_position())
-                self.velocity_l.put(self.encoder_Left.get_velocity())
+                self.publish()
                 # Check share from UI for what to do with motor next
                 if self.m_state_l.get() != 0:
                     self.state = self.m_state_l.get()
@@ -69,8 +74,7 @@ class motor_encoder_left_class:
             # state 2 Left set effort
             elif self.state == 2:
                 self.encoder_Left.update()
-                self.position_l.put(self.encoder_Left.get_position())
-                self.velocity_l.put(self.encoder_Left.get_velocity())
+                self.publish()
                 self.my_motor_Left.set_effort(self.PWM_l.get())
                 #self.my_motor_Left.set_effort(100)
                 #print(f"PWM LEFT IN MOTOR: {self.PWM_l.get()}")
@@ -1,6 +1,7 @@
 from motor import Motor
 from encoder import Encoder
 from pyb import Timer, Pin
+from array import array
 # yield the state it completed
 ## @brief Right Motor Encoder Class 
 #
@@ -14,23 +15,28 @@ class motor_encoder_right_class:
     # @param 2 Encoder Object
     # @param 3 Right Motor State in UI
     # @param 4 Right Encoder Position
-    # @param 5 Right Motor Position
-    # @param 6 Right Motor Velocity
-    # @param 7 Times
-    # @param 8 Right Motor PWM
-    # @param 9 Delay
-    def __init__(self, motor, encoder, m_state_r, position_r, velocity_r, times, PWM_r, delay):
+    # @param 5 Right Wheel Record of motor position and velocity, published together
+    # @param 6 Times
+    # @param 7 Right Motor PWM
+    # @param 8 Delay
+    def __init__(self, motor, encoder, m_state_r, wheel_r, times, PWM_r, delay):
         self.my_motor_Right = motor
         self.encoder_Right = encoder
         self.m_state_r = m_state_r
-        self.position_r = position_r
-        self.velocity_r = velocity_r
+        self.wheel_r = wheel_r
+        self.sample = array('f', (0.0, 0.0))
         self.times = times
         self.PWM_r = PWM_r
         self.delay_count = 0
         self.state = 0
         self.delay=delay
 
+    ## @brief Publishes the encoder's position and velocity together in the wheel record.
+    def publish(self):
+        self.sample[0] = self.encoder_Right.get_position()
+        self.sample[1] = self.encoder_Right.get_velocity()
+        self.wheel_r.put(self.sample)
+
     ## @brief Runs the tasks for the Right Motor
     #
     # <b> State 0 </b> Enable The Right Motor
@@ -60,8 +66,7 @@ class motor_encoder_right_class:
             # state 1 wait for next state
             elif self.state == 1:
                 self.encoder_Right.update()
-                self.position_r.put(self.encoder_Right.get_position())
-                self.velocity_r.put(self.encoder_Right.get_velocity())
+                self.publish()
                 # Check share from UI for what to do with motor next
                 if self.m_state_r.get() != 0:
                     self.state= self.m_state_r.get()
@@ -69,8 +74,7 @@ class motor_encoder_right_class:
             # state 2 Right set effort
             elif self.state == 2:
                 self.encoder_Right.update()
-                self.position_r.put(self.encoder_Right.get_position())
-                self.velocity_r.put(self.encoder_Right.get_velocity())
+                self.publish()
                 self.my_motor_Right.set_effort(self.PWM_r.get())
                 #self.my_motor_Right.set_effort(50)
                 #print(f"PWM RIGHT IN MOTOR: {self.PWM_r.get()}")
@@ -32,33 +32,35 @@ class observer:
     #
     #  The arguments are data shares.
     #
-    #  @param left_pos      Float share that holds the current position of the
-    #                       left encoder. Used as an input.
-    #  @param right_pos     Float share that holds the current position of the
-    #                       right encoder. Used as an input.
+    #  @param left_wheel    Float record share that holds the current position
+    #                       and velocity of the left encoder. Used as inputs.
+    #  @param right_wheel   Float record share that holds the current position
+    #                       and velocity of the right encoder. Used as inputs.
     #  @param yaw           Float share that holds the IMU reading of the yaw.
     #  @param yaw_velocity  Yaw velocity as measured by the IMU task.
     #  @param left_voltage  PWM value of the left motor which observer scales
     #                       to the expected voltage.
     #  @param right_voltage PWM value of the right motor which observer scales
     #                       to the expected voltage.
-    #  @param left_vel      Velocity of the left motor.
-    #  @param right_vel     Velocity of the right motor.
     #  @param total_dist    Float share that the observer will fill with how
     #                       far it thinks ROMI has travelled in mm.
-    def __init__(self, left_pos, right_pos, yaw, yaw_velocity,
-                 left_voltage, right_voltage, left_vel, right_vel,
-                 total_dist):
-        self.left_pos = left_pos
-        self.right_pos = right_pos
+    def __init__(self, left_wheel, right_wheel, yaw, yaw_velocity,
+                 left_voltage, right_voltage, total_dist):
+        self.left_wheel = left_wheel
+        self.right_wheel = right_wheel
         self.yaw = yaw
         self.yaw_velocity = yaw_velocity
         self.left_voltage = left_voltage
         self.right_voltage = right_voltage
-        self.left_vel = left_vel
-        self.right_vel = right_vel
         self.total_dist = total_dist
 
+        # Snapshots of each wheel's position and velocity, read together once
+        # per run so that both come from the same encoder update
+        self.pos = left_wheel.index('position')
+        self.vel = left_wheel.index('velocity')
+        self.left = array.array('f', (0.0, 0.0))
+        self.right = array.array('f', (0.0, 0.0))
+
         # Allocating space for matrices
         self.x = np.array([[0], [0], [0], [0]])
         self.u = np.array([[0], [0]])
@@ -109,8 +111,8 @@ class observer:
     ## @brief Updates the state vector with real values and the last guessed
     #         total distance.
     def update_x(self):
-        self.x[0, 0] = self.left_vel.get() / 0.035
-        self.x[1, 0] = self.right_vel.get() / 0.035
+        self.x[0, 0] = self.left[self.vel] / 0.035
+        self.x[1, 0] = self.right[self.vel] / 0.035
         self.x[2, 0] = self.x_estimated[2, 0]
         self.x[3, 0] = self.yaw.get()
 
@@ -122,8 +124,8 @@ class observer:
 
     ## @brief Updates the output vector with real values.
     def update_y(self):
-        self.y[0, 0] = self.left_pos.get()
-        self.y[1, 0] = self.right_pos.get()
+        self.y[0, 0] = self.left[self.pos]
+        self.y[1, 0] = self.right[self.pos]
         self.y[2, 0] = self.yaw.get()
         self.y[3, 0] = self.yaw_velocity.get()
 
@@ -131,8 +133,8 @@ class observer:
     def update_u_star(self):
         self.u_star[0, 0] = self.left_voltage.get() * 12
         self.u_star[1, 0] = self.right_voltage.get() * 12
-        self.u_star[2, 0] = self.left_pos.get()
-        self.u_star[3, 0] = self.right_pos.get()
+        self.u_star[2, 0] = self.left[self.pos]
+        self.u_star[3, 0] = self.right[self.pos]
         self.u_star[4, 0] = self.yaw.get()
         self.u_star[5, 0] = self.yaw_velocity.get()
 
@@ -260,12 +262,12 @@ class observer:
 
         return x_next, y
 
-    ## @brief Generator that the cotask scheduler will run since our tasks are
-    #         objects.
+    ## @brief Runs the observer once; the cotask scheduler can call this
+    #         directly with a @c cotask.CallTask, as the observer keeps no
+    #         state between runs other than in its attributes.
     #
     #  All shares it needs are already given to the task object on
-    #  initialization. The generator will only run one state at a time on each
-    #  run of the task.
+    #  initialization.
     #
     #  @details
     #  The observer will always update its current states then guess at the next
@@ -282,36 +284,47 @@ class observer:
     #  others are not. The value it predicts is also pretty consistent each
     #  run, but it is always negative and off by a factor of about 2.1 so we
     #  simply scale it by -2.1 so that the value is more useful. It is in mm.
-    def run(self):
-        while True:
-            # Run the observer
-            if self.state == 0:
-                self.update_x()
-                self.update_y()
-                self.update_u()
-                self.update_u_star()
-
-                if self.feedback == 0:
-                    # Continuous
-                    self.x_estimated, self.y_estimated = self.RK4_solver(
-                        self.x, 0.02, self.u
-                    )
-                    print(self.x_estimated[2, 0])
-                    # print(self.yaw.get())
-                else:
-                    # Discretized
-                    self.x_estimated = self.calc_discrete_state(
-                        self.x, self.u_star
-                    )
-                    self.y_estimated = self.calc_discrete_output(self.x)
-                    self.total_dist.put(self.x_estimated[2, 0] * -2.1)
-                    # Debug prints (left for development)
-                    # print(f"\rLeft Velocity: {self.x_estimated[0,0]}")
-                    # print(f"Right Velocity: {self.x_estimated[1,0]}")
-                    # print(f"Total Distance: {self.x_estimated[2,0]*(-2.1)}")
-                    # print(f"Yaw: {self.x[3,0]}")
-                    # print("\033[4A")
+    #  @return The state of the observer
+    def step(self):
+        # Run the observer
+        if self.state == 0:
+            self.left_wheel.read_into(self.left)
+            self.right_wheel.read_into(self.right)
+            self.update_x()
+            self.update_y()
+            self.update_u()
+            self.update_u_star()
+
+            if self.feedback == 0:
+                # Continuous
+                self.x_estimated, self.y_estimated = self.RK4_solver(
+                    self.x, 0.02, self.u
+                )
+                print(self.x_estimated[2, 0])
+                # print(self.yaw.get())
             else:
-                raise ValueError("Not that many states")
+                # Discretized
+                self.x_estimated = self.calc_discrete_state(
+                    self.x, self.u_star
+                )
+                self.y_estimated = self.calc_discrete_output(self.x)
+                self.total_dist.put(self.x_estimated[2, 0] * -2.1)
+                # Debug prints (left for development)
+                # print(f"\rLeft Velocity: {self.x_estimated[0,0]}")
+                # print(f"Right Velocity: {self.x_estimated[1,0]}")
+                # print(f"Total Distance: {self.x_estimated[2,0]*(-2.1)}")
+                # print(f"Yaw: {self.x[3,0]}")
+                # print("\033[4A")
+        else:
+            raise ValueError("Not that many states")
+
+        return self.state
 
-            yield self.state
+    ## @brief Generator that the cotask scheduler will run since our tasks are
+    #         objects.
+    #
+    #  The generator runs the observer once with @c step() on each run of the
+    #  task.
+    def run(self):
+        while True:
+            yield self.step()
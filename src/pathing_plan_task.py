@@ -74,6 +74,9 @@ FINISH = 28  ##< Finish state
 STOP = 40  ##< Stop state
 TESTING = 30  ##< Testing state
 
+# IMU Staleness
+YAW_LATE_PERIODS = 0.5  ##< A yaw this fraction of an IMU period overdue means the IMU task has stalled
+
 # Total Distance Check Points 
 CP1_2_DISTANCE = 1800  ##< Distance from CP1 to CP2
 LF2_DIST = 2025  ##< Line follow 2 distance
@@ -128,6 +131,12 @@ class pathing_plan:
         self.yaw_goals_5 = [YAWGOAL5, EXPYAWGOAL1, EXPYAWGOAL2, EXPYAWGOAL3]
         self.direction = [1, 1, -1, 1]
         self.dist = [CP4_GARAGE, 3600, 3800, 4000]
+        self.yaw_seen = 0
+        self.yaw_now = 0
+        self.imu_stalls = 0
+        self.imu_stalled = False
+        self.imu_task = None
+
         
     def wrapper(self, val):
         """!
@@ -177,8 +186,18 @@ class pathing_plan:
         @return True if ROMI is within tolerance and state is updated, False otherwise
         """
         self.c_state.put(3)
+        if self.yaw_stale():
+            # Don't keep turning blind while the IMU isn't giving new yaws
+            self.piv_ref.put(0)
+            return False
         self.piv_ref.put(0.75*rot_direction)
-        real_yaw = self.wrapper(self.yaw.get() - self.yaw_init)
+
+        # Only check the goal again if the IMU has published a new yaw
+        news = self.yaw.get_if_newer(self.yaw_seen)
+        if news is None:
+            return False
+        self.yaw_seen, self.yaw_now = news
+        real_yaw = self.wrapper(self.yaw_now - self.yaw_init)
         if real_yaw >= yaw_goal and real_yaw <= ((yaw_goal) + 0.5):
             self.c_state.put(4)
             self.piv_ref.put(0)
@@ -188,6 +207,40 @@ class pathing_plan:
             return True
         return False
         
+    def set_imu_task(self, task):
+        """!
+        @brief Give the planner the task that publishes yaw
+        
+        @param task The cotask.Task running the IMU; its period sets how old a yaw may get
+        """
+        self.imu_task = task
+        
+    def yaw_stale(self):
+        """!
+        @brief Check whether the IMU task has stopped publishing yaw
+        
+        The yaw share is versioned, so its age shows when the IMU task last wrote it, for example
+        before an I2C transfer hung. A stall is counted once each time it starts.
+        
+        A yaw that has never been written, for example because the IMU hung while calibrating, is stale
+        as soon as the pivot asks for it. Otherwise the limit follows the IMU task's current period, so a
+        missed write is caught within one period.
+        
+        @return True if the yaw is missing or overdue by YAW_LATE_PERIODS of an IMU period, False otherwise
+        """
+        age = self.yaw.age_us()
+        if age is None:
+            stale = True
+        elif self.imu_task is None or self.imu_task.period is None:
+            stale = False
+        else:
+            stale = age > self.imu_task.period * (1 + YAW_LATE_PERIODS)
+        if stale and not self.imu_stalled:
+            self.imu_stalls += 1
+            print("IMU stalled")
+        self.imu_stalled = stale
+        return stale
+        
     def alignment_control(self, next_state):
         """!
         @brief Configure control task for precise controlled turning
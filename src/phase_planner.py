@@ -0,0 +1,226 @@
+## @file phase_planner.py
+#  This file contains a desktop program which picks release phases for the
+#  timed tasks in a task table, so that tasks whose periods line up are not
+#  all released at the same moment.
+#
+#  Without phases, every timed task is first run one period after it starts,
+#  so all of the tasks are released together at every multiple of their
+#  periods and the highest priority tasks can wait behind several others. The
+#  planner goes through the tasks from the highest priority down and gives
+#  each the phase, from zero up to its period, at which its runs overlap the
+#  least with the runs of the tasks already placed, over the hyperperiod of
+#  all the periods. It then simulates the task set, as the non-preemptive
+#  @c cotask.TaskList.pri_sched() would run it, both with and without the
+#  phases and reports each task's worst-case response time, the time from a
+#  release to the end of that run.
+#
+#  The task table is the one in @c sim_platform.MAIN_TASKS. Its run times are
+#  placeholders, so a profile printed by the Romi, with @c print(task_list),
+#  should be saved to a file and given to the planner; the MAX DUR column of
+#  the profile is then used as each task's run time:
+#  @code
+#  python phase_planner.py profile.txt
+#  @endcode
+#  The phases found are given to the tasks with the @c phase parameter of
+#  @c cotask.Task, and @c cotask.task_list.align_releases() is called just
+#  before the scheduler loop starts.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import heapq
+import math
+import re
+import sys
+
+import sim_platform
+
+## A line in the first table of a task list's profile: the name, priority,
+#  period in ms (or -), number of runs and, for profiled tasks, the average
+#  and longest run times in ms
+PROFILE_LINE = re.compile(r'^(.*?)\s+(-?\d+)\s+(-|\d+\.\d)\s+(\d+)'
+                          r'(?:\s+(\d+\.\d+)\s+(\d+\.\d+))?')
+
+
+## @brief Read the tasks from a profile printed by a @c cotask.TaskList.
+#  @param text The text printed by @c print(task_list)
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: (priority, period in ms or @c None, longest
+#  run time in microseconds or @c None)
+def parse_profile(text):
+    tasks = {}
+    lines = text.splitlines()
+    for line in lines[1:]:
+        # The first table ends with a blank line or the idle line
+        if not line.strip() or line.startswith('IDLE'):
+            break
+        match = PROFILE_LINE.match(line)
+        if match is None:
+            continue
+        name, priority, period, _, _, max_dur = match.groups()
+        tasks[name.strip()] = (
+            int(priority),
+            None if period == '-' else float(period),
+            None if max_dur is None else int(float(max_dur) * 1000))
+    return tasks
+
+
+## @brief Find the hyperperiod of a list of periods.
+#  @param periods Task periods in whole milliseconds
+#  <b> Returns </b>
+#  <blockquote>
+#  The least common multiple of the periods in milliseconds
+def hyperperiod(periods):
+    hyper = 1
+    for period in periods:
+        hyper = hyper * period // math.gcd(hyper, period)
+    return hyper
+
+
+## @brief Pick a phase for each task so that releases overlap as little as
+#         possible.
+#
+#  The hyperperiod is divided into one millisecond slots, each holding the
+#  microseconds of run time of the tasks already placed which are running in
+#  that slot. Because the hyperperiod is a multiple of each period, the load
+#  a task would meet at each phase is found by summing every period-th slot.
+#  @param tasks A list of (name, priority, period in ms, run time in us)
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: phase in milliseconds
+def plan_phases(tasks):
+    periods = [int(period) for _, _, period, _ in tasks]
+    hyper = hyperperiod(periods)
+    busy = [0] * hyper
+    phases = {}
+
+    for name, _, period, run_us in sorted(tasks, key=lambda tsk: -tsk[1]):
+        period = int(period)
+        span = min(period, max(1, -(-run_us // 1000)))
+
+        # The load met by a run which starts in each slot of the period
+        by_slot = [sum(busy[slot::period]) for slot in range(period)]
+        best = None
+        for phase in range(period):
+            cost = 0
+            for slot in range(phase, phase + span):
+                cost += by_slot[slot % period]
+            if best is None or cost < best:
+                best = cost
+                phases[name] = phase
+
+        # Spread this task's run time over the slots in which it runs
+        per_slot = run_us // span
+        for start in range(phases[name], hyper, period):
+            for slot in range(start, start + span):
+                busy[slot % hyper] += per_slot
+
+    return phases
+
+
+## @brief Find the largest number of tasks released in the same millisecond.
+#  @param tasks A list of (name, priority, period in ms, run time in us)
+#  @param phases A dictionary of task name: phase in ms; tasks not in it are
+#         released first at time zero
+#  <b> Returns </b>
+#  <blockquote>
+#  The most releases which fall in any one millisecond of the hyperperiod
+def max_coincident(tasks, phases):
+    hyper = hyperperiod([int(tsk[2]) for tsk in tasks])
+    count = [0] * hyper
+    for name, _, period, _ in tasks:
+        for slot in range(phases.get(name, 0) % int(period), hyper,
+                          int(period)):
+            count[slot] += 1
+    return max(count)
+
+
+## @brief Simulate a task set run by a non-preemptive priority scheduler.
+#
+#  Each release is run to completion once it starts. When the processor comes
+#  free, the released run with the highest priority starts next, the one
+#  released first if several have the same priority.
+#  @param tasks A list of (name, priority, period in ms, run time in us)
+#  @param phases A dictionary of task name: phase in ms; tasks not in it are
+#         released first at time zero
+#  @param horizon_ms How long to simulate, by default the hyperperiod
+#  @param overhead_us The time taken by the scheduler to start each run
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: (worst-case response time in us, number of
+#  runs which ended after the task's next release)
+def simulate(tasks, phases, horizon_ms=None, overhead_us=0):
+    if horizon_ms is None:
+        horizon_ms = hyperperiod([int(tsk[2]) for tsk in tasks])
+    horizon = int(horizon_ms * 1000)
+
+    # The next release of each task, kept in a heap by time
+    releases = []
+    for idx, (name, _, period, _) in enumerate(tasks):
+        releases.append((int(phases.get(name, 0) * 1000), idx))
+    heapq.heapify(releases)
+
+    worst = [0] * len(tasks)
+    late = [0] * len(tasks)
+    ready = []
+    now = 0
+    while True:
+        while releases and releases[0][0] <= now:
+            rel_time, idx = heapq.heappop(releases)
+            heapq.heappush(ready, (-tasks[idx][1], rel_time, idx))
+            next_time = rel_time + int(tasks[idx][2] * 1000)
+            if next_time < horizon:
+                heapq.heappush(releases, (next_time, idx))
+
+        if not ready:
+            if not releases:
+                break
+            now = releases[0][0]
+            continue
+
+        _, rel_time, idx = heapq.heappop(ready)
+        now += overhead_us + tasks[idx][3]
+        response = now - rel_time
+        if response > worst[idx]:
+            worst[idx] = response
+        if response > tasks[idx][2] * 1000:
+            late[idx] += 1
+
+    return {tasks[idx][0]: (worst[idx], late[idx])
+            for idx in range(len(tasks))}
+
+
+## @brief Plan phases for the task table, using the run times in a profile
+#         if one is given, and print the phases and response times.
+#  @param argv The command line arguments: an optional profile file
+def main(argv):
+    tasks = [list(task) for task in sim_platform.MAIN_TASKS]
+    if argv:
+        with open(argv[0]) as prof_file:
+            profile = parse_profile(prof_file.read())
+        for task in tasks:
+            if task[0] in profile and profile[task[0]][2]:
+                task[3] = profile[task[0]][2]
+    tasks = [tuple(task) for task in tasks]
+
+    phases = plan_phases(tasks)
+    before = simulate(tasks, {})
+    after = simulate(tasks, phases)
+
+    print(f"Hyperperiod {hyperperiod([tsk[2] for tsk in tasks])} ms; at most "
+          f"{max_coincident(tasks, {})} tasks released together without "
+          f"phases, {max_coincident(tasks, phases)} with them\n")
+    print('TASK                 PRI    PERIOD   RUN US   PHASE  WCRT US  '
+          'WCRT US  OVERRUNS')
+    print('                                                    (no phase) '
+          '(phased)')
+    for name, priority, period, run_us in tasks:
+        print(f"{name:<20s}{priority: 4d}{period: 10d}{run_us: 9d}"
+              f"{phases[name]: 8d}{before[name][0]: 9d}{after[name][0]: 9d}"
+              f"{after[name][1]: 10d}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
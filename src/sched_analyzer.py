@@ -0,0 +1,407 @@
+## @file sched_analyzer.py
+#  This file contains a desktop program which checks whether a task set can
+#  meet its deadlines, using run times measured on the Romi.
+#
+#  The program reads a profile printed by the Romi with @c print(task_list)
+#  and saved to a file. From each task's run time and period it finds the
+#  CPU utilization and compares it with the rate monotonic (Liu and Layland)
+#  bound, then uses response time analysis to find the longest time from a
+#  task's release to the end of its run. Since @c cotask tasks aren't
+#  preempted, the analysis is the one for non-preemptive fixed priority
+#  scheduling: a task can be held up by every higher priority task released
+#  while it waits, by other tasks with the same priority, and by one run of
+#  the longest lower priority task which started just before it was
+#  released. A task whose response time is longer than its period is
+#  predicted to miss releases.
+#
+#  The program then suggests priorities, found with Audsley's optimal
+#  priority assignment, and longer periods for tasks which still can't keep
+#  up, and prints them as a task table. A table, edited or not, can be given
+#  back to the program to be checked before it is put into @c main.py:
+#  @code
+#  python sched_analyzer.py profile.txt
+#  python sched_analyzer.py profile.txt --runtime p99 --table proposed.txt
+#  @endcode
+#  A table file has one task per line, giving its name, priority and period
+#  in ms separated by commas, and optionally a run time in microseconds to
+#  be used instead of the profiled one. Lines beginning with @c # are
+#  ignored.
+#
+#  Without a profile, the placeholder run times of
+#  @c sim_platform.MAIN_TASKS are used.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import argparse
+import math
+import re
+import sys
+
+import sim_platform
+
+## A line in the first table of a task list's profile: name, priority,
+#  period in ms or -, runs, then for profiled tasks the average and longest
+#  run times, and for profiled timed tasks the average and longest lateness
+#  in ms and the number of missed releases
+TASK_LINE = re.compile(r'^(.*?)\s+(-?\d+)\s+(-|\d+\.\d)\s+(\d+)'
+                       r'(?:\s+(\d+\.\d+)\s+(\d+\.\d+)'
+                       r'(?:\s+(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+))?)?\s*$')
+
+## A line in the percentile table of a profile: name, then the 50th, 95th
+#  and 99th percentiles of run time and of lateness in ms
+PERCENTILE_LINE = re.compile(r'^(.*?)((?:\s+\d+\.\d+){6})\s*$')
+
+
+## @brief Read the tasks from a profile printed by a @c cotask.TaskList.
+#  @param text The text printed by @c print(task_list)
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: dictionary of the task's profile, holding
+#  @c priority, @c period (ms, or @c None for a task run by @c go()),
+#  @c runs, and where they were printed @c avg_us, @c max_us, @c late_avg_us,
+#  @c late_max_us, @c missed, @c p50_us, @c p95_us and @c p99_us
+def read_profile(text):
+    tasks = {}
+    table = 0
+    for line in text.splitlines():
+        if line.startswith('TASK'):
+            table += 1
+            continue
+        if not line.strip() or line.startswith(('IDLE', 'TICK')):
+            continue
+
+        if table == 1:
+            match = TASK_LINE.match(line)
+            if match is None:
+                continue
+            fields = match.groups()
+            task = {'priority': int(fields[1]),
+                    'period': None if fields[2] == '-' else float(fields[2]),
+                    'runs': int(fields[3])}
+            if fields[4] is not None:
+                task['avg_us'] = round(float(fields[4]) * 1000)
+                task['max_us'] = round(float(fields[5]) * 1000)
+            if fields[6] is not None:
+                task['late_avg_us'] = round(float(fields[6]) * 1000)
+                task['late_max_us'] = round(float(fields[7]) * 1000)
+                task['missed'] = int(fields[8])
+            tasks[fields[0].strip()] = task
+
+        elif table == 2:
+            match = PERCENTILE_LINE.match(line)
+            if match is None or match.group(1).strip() not in tasks:
+                continue
+            values = [round(float(val) * 1000)
+                      for val in match.group(2).split()]
+            tasks[match.group(1).strip()].update(
+                p50_us=values[0], p95_us=values[1], p99_us=values[2])
+    return tasks
+
+
+## @brief Read a task table file.
+#  @param text The contents of the file, one "name, priority, period[, run
+#         time]" line per task
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: (priority, period in ms, run time in us or
+#  @c None)
+def read_table(text):
+    table = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = [field.strip() for field in line.split(',')]
+        if len(fields) not in (3, 4):
+            raise ValueError(f"Bad task table line: '{line}'")
+        run_us = int(fields[3]) if len(fields) == 4 else None
+        table[fields[0]] = (int(fields[1]), float(fields[2]), run_us)
+    return table
+
+
+## @brief Format a task set as a task table file.
+#  @param tasks A list of (name, priority, period in ms, run time in us)
+#  <b> Returns </b>
+#  <blockquote>
+#  The text of the table
+def format_table(tasks):
+    lines = ['# name, priority, period ms, run time us']
+    for name, priority, period, run_us in tasks:
+        lines.append(f"{name}, {priority}, {period:g}, {run_us}")
+    return '\n'.join(lines) + '\n'
+
+
+## @brief Find the fraction of the CPU's time used by timed tasks.
+#  @param tasks A list of (name, priority, period in ms, run time in us);
+#         tasks with no period are left out
+def utilization(tasks):
+    return sum(run_us / (period * 1000.0)
+               for _, _, period, run_us in tasks if period)
+
+
+## @brief Find the Liu and Layland utilization bound for rate monotonic
+#         scheduling of a number of tasks.
+def liu_layland(n_tasks):
+    if n_tasks == 0:
+        return 1.0
+    return n_tasks * (2.0 ** (1.0 / n_tasks) - 1.0)
+
+
+## @brief Find a task's worst-case response time under non-preemptive fixed
+#         priority scheduling.
+#
+#  The task can be blocked by the longest run of any task with a lower
+#  priority, including tasks run by @c go(), and waits for every run of the
+#  timed tasks with the same or higher priorities released before it starts.
+#  Tasks with the same priority are counted as higher, since @c pri_sched()
+#  takes them in turn. This is the sufficient test of Davis, Burns, Bril and
+#  Lukkien (2007), which holds when the response time is within the period.
+#  @param task The task, a tuple (name, priority, period in ms, run time us)
+#  @param higher Timed tasks with priorities at least as high as the task's
+#  @param lower Tasks, timed or not, with lower priorities
+#  @param overhead_us Scheduler time added to every run
+#  <b> Returns </b>
+#  <blockquote>
+#  The response time in microseconds, or @c None if it is found to exceed
+#  the task's period
+def response_time(task, higher, lower, overhead_us=0):
+    run_us = task[3] + overhead_us
+    deadline = task[2] * 1000.0
+    blocking = max((tsk[3] + overhead_us for tsk in lower), default=0)
+
+    # The time spent waiting before the task starts, found by iteration. The
+    # +1 counts a higher priority release at the very moment the task starts
+    wait = blocking
+    while True:
+        new_wait = blocking + sum(
+            (math.floor(wait / (tsk[2] * 1000.0)) + 1) * (tsk[3] + overhead_us)
+            for tsk in higher)
+        if new_wait + run_us > deadline:
+            return None
+        if new_wait == wait:
+            return wait + run_us
+        wait = new_wait
+
+
+## @brief Find the response time of every timed task.
+#  @param tasks A list of (name, priority, period in ms or @c None, run time
+#         in us)
+#  @param overhead_us Scheduler time added to every run
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: response time in us, or @c None if the task
+#  is predicted to miss releases
+def analyze(tasks, overhead_us=0):
+    results = {}
+    for task in tasks:
+        if not task[2]:
+            continue
+        higher = [tsk for tsk in tasks if tsk is not task and tsk[2]
+                  and tsk[1] >= task[1]]
+        lower = [tsk for tsk in tasks if tsk[1] < task[1]]
+        results[task[0]] = response_time(task, higher, lower, overhead_us)
+    return results
+
+
+## @brief Find priorities under which every timed task meets its deadline,
+#         using Audsley's optimal priority assignment.
+#
+#  Beginning with the lowest priority, each level is given to a task which
+#  meets its deadline with all the tasks not yet placed above it, choosing
+#  the one with the longest period if several do. Tasks run by @c go() keep
+#  their priorities, and the timed tasks are numbered around them.
+#  @param tasks A list of (name, priority, period in ms or @c None, run time
+#         in us)
+#  @param overhead_us Scheduler time added to every run
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: priority, or @c None if no priorities work
+def assign_priorities(tasks, overhead_us=0):
+    timed = [task for task in tasks if task[2]]
+    events = [task for task in tasks if not task[2]]
+    placed = []
+    while timed:
+        fits = []
+        for task in timed:
+            higher = [tsk for tsk in timed if tsk is not task]
+            lower = placed + events
+            if response_time(task, higher, lower, overhead_us) is not None:
+                fits.append(task)
+        if not fits:
+            return None
+        chosen = max(fits, key=lambda tsk: (tsk[2], -tsk[1]))
+        timed.remove(chosen)
+        placed.append(chosen)
+
+    # Number the levels from the lowest; tasks with equal periods could share
+    # a level, but distinct levels are what the analysis checked
+    base = max((task[1] for task in events), default=0) + 1
+    priorities = {task[0]: task[1] for task in events}
+    for level, task in enumerate(placed):
+        priorities[task[0]] = base + level
+    return priorities
+
+
+## @brief Find the shortest whole-millisecond period with which each task
+#         predicted to miss releases would keep up, with the other tasks as
+#         they are.
+#
+#  A task's own period doesn't change how long it waits to run, so its
+#  response time with a period long enough to cover it is the shortest
+#  period which works. Lengthening a period only helps the other tasks.
+#  @param tasks A list of (name, priority, period in ms or @c None, run time
+#         in us)
+#  @param overhead_us Scheduler time added to every run
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of task name: suggested period in ms, for the tasks which
+#  need a longer one and can have one
+def suggest_periods(tasks, overhead_us=0):
+    suggested = {}
+    for task in tasks:
+        if not task[2]:
+            continue
+        higher = [tsk for tsk in tasks if tsk is not task and tsk[2]
+                  and tsk[1] >= task[1]]
+        lower = [tsk for tsk in tasks if tsk[1] < task[1]]
+        if response_time(task, higher, lower, overhead_us) is not None:
+            continue
+        # Try a very long deadline to find the response time itself; if the
+        # higher priority tasks use the whole CPU there is none
+        if utilization(higher) >= 1.0:
+            continue
+        relaxed = (task[0], task[1], 1e9, task[3])
+        resp = response_time(relaxed, higher, lower, overhead_us)
+        suggested[task[0]] = max(task[2], math.ceil(resp / 1000.0))
+    return suggested
+
+
+## @brief Print the analysis of a task set.
+#  @param tasks A list of (name, priority, period in ms or @c None, run time
+#         in us)
+#  @param observed A dictionary of task name: profile dictionary as made by
+#         @c read_profile(), used to show the lateness and missed releases
+#         seen on the Romi next to the predictions
+#  @param overhead_us Scheduler time added to every run
+#  <b> Returns </b>
+#  <blockquote>
+#  @c True if every timed task is predicted to keep up
+def report(tasks, observed, overhead_us=0):
+    timed = [task for task in tasks if task[2]]
+    util = utilization(tasks)
+    bound = liu_layland(len(timed))
+    results = analyze(tasks, overhead_us)
+
+    print(f"CPU utilization {100.0 * util:.1f}% of the timed tasks; "
+          f"rate monotonic bound for {len(timed)} tasks "
+          f"{100.0 * bound:.1f}%")
+    if util > 1.0:
+        print("The timed tasks need more time than the CPU has")
+    elif util > bound:
+        print("Over the bound: only response time analysis can show whether "
+              "the tasks keep up")
+
+    rm_order = all(a[1] >= b[1] for a in timed for b in timed
+                   if a[2] < b[2])
+    if not rm_order:
+        print("Priorities are not in rate monotonic order (shorter periods "
+              "do not always have higher priorities)")
+
+    print('\nTASK                 PRI    PERIOD   RUN US  RESP US  '
+          'PREDICT  MAX LATE  MISSED')
+    for name, priority, period, run_us in sorted(
+            tasks, key=lambda tsk: -tsk[1]):
+        line = f"{name:<20s}{priority: 4d}"
+        line += f"{period: 10g}" if period else '         -'
+        line += f"{run_us: 9d}"
+        if period:
+            resp = results[name]
+            line += f"{'    over' if resp is None else f'{resp: 8d}'}"
+            line += f"{'    miss' if resp is None else '      ok'}"
+        else:
+            line += '       -       -'
+        seen = observed.get(name, {})
+        if 'late_max_us' in seen:
+            line += f"{seen['late_max_us']: 10d}{seen['missed']: 8d}"
+        print(line)
+
+    misses = [name for name, resp in results.items() if resp is None]
+    if misses:
+        print(f"\nPredicted to miss releases: {', '.join(misses)}")
+    else:
+        print("\nEvery timed task is predicted to keep up")
+    return not misses
+
+
+## @brief Make the task set to be analyzed from a profile, a task table, or
+#         both, and print its analysis and suggestions.
+#  @param argv The command line arguments; run with @c --help to list them
+def main(argv):
+    parser = argparse.ArgumentParser(description="Check whether a cotask "
+                                     "task set can meet its deadlines")
+    parser.add_argument('profile', nargs='?',
+                        help="profile printed by print(task_list)")
+    parser.add_argument('--table', help="task table to check instead of "
+                        "the profile's priorities and periods")
+    parser.add_argument('--runtime', choices=('max', 'p99', 'p95', 'avg'),
+                        default='max', help="which profiled run time to use")
+    parser.add_argument('--overhead', type=int, default=0,
+                        help="scheduler time in us added to every run")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        with open(args.profile) as prof_file:
+            profile = read_profile(prof_file.read())
+    else:
+        profile = {name: {'priority': pri, 'period': period, 'max_us': run_us}
+                   for name, pri, period, run_us in sim_platform.MAIN_TASKS}
+
+    tasks = []
+    for name, prof in profile.items():
+        run_us = prof.get(f"{args.runtime}_us", prof.get('max_us'))
+        if run_us is None:
+            print(f"{name} was not profiled and is left out")
+            continue
+        tasks.append((name, prof['priority'], prof['period'], run_us))
+
+    if args.table:
+        with open(args.table) as table_file:
+            table = read_table(table_file.read())
+        by_name = {task[0]: task for task in tasks}
+        for name, (priority, period, run_us) in table.items():
+            if run_us is None:
+                if name not in by_name:
+                    parser.error(f"no run time for '{name}'")
+                run_us = by_name[name][3]
+            by_name[name] = (name, priority, period, run_us)
+        tasks = list(by_name.values())
+
+    if report(tasks, profile, args.overhead):
+        return 0
+
+    # Suggest priorities first, then longer periods for what still misses
+    priorities = assign_priorities(tasks, args.overhead)
+    if priorities is not None:
+        print("\nThese priorities let every timed task keep up:")
+        proposed = [(name, priorities[name], period, run_us)
+                    for name, _, period, run_us in tasks]
+    else:
+        print("\nNo priorities let every timed task keep up with these "
+              "periods; rate monotonic priorities with longer periods:")
+        periods = sorted({task[2] for task in tasks if task[2]},
+                         reverse=True)
+        base = max((task[1] for task in tasks if not task[2]), default=0)
+        proposed = [(name, base + 1 + periods.index(period) if period
+                     else priority, period, run_us)
+                    for name, priority, period, run_us in tasks]
+        longer = suggest_periods(proposed, args.overhead)
+        proposed = [(name, priority, longer.get(name, period), run_us)
+                    for name, priority, period, run_us in proposed]
+
+    print(format_table(proposed))
+    return 1 if not report(proposed, {}, args.overhead) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
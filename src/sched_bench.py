@@ -0,0 +1,307 @@
+## @file sched_bench.py
+#  This file contains a benchmark for the schedulers in @c cotask.py. It makes
+#  synthetic task sets, runs each of them under each scheduler on a
+#  @c sim_platform.VirtualClock, and reports what each scheduler pass costs on
+#  the computer, how late the tasks were released and how many releases were
+#  missed.
+#
+#  Each result is written as one line of JSON, so that the results of one
+#  version of @c cotask.py can be saved and compared with those of the next:
+#  @code
+#  python sched_bench.py --tasks 10,20,50 --seconds 10 > bench.jsonl
+#  python sched_bench.py --policies pri_sched,heap_edf --util 0.9
+#  @endcode
+#
+#  A scheduler which can't run a task set, such as @c tick_sched with more
+#  than the 30 tasks its timer release handles, is reported with a line
+#  giving the reason under @c 'skipped' rather than results.
+#
+#  The time taken by a pass is measured with the computer's clock and
+#  includes the run of the task it dispatched, if any, so it shows how the
+#  cost of a scheduler grows with the number of tasks rather than what a pass
+#  costs on the Romi. The lateness and missed releases are in the virtual
+#  clock's time and do not depend on the computer at all. They are measured
+#  by the benchmark itself, which notes the time at which each task's run
+#  begins and compares it with the run's nominal release, so that every
+#  scheduler is judged the same way whatever it counts for itself.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import sim_platform
+
+## The clock used by every run. @c cotask is imported once, after the clock's
+#  stand-in modules have been installed, and the clock is set back to zero
+#  before each run
+clock = sim_platform.install(sim_platform.VirtualClock())
+
+import cotask
+
+## The schedulers which can be benchmarked, as policy name: (task list
+#  policy, name of the scheduler method). A new scheduler is benchmarked by
+#  adding it here
+POLICIES = {'pri_sched': (cotask.FIXED_PRIORITY, 'pri_sched'),
+            'rr_sched': (cotask.FIXED_PRIORITY, 'rr_sched'),
+            'heap_fp': (cotask.FIXED_PRIORITY, 'heap_sched'),
+            'heap_edf': (cotask.EDF, 'heap_sched'),
+            'tick_sched': (cotask.FIXED_PRIORITY, 'tick_sched')}
+
+## The task periods, in milliseconds, from which synthetic task sets are made
+PERIODS_MS = (1, 2, 5, 10, 13, 15, 18, 20, 22, 30, 50, 100)
+
+
+## @brief Make a synthetic task set.
+#
+#  Each task is given a period picked from @c periods and a share of the
+#  total utilization picked at random, from which its run time is found.
+#  Priorities are either rate monotonic, so that shorter periods have higher
+#  priorities, or picked at random.
+#  @param n_tasks The number of tasks in the set
+#  @param util The fraction of the processor's time used by all the tasks
+#  @param seed The seed for the random numbers, so a set can be made again
+#  @param periods The periods in milliseconds from which to pick
+#  @param priorities Either @c 'rm' for rate monotonic or @c 'random'
+#  @param spread How much each run time varies, as a fraction of its mean
+#  <b> Returns </b>
+#  <blockquote>
+#  A list of tuples (name, priority, period in ms, mean run time in us,
+#  spread)
+def make_task_set(n_tasks, util=0.6, seed=1, periods=PERIODS_MS,
+                  priorities='rm', spread=0.0):
+    rng = random.Random(seed)
+    task_periods = [rng.choice(periods) for _ in range(n_tasks)]
+    weights = [rng.random() + 0.1 for _ in range(n_tasks)]
+    total = sum(weights)
+
+    if priorities == 'rm':
+        # Sort the distinct periods so the shortest gets the highest priority
+        ranks = sorted(set(task_periods), reverse=True)
+        task_pris = [ranks.index(period) + 1 for period in task_periods]
+    elif priorities == 'random':
+        task_pris = [rng.randint(1, 8) for _ in range(n_tasks)]
+    else:
+        raise ValueError(f"Unknown priority assignment '{priorities}'")
+
+    task_set = []
+    for idx in range(n_tasks):
+        run_us = max(1, int(util * weights[idx] / total
+                            * task_periods[idx] * 1000))
+        task_set.append((f"T{idx}", task_pris[idx], task_periods[idx],
+                         run_us, spread))
+    return task_set
+
+
+## @brief A task function for a synthetic task, which does nothing but yield.
+def bench_task():
+    while True:
+        yield 0
+
+
+## @brief A record of how late the runs of one synthetic task began.
+#
+#  The task's releases are at whole multiples of its period from time zero.
+#  Each run which begins is taken to serve the latest release before it
+#  which hasn't been served yet, and its lateness is the time since that
+#  release. The releases before it which weren't served are missed, as
+#  another release came before a run began for them. A run which begins
+#  before any unserved release, as when a task catches up on the releases
+#  it missed, serves none. Every scheduler is then judged the same way,
+#  whether it catches up on missed releases or drops them.
+class Lateness:
+
+    ## @brief Make a record for a task which hasn't yet run.
+    #  @param period_ms The task's period in milliseconds
+    def __init__(self, period_ms):
+        ## The task's period in microseconds
+        self.period = period_ms * 1000
+
+        ## The time of the release for which the next run is made
+        self.release = self.period
+
+        ## The number of runs which have begun
+        self.runs = 0
+
+        ## The number of releases served by a run
+        self.served = 0
+
+        ## The total lateness of the releases served in microseconds
+        self.late_sum = 0
+
+        ## The greatest lateness of any release in microseconds
+        self.latest = 0
+
+        ## The number of releases missed
+        self.missed = 0
+
+    ## @brief Wrap a task function so that the start of each run is noted.
+    #
+    #  The time is read from the virtual clock without the cost of a read,
+    #  so measuring doesn't change what is measured.
+    #  @param run_fun The generator function which implements the task
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  A generator function which can be given to @c sim_platform.costed()
+    def wrap(self, run_fun):
+        def timed_run(*args):
+            gen = run_fun(*args)
+            while True:
+                self.runs += 1
+                late = clock._now - self.release
+                if late >= 0:
+                    skipped = late // self.period
+                    self.missed += skipped
+                    late -= skipped * self.period
+                    self.served += 1
+                    self.late_sum += late
+                    if late > self.latest:
+                        self.latest = late
+                    self.release += (skipped + 1) * self.period
+                yield next(gen)
+        return timed_run
+
+    ## @brief Count the releases which weren't served and were followed by
+    #         another release before the end of a benchmark.
+    #  @param end The time in microseconds at which the benchmark stopped
+    def finish(self, end):
+        while self.release + self.period <= end:
+            self.missed += 1
+            self.release += self.period
+
+
+## @brief Make the run time function for one synthetic task.
+#  @param run_us The mean run time in microseconds
+#  @param spread How much the run time varies, as a fraction of its mean
+#  @param rng The random number generator to use
+#  <b> Returns </b>
+#  <blockquote>
+#  A run time in microseconds, or a function which returns one
+def run_time(run_us, spread, rng):
+    if spread <= 0:
+        return run_us
+    low = run_us * (1.0 - spread)
+    high = run_us * (1.0 + spread)
+    return lambda: rng.uniform(low, high)
+
+
+## @brief Run one task set under one scheduler and measure it.
+#  @param task_set A list of task tuples as made by @c make_task_set()
+#  @param policy The name of a scheduler in @c POLICIES
+#  @param seconds How long to run, in virtual time
+#  @param seed The seed for the random run times
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of results which can be written as JSON
+def bench(task_set, policy, seconds=10.0, seed=1):
+    list_policy, sched_name = POLICIES[policy]
+    rng = random.Random(seed)
+    clock._now = 0
+
+    task_list = cotask.TaskList(policy=list_policy)
+    records = []
+    for name, priority, period, run_us, spread in task_set:
+        record = Lateness(period)
+        records.append(record)
+        task_list.append(cotask.Task(
+            sim_platform.costed(clock, record.wrap(bench_task),
+                                run_time(run_us, spread, rng)),
+            name=name, priority=priority, period=period))
+    task_list.idle_fun = clock.idle
+    task_list.align_releases(0)
+    if sched_name == 'tick_sched':
+        task_list.timer_release(clock.timer(1000))
+    sched = getattr(task_list, sched_name)
+
+    # Time each pass with the computer's clock; the virtual clock doesn't
+    # move while the scheduler is deciding what to run
+    pass_ns = []
+    end = int(seconds * 1000000)
+    counter = time.perf_counter_ns
+    wall_start = counter()
+    while clock._now < end:
+        start = counter()
+        sched()
+        pass_ns.append(counter() - start)
+    wall_ns = counter() - wall_start
+    task_list.stop_timer_release()
+
+    for record in records:
+        record.finish(clock._now)
+
+    pass_ns.sort()
+    passes = len(pass_ns)
+    runs = sum(record.runs for record in records)
+    served = sum(record.served for record in records)
+    late_sum = sum(record.late_sum for record in records)
+    util = sum(run_us / (period * 1000.0)
+               for _, _, period, run_us, _ in task_set)
+
+    return {'policy': policy,
+            'tasks': len(task_set),
+            'util': round(util, 4),
+            'seconds': seconds,
+            'passes': passes,
+            'runs': runs,
+            'pass_ns_avg': sum(pass_ns) // passes if passes else 0,
+            'pass_ns_p50': pass_ns[passes // 2] if passes else 0,
+            'pass_ns_p99': pass_ns[passes * 99 // 100] if passes else 0,
+            'pass_ns_max': pass_ns[-1] if passes else 0,
+            'wall_ns_per_run': wall_ns // runs if runs else 0,
+            'late_us_avg': round(late_sum / served, 1) if served else 0,
+            'late_us_max': max(record.latest for record in records),
+            'missed': sum(record.missed for record in records),
+            'idle_pct': round(task_list.idle_percent(), 2),
+            'wall_s': round(wall_ns / 1e9, 3)}
+
+
+## @brief Run the benchmarks given on the command line and print one line of
+#         JSON for each.
+#  @param argv The command line arguments; run with @c --help to list them
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the cotask "
+                                     "schedulers on synthetic task sets")
+    parser.add_argument('--tasks', default='10,20,50',
+                        help="comma separated numbers of tasks per set")
+    parser.add_argument('--policies', default=','.join(POLICIES),
+                        help="comma separated schedulers to benchmark")
+    parser.add_argument('--seconds', type=float, default=10.0,
+                        help="virtual time for each run")
+    parser.add_argument('--util', type=float, default=0.6,
+                        help="total utilization of each task set")
+    parser.add_argument('--priorities', choices=('rm', 'random'),
+                        default='rm', help="how priorities are assigned")
+    parser.add_argument('--spread', type=float, default=0.0,
+                        help="run time variation as a fraction of the mean")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="seed for the task sets and run times")
+    args = parser.parse_args(argv)
+
+    for policy in args.policies.split(','):
+        if policy not in POLICIES:
+            parser.error(f"unknown policy '{policy}'; "
+                         f"choose from {', '.join(POLICIES)}")
+
+    for n_tasks in (int(num) for num in args.tasks.split(',')):
+        task_set = make_task_set(n_tasks, args.util, args.seed,
+                                 priorities=args.priorities,
+                                 spread=args.spread)
+        for policy in args.policies.split(','):
+            try:
+                result = bench(task_set, policy, args.seconds, args.seed)
+            except ValueError as err:
+                result = {'policy': policy, 'tasks': n_tasks,
+                          'skipped': str(err)}
+            result['seed'] = args.seed
+            result['priorities'] = args.priorities
+            print(json.dumps(result))
+            sys.stdout.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
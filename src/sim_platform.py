@@ -0,0 +1,476 @@
+## @file sim_platform.py
+#  This file contains stand-ins for the MicroPython modules used by
+#  @c cotask.py and @c task_share.py, so that the scheduler and its tasks can
+#  be run on a desktop computer with ordinary Python.
+#
+#  The stand-in modules @c utime, @c micropython, @c pyb and @c machine are
+#  installed into @c sys.modules by @c install(), which must be called before
+#  @c cotask or @c task_share is imported. The code which runs on the Romi is
+#  unchanged, so the stand-ins cost nothing on the microcontroller.
+#
+#  The stand-in @c utime reads its time from a clock object. A @c HostClock
+#  follows the computer's real time. A @c VirtualClock only moves forward when
+#  it is told to: when the scheduler goes idle, it jumps straight to the next
+#  task release, and a task made with @c costed() advances it by the run time
+#  the task would take on the microcontroller. A whole run of the robot's
+#  task set can then be simulated in much less time than it would take, and
+#  gives the same results every time it is run. Running this file simulates
+#  60 s of the task table of @c main.py in about 0.4 to 0.7 s on a desktop
+#  computer (about 47500 passes of @c pri_sched(), most of that time spent
+#  asking each task whether it is ready); with the UI task at its old 1 ms
+#  period it took about 1.2 to 1.6 s, for about 128700 passes.
+#
+#  The stand-in @c pyb.Timer ticks in the clock's time. With a @c HostClock
+#  its callback is called from a thread, and with a @c VirtualClock it is
+#  called at the first moment after each tick at which the clock is read or
+#  moved forward. In both cases the stand-in @c pyb.disable_irq() keeps the
+#  callback from running until interrupts are enabled again. The stand-in
+#  @c micropython.schedule() calls its function right away.
+#  @code
+#  import sim_platform
+#  clock = sim_platform.install(sim_platform.VirtualClock())
+#  import cotask
+#
+#  task = cotask.Task(sim_platform.costed(clock, my_task_fun, 300),
+#                     name="My Task", priority=3, period=10, profile=True)
+#  cotask.task_list.append(task)
+#  sim_platform.run(cotask.task_list, clock, 60.0)
+#  print(cotask.task_list)
+#  @endcode
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+import types
+
+## The period at which MicroPython's microsecond tick count wraps around
+TICKS_PERIOD = 1 << 30
+
+# The mask of a tick count and half its period, used by the tick functions,
+# which are called often enough for their speed to matter
+_TICKS_MASK = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+## The period of the microcontroller's tick interrupt, which wakes up
+#  @c pyb.wfi() at least this often
+SYSTICK_US = 1000
+
+
+## A far off time used as the next firing time when no timer is running
+NEVER = 1 << 62
+
+# Held while interrupts are disabled or a timer callback is running, so that
+# a timer thread's callback can't run in the middle of code which has
+# disabled interrupts, nor the other way around
+_irq_lock = threading.RLock()
+
+
+## @brief Disable interrupts, as @c pyb.disable_irq() does.
+def disable_irq():
+    _irq_lock.acquire()
+    return True
+
+
+## @brief Enable interrupts again, as @c pyb.enable_irq() does.
+def enable_irq(state=True):
+    _irq_lock.release()
+
+
+## @brief Find the signed difference between two tick counts, as
+#         @c utime.ticks_diff() does.
+def ticks_diff(ticks1, ticks2):
+    diff = (ticks1 - ticks2) & _TICKS_MASK
+    return diff - TICKS_PERIOD if diff >= _TICKS_HALF else diff
+
+
+## @brief Add a number of ticks to a tick count, as @c utime.ticks_add()
+#         does.
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MASK
+
+
+## @brief A clock which follows the computer's real time.
+#
+#  This class is also the base of @c VirtualClock, which only has to change
+#  the way the time is found.
+class HostClock:
+
+    ## @brief Create a clock whose tick count starts at zero now.
+    def __init__(self):
+        self._start_ns = time.perf_counter_ns()
+
+    ## @brief Read the number of microseconds since the clock was created.
+    #  <b> Returns </b>
+    #  <blockquote>
+    #  The time in microseconds, which is not wrapped around
+    def now(self):
+        return (time.perf_counter_ns() - self._start_ns) // 1000
+
+    ## @brief Read the microsecond tick count as @c utime.ticks_us() does.
+    def ticks_us(self):
+        return self.now() & (TICKS_PERIOD - 1)
+
+    ## @brief Read the millisecond tick count as @c utime.ticks_ms() does.
+    def ticks_ms(self):
+        return (self.now() // 1000) & (TICKS_PERIOD - 1)
+
+    ## @brief Wait for the given number of microseconds.
+    def sleep_us(self, usec):
+        if usec > 0:
+            time.sleep(usec / 1000000.0)
+
+    ## @brief Wait for the given number of milliseconds.
+    def sleep_ms(self, msec):
+        self.sleep_us(1000 * msec)
+
+    ## @brief Wait for the given number of seconds.
+    def sleep(self, sec):
+        self.sleep_us(1000000 * sec)
+
+    ## @brief Wait for an interrupt; here, for the next tick interrupt.
+    def wfi(self):
+        self.sleep_us(SYSTICK_US - self.now() % SYSTICK_US)
+
+    ## @brief An idle function for @c cotask.TaskList which sleeps until
+    #         the next task release, or until a task's go flag is set.
+    #  @param task_list The task list which has nothing to run
+    #  @param wait_us Microseconds until the next release, or @c None
+    def idle(self, task_list, wait_us):
+        end = self.now() + (SYSTICK_US if wait_us is None else wait_us)
+        while not task_list.go_pending():
+            left = end - self.now()
+            if left <= 0:
+                break
+            self.sleep_us(min(left, SYSTICK_US))
+
+    ## @brief Make a timer which ticks at the given frequency, as
+    #         @c pyb.Timer does.
+    def timer(self, freq):
+        return ThreadTimer(self, freq)
+
+
+## @brief A stand-in for a hardware timer which calls its callback from a
+#         thread, as an interrupt would, while the clock follows real time.
+class ThreadTimer:
+
+    ## @brief Make a timer; it starts ticking when a callback is given.
+    #  @param clock The clock whose time the timer follows
+    #  @param freq The number of ticks per second
+    def __init__(self, clock, freq):
+        self._clock = clock
+        self._period_us = 1000000 // freq
+        self._fun = None
+        self._thread = None
+
+    ## @brief Set the function called on each tick, or stop the ticks.
+    #  @param fun A function taking the timer, or @c None
+    def callback(self, fun):
+        self._fun = fun
+        if fun is not None and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    ## @brief Stop the timer.
+    def deinit(self):
+        self._fun = None
+
+    ## @brief Call the callback once per period, with interrupts disabled,
+    #         until the callback is removed.
+    def _run(self):
+        next_tick = self._clock.now() + self._period_us
+        while self._fun is not None:
+            self._clock.sleep_us(next_tick - self._clock.now())
+            next_tick += self._period_us
+            with _irq_lock:
+                fun = self._fun
+                if fun is not None:
+                    fun(self)
+        self._thread = None
+
+
+## @brief A clock which only moves forward when told to.
+#
+#  Reading the clock costs one microsecond by default, so that code which
+#  polls the clock, as the schedulers do, still sees time go by. With a read
+#  cost of zero, the clock moves only when it is advanced, by task runs, in
+#  the idle function and by @c run(), which is quicker as no pass of the
+#  scheduler is spent polling; a task is then found due one microsecond
+#  after its release, when the idle function wakes up. A loop which calls
+#  the scheduler itself, rather than through @c run(), must then move the
+#  clock on after a pass which neither ran a task nor moved the clock.
+class VirtualClock(HostClock):
+
+    ## @brief Create a virtual clock.
+    #  @param start The tick count at which the clock starts, in microseconds
+    #  @param read_cost_us The time which passes each time the clock is read,
+    #         or zero for reads to cost nothing
+    def __init__(self, start=0, read_cost_us=1):
+        self._now = start
+        self.read_cost_us = read_cost_us
+        self._timers = []
+        self._next_fire = NEVER
+
+        # When reads cost nothing, time only moves in advance(), which calls
+        # the timers, so a read needn't look at them
+        if not read_cost_us:
+            self.ticks_us = self._read_free
+
+    ## @brief Read the microsecond tick count when reads cost nothing.
+    def _read_free(self):
+        return self._now & _TICKS_MASK
+
+    ## @brief Read the number of microseconds since the clock started.
+    def now(self):
+        self._now += self.read_cost_us
+        if self._now >= self._next_fire:
+            self._fire(self._now)
+        return self._now
+
+    ## @brief Read the microsecond tick count as @c utime.ticks_us() does.
+    def ticks_us(self):
+        self._now += self.read_cost_us
+        if self._now >= self._next_fire:
+            self._fire(self._now)
+        return self._now & (TICKS_PERIOD - 1)
+
+    ## @brief Move the clock forward.
+    #  @param usec The number of microseconds by which time moves forward
+    def advance(self, usec):
+        if usec > 0:
+            self._now += int(usec)
+            if self._now >= self._next_fire:
+                self._fire(self._now)
+
+    ## @brief Wait by moving the clock forward.
+    def sleep_us(self, usec):
+        self.advance(usec)
+
+    ## @brief Wait for an interrupt by moving the clock to the next tick, or
+    #         to the next timer tick if that comes first.
+    def wfi(self):
+        self.advance(min(SYSTICK_US - self._now % SYSTICK_US,
+                         self._next_fire - self._now))
+
+    ## @brief An idle function for @c cotask.TaskList which jumps straight
+    #         to the next task release. If a timer is running, the clock
+    #         stops at each of its ticks and the wait ends early if a task's
+    #         go flag has been set. With no release to wait for, the clock 
+    #         jumps to the next timer tick, as nothing else could wake it.
+    #  @param task_list The task list which has nothing to run
+    #  @param wait_us Microseconds until the next release, or @c None
+    def idle(self, task_list, wait_us):
+        if wait_us is None:
+            end = self._now + SYSTICK_US if self._next_fire == NEVER \
+                else self._next_fire
+        else:
+            end = self._now + wait_us
+        if not self.read_cost_us:
+            end += 1
+        while self._now < end and not task_list.go_pending():
+            self.advance(min(end, self._next_fire) - self._now)
+
+    ## @brief Make a timer which ticks at the given frequency in the clock's
+    #         time, as @c pyb.Timer does.
+    def timer(self, freq):
+        timer = VirtualTimer(self, freq)
+        self._timers.append(timer)
+        return timer
+
+    ## @brief Find the time at which the next running timer ticks.
+    def _plan(self):
+        self._next_fire = min((tim.next_tick for tim in self._timers
+                               if tim.fun is not None), default=NEVER)
+
+    ## @brief Call the callbacks of the timers which have ticked by the given
+    #         time, in order, as if each had interrupted the program at the
+    #         moment of its tick.
+    #  @param until The time in microseconds up to which timers tick
+    def _fire(self, until):
+        while self._next_fire <= until:
+            timer = min((tim for tim in self._timers if tim.fun is not None),
+                        key=lambda tim: tim.next_tick)
+            self._now = timer.next_tick
+            timer.next_tick += timer.period_us
+            self._plan()
+            timer.fun(timer)
+        self._now = max(self._now, until)
+
+
+## @brief A stand-in for a hardware timer which ticks in a virtual clock's
+#         time. Its callback is called while the clock is being read or
+#         moved forward, at the first moment the program would have noticed
+#         an interrupt.
+class VirtualTimer:
+
+    ## @brief Make a timer; it starts ticking when a callback is given.
+    #  @param clock The @c VirtualClock whose time the timer follows
+    #  @param freq The number of ticks per second
+    def __init__(self, clock, freq):
+        self._clock = clock
+        self.period_us = 1000000 // freq
+        self.next_tick = NEVER
+        self.fun = None
+
+    ## @brief Set the function called on each tick, or stop the ticks.
+    #  @param fun A function taking the timer, or @c None
+    def callback(self, fun):
+        if fun is not None and self.fun is None:
+            self.next_tick = self._clock._now + self.period_us
+        self.fun = fun
+        self._clock._plan()
+
+    ## @brief Stop the timer.
+    def deinit(self):
+        self.callback(None)
+
+
+## @brief Make the stand-in modules and put them into @c sys.modules.
+#
+#  Modules which have already been installed are replaced, so a test can
+#  install a fresh clock; @c cotask and @c task_share should then be imported
+#  again (or reloaded) so that they use it.
+#  @param clock The clock to be used by the stand-in @c utime, by default a
+#         new @c HostClock
+#  @param alloc If @c True, give the computer's @c gc module a 
+#         @c mem_alloc() function, as MicroPython's has, so that tasks made
+#         with @c alloc=True measure their allocations. It reads the memory
+#         traced by @c tracemalloc, which slows the program down; since
+#         CPython frees most objects as soon as they are dropped, the amounts
+#         are what each run keeps rather than all that it allocates
+#  <b> Returns </b>
+#  <blockquote>
+#  The clock
+def install(clock=None, alloc=False):
+    if clock is None:
+        clock = HostClock()
+
+    if alloc and not hasattr(gc, 'mem_alloc'):
+        tracemalloc.start()
+        gc.mem_alloc = lambda: tracemalloc.get_traced_memory()[0]
+
+    utime = types.ModuleType('utime')
+    for name in ('ticks_us', 'ticks_ms', 'sleep_us', 'sleep_ms', 'sleep'):
+        setattr(utime, name, getattr(clock, name))
+    utime.ticks_diff = ticks_diff
+    utime.ticks_add = ticks_add
+    utime.clock = clock
+
+    micropython = types.ModuleType('micropython')
+    micropython.native = lambda fun: fun
+    micropython.viper = lambda fun: fun
+    micropython.const = lambda value: value
+    micropython.schedule = lambda fun, arg: fun(arg)
+    micropython.alloc_emergency_exception_buf = lambda size: None
+
+    pyb = types.ModuleType('pyb')
+    pyb.disable_irq = disable_irq
+    pyb.enable_irq = enable_irq
+    pyb.wfi = clock.wfi
+    pyb.Timer = lambda timer_id, freq=1000, **kwargs: clock.timer(freq)
+
+    machine = types.ModuleType('machine')
+    machine.disable_irq = disable_irq
+    machine.enable_irq = enable_irq
+    machine.lightsleep = lambda msec=None: clock.sleep_ms(msec or 0)
+    machine.idle = clock.wfi
+
+    sys.modules.update({'utime': utime, 'micropython': micropython,
+                        'pyb': pyb, 'machine': machine})
+    return clock
+
+
+## @brief Wrap a task function so that each run advances a virtual clock.
+#
+#  The wrapped function makes the same generator as the original, but after
+#  each run the clock is moved forward by the time which the run would take
+#  on the microcontroller, so the scheduler sees realistic run times.
+#  @param clock The @c VirtualClock to be advanced
+#  @param run_fun The generator function which implements the task
+#  @param run_us The run time in microseconds, or a function with no
+#         arguments which returns a run time each time it is called
+#  <b> Returns </b>
+#  <blockquote>
+#  A generator function which can be given to @c cotask.Task
+def costed(clock, run_fun, run_us):
+    def costed_run(*args):
+        gen = run_fun(*args)
+        while True:
+            state = next(gen)
+            clock.advance(run_us() if callable(run_us) else run_us)
+            yield state
+    return costed_run
+
+
+## @brief Run a task list until a clock has moved forward by a given time.
+#
+#  The task list's idle function is set to the clock's, so that with a
+#  @c VirtualClock the scheduler jumps from one release to the next.
+#  @param task_list The @c cotask.TaskList to be run
+#  @param clock The clock used by the stand-in @c utime
+#  @param seconds How long to run the task list, in the clock's time
+#  @param sched The name of the scheduler method to be called
+#  <b> Returns </b>
+#  <blockquote>
+#  The number of times the scheduler was called
+def run(task_list, clock, seconds, sched='pri_sched'):
+    task_list.idle_fun = clock.idle
+    sched_fun = getattr(task_list, sched)
+    end = clock.now() + int(seconds * 1000000)
+    passes = 0
+    now = clock.now()
+    while now < end:
+        # When reads cost nothing, a pass which runs nothing and doesn't
+        # idle, because a release is due at this very microsecond, moves
+        # the clock on so that the release is seen
+        ran = sched_fun()
+        passes += 1
+        before, now = now, clock.now()
+        if not ran and now == before:
+            clock.advance(1)
+            now += 1
+    return passes
+
+
+## The task table of @c main.py as (name, priority, period in ms, run time in
+#  microseconds). The run times are rough placeholders until they are
+#  replaced with the MAX DUR column of a profile taken on the Romi.
+MAIN_TASKS = (("data_collector", 2, 18, 150),
+              ("motor_encoder_left", 7, 13, 400),
+              ("motor_encoder_right", 7, 13, 400),
+              ("ui", 1, 10, 60),
+              ("control_task", 6, 15, 900),
+              ("line_task", 5, 22, 2500),
+              ("imu_task", 6, 20, 1200),
+              ("observer", 4, 20, 2000),
+              ("pathing", 3, 30, 300),
+              ("bump task", 2, 50, 150))
+
+
+## @brief A task function which does nothing but yield, standing in for a
+#         task whose hardware isn't available on the computer.
+def placeholder_task():
+    while True:
+        yield 0
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60.0
+    clock = install(VirtualClock(read_cost_us=0))
+    import cotask
+
+    for name, priority, period, run_us in MAIN_TASKS:
+        cotask.task_list.append(cotask.Task(
+            costed(clock, placeholder_task, run_us), name=name,
+            priority=priority, period=period, profile=True))
+
+    wall_start = time.perf_counter()
+    passes = run(cotask.task_list, clock, seconds)
+    wall = time.perf_counter() - wall_start
+    print(cotask.task_list)
+    print(f"Simulated {seconds:.1f} s in {wall:.3f} s of real time "
+          f"({passes} scheduler passes)")
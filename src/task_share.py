@@ -22,8 +22,8 @@
 #  POSSIBILITY OF SUCH DAMAGE.
 
 import array
-import gc
 import pyb
+import utime
 import micropython
 
 
@@ -31,6 +31,15 @@ import micropython
 #  used to create diagnostic printouts. 
 share_list = []
 
+# Whether queues and shares count their traffic, and the cotask module, if 
+# there is one, from which the task doing the writing is found
+_tracking = False
+_cotask = None
+
+## Write sequence numbers of versioned shares wrap around to zero after this,
+#  so that they stay small integers which MicroPython doesn't allocate
+SEQ_MASK = 0x3FFFFFFF
+
 ## This dictionary allows readable printouts of queue and share data types.
 type_code_strings = {'b' : "int8",   'B' : "uint8",
                      'h' : "int16",  'H' : "uint16",
@@ -48,6 +57,82 @@ def show_all ():
     return '\n'.join (gen)
 
 
+## Start or stop counting the traffic through every queue and share. 
+#
+#  While traffic is counted, each queue and share counts its reads and 
+#  writes and keeps the task which last wrote it and the smallest and 
+#  largest values written, so that @c show_traffic() can show which are 
+#  busy and which aren't used. Each read or write then takes a little 
+#  longer, and keeping the smallest and largest float values allocates
+#  memory, so this is for finding out how a program uses its shares rather
+#  than for every run. Queues and shares made later count too. The counts
+#  start from zero.
+#  @param on @c True to count traffic, @c False to stop
+def track_traffic (on = True):
+    global _tracking, _cotask
+    _tracking = on
+    if on and _cotask is None:
+        try:
+            import cotask
+            _cotask = cotask
+        except ImportError:
+            pass
+    if _cotask is not None:
+        _cotask.note_running = on
+    for item in share_list:
+        item._traffic = on
+        item._reset_traffic ()
+
+
+## Create a string showing the traffic through each queue and share since
+#  @c track_traffic() was called, busiest first. 
+#
+#  For each one it shows the reads and writes (items, for a queue), the 
+#  writes per second, the smallest and largest values written and the task
+#  which last wrote it, or @c - if it was written outside of any task. 
+#  After the table come the names of queues and shares which were never 
+#  used, written but never read, or read but never written, and names 
+#  given to more than one of them, as those may be candidates for merging
+#  or removal.
+#  @return A string containing the traffic report
+def show_traffic ():
+    if not _tracking:
+        return "Share traffic isn't being tracked; call track_traffic ()"
+    now = utime.ticks_ms ()
+    items = sorted (share_list, key = lambda item: -(item._reads 
+                                                     + item._writes))
+    rows = ['{:<16s}{:<13s}{:>9s}{:>9s}{:>10s}{:>11s}{:>11s}  {:s}'.format (
+            'NAME', 'KIND', 'READS', 'WRITES', 'WRITES/S', 'MIN', 'MAX',
+            'LAST WRITER')]
+    rows.extend (item._traffic_str (now) for item in items)
+
+    unused = [item._name for item in share_list 
+              if not item._reads and not item._writes]
+    unread = [item._name for item in share_list
+              if item._writes and not item._reads]
+    unwritten = [item._name for item in share_list
+                 if item._reads and not item._writes]
+    names = [item._name for item in share_list]
+    doubled = [name for idx, name in enumerate (names)
+               if name in names[:idx] and name not in names[idx + 1:]]
+    for desc, found in (("Never used", unused),
+                        ("Written but never read", unread),
+                        ("Read but never written", unwritten),
+                        ("Names used more than once", doubled)):
+        if found:
+            rows.append ('{:s}: {:s}'.format (desc, ', '.join (found)))
+    return '\n'.join (rows)
+
+
+## Format a number for the traffic report, or a dash if there is none.
+#  @param value The number, or @c None
+#  @return The number as a string
+def _num_str (value):
+    if value is None:
+        return '-'
+    return '{:.5g}'.format (value)
+
+
 ## Base class for queues and shares which exchange data between tasks.
 # 
 #  One should never create an object from this class; it doesn't do anything
@@ -62,10 +147,89 @@ class BaseShare:
         self._type_code = type_code
         self._thread_protect = thread_protect
 
+        # Tasks whose go() methods are called when new data is put in, and
+        # those of them which are resumed first if they're suspended
+        self._subscribers = ()
+        self._resumers = ()
+
+        # Traffic counts, kept if track_traffic() has been called
+        self._traffic = _tracking
+        self._reset_traffic ()
+
         # Add this queue to the global share and queue list
         share_list.append (self)
 
 
+    ## Ask for a task to be run when new data is put into this queue or share.
+    #
+    #  After a task has subscribed, each @c put() which adds an item to a 
+    #  queue, or which changes the value in a share, calls the task's 
+    #  @c go() method. A task whose period is @c None then runs only when it 
+    #  has something to do, and a timed task reacts without waiting for its
+    #  next period. Since @c go() is safe to call from an interrupt service
+    #  routine, so is @c put(). 
+    #
+    #  A task which suspends itself while it waits for this queue or share
+    #  can subscribe with @c resume set, so that new data resumes it and no
+    #  other task has to. A task's @c resume() isn't safe to call from an
+    #  interrupt service routine, so neither is @c put() then.
+    #  @param task The @c cotask.Task which is to be run
+    #  @param resume @c True to resume the task if it has been suspended
+    def subscribe (self, task, resume = False):
+        if task not in self._subscribers:
+            self._subscribers = self._subscribers + (task,)
+        if resume and task not in self._resumers:
+            self._resumers = self._resumers + (task,)
+
+
+    ## Start the traffic counts from zero.
+    def _reset_traffic (self):
+        self._reads = 0
+        self._writes = 0
+        self._writer = None
+        self._min = None
+        self._max = None
+        self._traffic_mark = utime.ticks_ms ()
+
+
+    ## Count a write, noting the task which made it and the value written.
+    #  @param data The value written, or @c None if the smallest and largest
+    #         values aren't kept
+    @micropython.native
+    def _count_write (self, data):
+        self._writes += 1
+        if _cotask is not None:
+            self._writer = _cotask.running
+        if data is not None:
+            if self._min is None or data < self._min:
+                self._min = data
+            if self._max is None or data > self._max:
+                self._max = data
+
+
+    ## Make a line of the traffic report for this queue or share.
+    #  @param now The time in milliseconds at which the report is made
+    #  @return The line of text
+    def _traffic_str (self, now):
+        secs = utime.ticks_diff (now, self._traffic_mark) / 1000.0
+        rate = self._writes / secs if secs > 0 else 0.0
+        writer = self._writer.name if self._writer is not None else '-'
+        return '{:<16s}{:<13s}{:9d}{:9d}{:10.1f}{:>11s}{:>11s}  {:s}'.format (
+               self._name[:15], self.__class__.__name__[:12], self._reads,
+               self._writes, rate, _num_str (self._min), 
+               _num_str (self._max), writer)
+
+
+    ## Call the @c go() method of each task which has subscribed, resuming
+    #  first those which asked to be resumed.
+    @micropython.native
+    def _notify (self):
+        for task in self._resumers:
+            task.resume ()
+        for task in self._subscribers:
+            task.go ()
+
+
 ## A queue which is used to transfer data from one task to another.
 #
 #  If parameter 'thread_protect' is @c True when a queue is created, transfers
@@ -141,41 +305,51 @@ class Queue (BaseShare):
         # Initialize pointers to be used for reading and writing data
         self.clear ()
 
-        # Since we may have allocated a bunch of memory, call the garbage
-        # collector to neaten up what memory is left for future use
-        gc.collect ()
-
 
     ## Put an item into the queue.
     # 
     #  If there isn't room for the item, wait (blocking the calling process)
     #  until room becomes available, unless the @c overwrite constructor
-    #  parameter was set to @c True to allow old data to be clobbered. If
-    #  non-blocking behavior without overwriting is needed, one should call
-    #  @c full() to ensure that the queue is not full before putting data
-    #  into it:
+    #  parameter was set to @c True to allow old data to be clobbered. In a
+    #  cooperative scheduler such as @c cotask, no other task can run to make
+    #  room while this method waits, so a task which puts data into a queue
+    #  should give a timeout or use @c try_put(), which never waits:
     #  @code
     #     def some_task ():
     #         # Setup
     #         while True:
-    #             if not my_queue.full ():
-    #                 my_queue.put (create_something_to_put ())
+    #             my_queue.try_put (create_something_to_put ())
     #             yield 0
     #  @endcode
+    #  An item which couldn't be put in, or which overwrote the oldest item,
+    #  is counted as an overflow.
     #  @param item The item to be placed into the queue
-    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @param in_ISR Set this to @c True if calling from within an ISR; the
+    #         item is not put in if the queue is full
+    #  @param timeout_us The longest time to wait for room in microseconds, 
+    #         or @c None to wait for as long as it takes
+    #  @return @c True if the item was put into the queue, @c False if there
+    #          was no room for it
     @micropython.native
-    def put (self, item, in_ISR = False):
+    def put (self, item, in_ISR = False, timeout_us = None):
         # If we're in an ISR and the queue is full and we're not allowed to
         # overwrite data, we have to give up and exit
-        if self.full ():
-            if in_ISR:
-                return
+        if self.full () and not self._overwrite:
+            if in_ISR or timeout_us == 0:
+                self._overflows += 1
+                return False
 
             # Wait (if needed) until there's room in the buffer for the data
-            if not self._overwrite:
+            if timeout_us is None:
                 while self.full ():
                     pass
+            else:
+                start = utime.ticks_us ()
+                while self.full ():
+                    if utime.ticks_diff (utime.ticks_us (), 
+                                         start) >= timeout_us:
+                        self._overflows += 1
+                        return False
 
         # Prevent data corruption by blocking interrupts during data transfer
         if self._thread_protect and not in_ISR:
@@ -187,8 +361,10 @@ class Queue (BaseShare):
         if self._wr_idx >= self._size:
             self._wr_idx = 0
         self._num_items += 1
-        if self._num_items >= self._size:        # Can't be fuller than full
-            self._num_items = self._size
+        if self._num_items > self._size:         # Can't be fuller than full;
+            self._num_items = self._size         # the oldest item was lost
+            self._rd_idx = self._wr_idx
+            self._overflows += 1
         if self._num_items > self._max_full:     # Record maximum fillage
             self._max_full = self._num_items
 
@@ -196,13 +372,36 @@ class Queue (BaseShare):
         if self._thread_protect and not in_ISR:
             pyb.enable_irq (_irq_state)
 
+        if self._traffic:
+            self._count_write (item)
+
+        # Wake up any tasks waiting for data
+        if self._subscribers:
+            self._notify ()
+        return True
+
+
+    ## Put an item into the queue if there's room for it, without waiting.
+    #
+    #  If the queue is full, the item is dropped and counted as an overflow,
+    #  unless the queue was made to overwrite old data. This is the way for
+    #  tasks, which must not wait for one another, to fill a queue.
+    #  @param item The item to be placed into the queue
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return @c True if the item was put into the queue, @c False if the
+    #          queue was full
+    @micropython.native
+    def try_put (self, item, in_ISR = False):
+        return self.put (item, in_ISR, 0)
+
 
     ## Read an item from the queue.
     # 
     #  If there isn't anything in there, wait (blocking the calling process)
-    #  until something becomes available. If non-blocking reads are needed,
-    #  one should call @c any() to check for items before attempting to read
-    #  from the queue. This is usually done in a low priority task:
+    #  until something becomes available, or until the timeout runs out. 
+    #  As with @c put(), a task shouldn't wait for another task, so a task
+    #  should either call @c any() to check for items before reading, or use
+    #  @c try_get(). This is usually done in a low priority task:
     #  @code
     #     def some_task ():
     #         # Setup
@@ -213,12 +412,26 @@ class Queue (BaseShare):
     #             # More loop stuff
     #             yield 0
     #  @endcode
-    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @param in_ISR Set this to @c True if calling from within an ISR; 
+    #         @c None is returned at once if the queue is empty
+    #  @param timeout_us The longest time to wait for an item in 
+    #         microseconds, or @c None to wait for as long as it takes
+    #  @return The item, or @c None if there was none
     @micropython.native
-    def get (self, in_ISR = False):
+    def get (self, in_ISR = False, timeout_us = None):
         # Wait until there's something in the queue to be returned
-        while self.empty ():
-            pass
+        if self.empty ():
+            if in_ISR or timeout_us == 0:
+                return None
+            if timeout_us is None:
+                while self.empty ():
+                    pass
+            else:
+                start = utime.ticks_us ()
+                while self.empty ():
+                    if utime.ticks_diff (utime.ticks_us (), 
+                                         start) >= timeout_us:
+                        return None
 
         # Prevent data corruption by blocking interrupts during data transfer
         if self._thread_protect and not in_ISR:
@@ -239,9 +452,166 @@ class Queue (BaseShare):
         if self._thread_protect and not in_ISR:
             pyb.enable_irq (irq_state)
 
+        if self._traffic:
+            self._reads += 1
         return (to_return)
 
 
+    ## Read an item from the queue if there is one, without waiting.
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The item, or @c None if the queue was empty
+    @micropython.native
+    def try_get (self, in_ISR = False):
+        return self.get (in_ISR, 0)
+
+
+    ## Put a number of items into the queue at once.
+    #
+    #  This does what calling @c try_put() for each item would do, but 
+    #  interrupts are disabled only once and subscribed tasks are told only
+    #  once. Items for which there's no room are dropped and counted as
+    #  overflows, unless the queue overwrites old data.
+    #  @param items A list, tuple, array or other sequence of items
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were put into the queue
+    @micropython.native
+    def put_many (self, items, in_ISR = False):
+        count = len (items)
+        if not self._overwrite:
+            room = self._size - self._num_items
+            if count > room:
+                self._overflows += count - room
+                count = room
+        if count <= 0:
+            return 0
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        buf = self._buffer
+        size = self._size
+        wr_idx = self._wr_idx
+        for idx in range (count):
+            buf[wr_idx] = items[idx]
+            wr_idx += 1
+            if wr_idx >= size:
+                wr_idx = 0
+        self._wr_idx = wr_idx
+        self._num_items += count
+        if self._num_items > size:               # The oldest items were lost
+            self._overflows += self._num_items - size
+            self._num_items = size
+            self._rd_idx = wr_idx
+        if self._num_items > self._max_full:
+            self._max_full = self._num_items
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            for idx in range (count):
+                self._count_write (items[idx])
+
+        if self._subscribers:
+            self._notify ()
+        return count
+
+
+    ## Read as many items as there are, up to the length of a buffer, into 
+    #  that buffer.
+    #
+    #  Interrupts are disabled only once for all the items, and the buffer
+    #  is filled in place, so nothing is allocated; this is the quick way to
+    #  empty a queue into a preallocated @c array:
+    #  @code
+    #     samples = array.array ('f', range (16))
+    #     ...
+    #     count = my_queue.get_into (samples)
+    #  @endcode
+    #  @param buf An @c array, @c list or other buffer which can hold the 
+    #         queue's items; it's filled from the start
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items read into the buffer, which may be zero
+    @micropython.native
+    def get_into (self, buf, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        count = len (buf)
+        if count > self._num_items:
+            count = self._num_items
+        data = self._buffer
+        size = self._size
+        rd_idx = self._rd_idx
+        for idx in range (count):
+            buf[idx] = data[rd_idx]
+            rd_idx += 1
+            if rd_idx >= size:
+                rd_idx = 0
+        self._rd_idx = rd_idx
+        self._num_items -= count
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            self._reads += count
+        return count
+
+
+    ## Look at the items in the queue without copying them.
+    #
+    #  The items are returned as views of the queue's own buffer: one view
+    #  if the items lie in one piece, two if they wrap around the end of the
+    #  buffer, oldest first, or none if the queue is empty. A view can be
+    #  written to a UART or a file as it is, in binary. The items stay in
+    #  the queue until @c consume() is called, so new items go into the
+    #  free part of the buffer meanwhile; but if the queue overwrites old 
+    #  data, the items being looked at may be overwritten.
+    #  @code
+    #     for part in my_queue.view ():
+    #         uart.write (part)
+    #     my_queue.consume ()
+    #  @endcode
+    #  @return A tuple of zero, one or two @c memoryview objects
+    def view (self):
+        if self._thread_protect:
+            irq_state = pyb.disable_irq ()
+        rd_idx = self._rd_idx
+        count = self._num_items
+        if self._thread_protect:
+            pyb.enable_irq (irq_state)
+
+        if count == 0:
+            return ()
+        whole = memoryview (self._buffer)
+        end = rd_idx + count
+        if end <= self._size:
+            return (whole[rd_idx:end],)
+        return (whole[rd_idx:], whole[:end - self._size])
+
+
+    ## Take items out of the queue without reading them, usually after 
+    #  they've been looked at with @c view().
+    #  @param count The number of items to take out, or @c None to empty 
+    #         the queue
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items taken out
+    @micropython.native
+    def consume (self, count = None, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        if count is None or count > self._num_items:
+            count = self._num_items
+        self._rd_idx = (self._rd_idx + count) % self._size
+        self._num_items -= count
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+        return count
+
+
     ## Check if there are any items in the queue.
     # 
     #  Returns @c True if there are any items in the queue and @c False
@@ -282,21 +652,33 @@ class Queue (BaseShare):
         return (self._num_items)
 
 
+    ## Check how many items have overflowed the queue.
+    #
+    #  This method returns the number of items which weren't put into the
+    #  queue because it was full, or which overwrote the oldest item, since
+    #  the queue was made or last cleared.
+    #  @return The number of overflows
+    def overflows (self):
+        return (self._overflows)
+
+
     ## Remove all contents from the queue.
     def clear (self):
         self._rd_idx = 0
         self._wr_idx = 0
         self._num_items = 0
         self._max_full = 0
+        self._overflows = 0
 
 
     ## This method puts diagnostic information about the queue into a string.
     # 
     #  It shows the queue's name and type as well as the maximum number of
-    #  items and queue size. 
+    #  items, the queue size and the number of overflows. 
     def __repr__ (self):
-        return ('{:<12s} Queue<{:s}> Max Full {:d}/{:d}'.format (self._name,
-                type_code_strings[self._type_code], self._max_full, self._size))
+        return ('{:<12s} Queue<{:s}> Max Full {:d}/{:d} Overflows {:d}'.format (
+                self._name, type_code_strings[self._type_code], 
+                self._max_full, self._size, self._overflows))
 
 
 # ============================================================================
@@ -348,12 +730,22 @@ class Share (BaseShare):
     #  @param thread_protect True if mutual exclusion protection is used
     #  @param name A short name for the share, default @c ShareN where @c N
     #         is a serial number for the share
-    def __init__ (self, type_code, thread_protect = True, name = None):
+    #  @param versioned If @c True, the share counts its writes and keeps the
+    #         time of the latest one; see @c get_if_newer() and @c age_us()
+    def __init__ (self, type_code, thread_protect = True, name = None,
+                  versioned = False):
         # First call the parent class initializer
         super ().__init__ (type_code, thread_protect, name)
 
         self._buffer = array.array (type_code, [0])
 
+        # For a versioned share, the number of writes and the time in
+        # microseconds of the latest one. The count skips zero when it wraps
+        # around, as zero means the share has never been written
+        self._versioned = versioned
+        self._seq = 0
+        self._stamp = 0
+
         self._name = str (name) if name != None \
             else 'Share' + str (Share.ser_num)
         Share.ser_num += 1
@@ -364,7 +756,8 @@ class Share (BaseShare):
     #  This method puts data into the share; any old data is overwritten.
     #  This code disables interrupts during the writing so as to prevent
     #  data corrupting by an interrupt service routine which might access
-    #  the same data.
+    #  the same data. If the value changes, tasks which have subscribed to 
+    #  the share are told to run.
     #  @param data The data to be put into this share
     #  @param in_ISR Set this to True if calling from within an ISR
     @micropython.native
@@ -374,12 +767,31 @@ class Share (BaseShare):
         if self._thread_protect and not in_ISR:
             irq_state = pyb.disable_irq ()
 
-        self._buffer[0] = data
+        # Only look at the old value if a task is waiting for it to change
+        if self._subscribers:
+            old_data = self._buffer[0]
+            self._buffer[0] = data
+            changed = self._buffer[0] != old_data
+        else:
+            self._buffer[0] = data
+            changed = False
+
+        # Count the write and note its time if the share is versioned
+        if self._versioned:
+            self._seq = (self._seq + 1) & SEQ_MASK or 1
+            self._stamp = utime.ticks_us ()
 
         # Re-enable interrupts
         if self._thread_protect and not in_ISR:
             pyb.enable_irq (irq_state)
 
+        if self._traffic:
+            self._count_write (data)
+
+        # Wake up any tasks waiting for the value to change
+        if changed:
+            self._notify ()
+
 
     ## Read an item of data from the share.
     # 
@@ -399,9 +811,70 @@ class Share (BaseShare):
         if self._thread_protect and not in_ISR:
             pyb.enable_irq (irq_state)
 
+        if self._traffic:
+            self._reads += 1
         return (to_return)
 
 
+    ## Read the share only if it has been written since a task last looked.
+    #
+    #  The task keeps the sequence number from its last read and passes it
+    #  in; if there has been no write since, it can skip work which would 
+    #  only repeat what it did last time:
+    #  @code
+    #     news = my_share.get_if_newer (self.seen)
+    #     if news is not None:
+    #         self.seen, value = news
+    #         do_something_with (value)
+    #  @endcode
+    #  The sequence number and value are read together, with interrupts
+    #  disabled if the share is thread protected. The share must have been
+    #  made with @c versioned set to @c True.
+    #  @param last_seq The sequence number of the last value the task read,
+    #         or zero if it hasn't read one
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return A tuple of the sequence number and the value, or @c None if
+    #          there has been no write since @c last_seq
+    @micropython.native
+    def get_if_newer (self, last_seq, in_ISR = False):
+        if not self._versioned:
+            raise ValueError ("Share {:s} isn't versioned".format (self._name))
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        seq = self._seq
+        to_return = self._buffer[0]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            self._reads += 1
+        if seq == last_seq:
+            return None
+        return (seq, to_return)
+
+
+    ## Get the write sequence number of a versioned share. It goes up by one
+    #  each time the share is written, whether or not the value changes, so
+    #  a task can tell whether there's anything new since it last looked.
+    #  @return The sequence number, which is zero until the first write
+    def seq (self):
+        return (self._seq)
+
+
+    ## Find how long ago a versioned share was last written. A task can use
+    #  this to find out that the task which writes the share has stopped.
+    #  @return The time since the latest write in microseconds, or @c None 
+    #          if the share hasn't been written or isn't versioned
+    @micropython.native
+    def age_us (self):
+        if self._seq == 0:
+            return None
+        return utime.ticks_diff (utime.ticks_us (), self._stamp)
+
+
     ## Puts diagnostic information about the share into a string.
     #
     #  Shares are pretty simple, so we just put the name and type. 
@@ -410,3 +883,305 @@ class Share (BaseShare):
                 type_code_strings[self._type_code]))
 
 
+# ============================================================================
+
+## A shared record of several related values, such as the position and 
+#  velocity of a wheel, which are always written together.
+#
+#  The values are kept in one @c array, so a task which publishes them 
+#  disables interrupts once for the whole record, and a task which reads
+#  them gets a consistent set, all from the same write, rather than a
+#  position from one update paired with a velocity from the next. Each 
+#  value is a named field; all fields have the same type, given as for a
+#  @c Share.
+#
+#  An example of the creation and use of a record share is as follows:
+#  @code
+#  import array
+#  import task_share
+#
+#  wheel = task_share.RecordShare ('f', ('position', 'velocity'), 
+#                                  name="Wheel")
+#
+#  # In the task which measures the wheel, publish both values at once 
+#  # from a preallocated array
+#  sample = array.array ('f', (0.0, 0.0))
+#  sample[0] = encoder.get_position ()
+#  sample[1] = encoder.get_velocity ()
+#  wheel.put (sample)
+#
+#  # In another task, take a snapshot of both values
+#  snap = array.array ('f', (0.0, 0.0))
+#  wheel.read_into (snap)
+#  @endcode
+#  A task which only needs one field can be given a view of it from 
+#  @c field(), which has the @c get() and @c put() methods of a @c Share.
+class RecordShare (BaseShare):
+
+    ## A counter used to give serial numbers to records for diagnostic use.
+    ser_num = 0
+
+
+    ## Create a shared record used to transfer related values between tasks.
+    #
+    #  @param type_code The type of the values, as for a @c Share
+    #  @param fields A list or tuple of the names of the fields, in order
+    #  @param thread_protect True if mutual exclusion protection is used
+    #  @param name A short name for the record, default @c RecordN where 
+    #         @c N is a serial number for the record
+    #  @param versioned If @c True, the record counts its writes and keeps 
+    #         the time of the latest one, as a versioned @c Share does
+    def __init__ (self, type_code, fields, thread_protect = True, 
+                  name = None, versioned = False):
+        # First call the parent class initializer
+        super ().__init__ (type_code, thread_protect, name)
+
+        self._fields = tuple (fields)
+        self._size = len (self._fields)
+        self._buffer = array.array (type_code, [0] * self._size)
+
+        # For a versioned record, the number of writes and the time of the
+        # latest one, kept as for a versioned share
+        self._versioned = versioned
+        self._seq = 0
+        self._stamp = 0
+
+        self._name = str (name) if name != None \
+            else 'Record' + str (RecordShare.ser_num)
+        RecordShare.ser_num += 1
+
+
+    ## Find the index of a field, which is quicker to use than its name.
+    #  @param field The name of the field
+    #  @return The index of the field in the record
+    def index (self, field):
+        try:
+            return self._fields.index (field)
+        except ValueError:
+            raise ValueError ("Record {:s} has no field {:s}".format (
+                              self._name, str (field)))
+
+
+    ## Write all the fields of the record at once.
+    #
+    #  Interrupts are disabled once while the whole record is written. If 
+    #  any value changes, tasks which have subscribed to the record are told
+    #  to run.
+    #  @param values A list, tuple or array holding a value for each field,
+    #         in order; a preallocated array is best, as a new tuple for 
+    #         each write uses up memory
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def put (self, values, in_ISR = False):
+        buf = self._buffer
+        changed = False
+
+        # Disable interrupts before writing the data
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        # Only look at the old values if a task is waiting for them to change
+        if self._subscribers:
+            for idx in range (self._size):
+                old_data = buf[idx]
+                buf[idx] = values[idx]
+                if buf[idx] != old_data:
+                    changed = True
+        else:
+            for idx in range (self._size):
+                buf[idx] = values[idx]
+
+        if self._versioned:
+            self._seq = (self._seq + 1) & SEQ_MASK or 1
+            self._stamp = utime.ticks_us ()
+
+        # Re-enable interrupts
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        # The fields are different quantities, so no smallest and largest
+        # values are kept
+        if self._traffic:
+            self._count_write (None)
+
+        # Wake up any tasks waiting for the values to change
+        if changed:
+            self._notify ()
+
+
+    ## Write one field of the record. The other fields keep their values,
+    #  so when related values change together, @c put() should be used.
+    #  @param index The index of the field, from @c index()
+    #  @param data The value to be put into the field
+    #  @param in_ISR Set this to True if calling from within an ISR
+    @micropython.native
+    def put_field (self, index, data, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        old_data = self._buffer[index]
+        self._buffer[index] = data
+        changed = self._buffer[index] != old_data
+
+        if self._versioned:
+            self._seq = (self._seq + 1) & SEQ_MASK or 1
+            self._stamp = utime.ticks_us ()
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            self._count_write (None)
+
+        if changed and self._subscribers:
+            self._notify ()
+
+
+    ## Read one field of the record.
+    #  @param index The index of the field, from @c index()
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return The value of the field
+    @micropython.native
+    def get (self, index, in_ISR = False):
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        to_return = self._buffer[index]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            self._reads += 1
+        return (to_return)
+
+
+    ## Read a snapshot of all the fields at once into a buffer.
+    #
+    #  Interrupts are disabled once while the whole record is copied, so the
+    #  values all come from the same write. Nothing is allocated if the 
+    #  buffer was made beforehand.
+    #  @param buf An @c array or @c list with room for each field
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return The buffer
+    @micropython.native
+    def read_into (self, buf, in_ISR = False):
+        data = self._buffer
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        for idx in range (self._size):
+            buf[idx] = data[idx]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            self._reads += 1
+        return buf
+
+
+    ## Read a snapshot of the record only if it has been written since a 
+    #  task last looked, as @c Share.get_if_newer() does. Nothing is 
+    #  allocated. The record must have been made with @c versioned set to
+    #  @c True.
+    #  @param buf An @c array or @c list with room for each field
+    #  @param last_seq The sequence number of the last snapshot the task
+    #         read, or zero if it hasn't read one
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return The sequence number of the snapshot now in the buffer, or 
+    #          @c None if there has been no write since @c last_seq, in 
+    #          which case the buffer isn't changed
+    @micropython.native
+    def read_if_newer (self, buf, last_seq, in_ISR = False):
+        if not self._versioned:
+            raise ValueError ("Record {:s} isn't versioned".format (
+                              self._name))
+        data = self._buffer
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        seq = self._seq
+        if seq != last_seq:
+            for idx in range (self._size):
+                buf[idx] = data[idx]
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        if self._traffic:
+            self._reads += 1
+        if seq == last_seq:
+            return None
+        return seq
+
+
+    ## Get the write sequence number of a versioned record. It goes up by 
+    #  one each time the whole record or any field of it is written.
+    #  @return The sequence number, which is zero until the first write
+    def seq (self):
+        return (self._seq)
+
+
+    ## Find how long ago any field of a versioned record was last written.
+    #  @return The time since the latest write in microseconds, or @c None 
+    #          if the record hasn't been written or isn't versioned
+    @micropython.native
+    def age_us (self):
+        if self._seq == 0:
+            return None
+        return utime.ticks_diff (utime.ticks_us (), self._stamp)
+
+
+    ## Make a view of one field of the record, which can be given to a task 
+    #  written to use a @c Share for that value.
+    #  @param field The name or index of the field
+    #  @return A @c RecordField object for the field
+    def field (self, field):
+        if not isinstance (field, int):
+            field = self.index (field)
+        return RecordField (self, field)
+
+
+    ## Puts diagnostic information about the record into a string.
+    #
+    #  It shows the record's name and type and the names of its fields.
+    def __repr__ (self):
+        return ("{:<12s} Record<{:s}> ({:s})".format (self._name,
+                type_code_strings[self._type_code], ', '.join (self._fields)))
+
+
+## A view of one field of a @c RecordShare, which has the @c get() and 
+#  @c put() methods of a @c Share so that it can be used in place of one.
+class RecordField:
+
+    ## Make a view of a field; this is done by @c RecordShare.field().
+    #  @param record The @c RecordShare which holds the field
+    #  @param index The index of the field in the record
+    def __init__ (self, record, index):
+        self._record = record
+        self._index = index
+
+
+    ## Write the field; see @c RecordShare.put_field().
+    #  @param data The value to be put into the field
+    #  @param in_ISR Set this to True if calling from within an ISR
+    def put (self, data, in_ISR = False):
+        self._record.put_field (self._index, data, in_ISR)
+
+
+    ## Read the field; see @c RecordShare.get().
+    #  @param in_ISR Set this to True if calling from within an ISR
+    #  @return The value of the field
+    def get (self, in_ISR = False):
+        return self._record.get (self._index, in_ISR)
+
+
+    ## Ask for a task to be run when the record which holds this field
+    #  changes; see @c BaseShare.subscribe().
+    #  @param task The @c cotask.Task which is to be run
+    #  @param resume @c True to resume the task if it has been suspended
+    def subscribe (self, task, resume = False):
+        self._record.subscribe (task, resume)
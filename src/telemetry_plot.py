@@ -0,0 +1,214 @@
+## @file telemetry_plot.py
+#  This file contains a desktop program which plots the telemetry samples
+#  taken on the Romi by a @c cotask.Telemetry ring, so that the parts of the
+#  course in which the processor is busiest can be found.
+#
+#  The samples are CSV, written on the Romi with
+#  @c telemetry.write_csv(uart) or as they are taken when the ring was made
+#  with a live stream. They can be saved to a file, or read straight from
+#  the serial port for a number of seconds:
+#  @code
+#  python telemetry_plot.py telemetry.csv --states pathing_plan_task.py
+#  python telemetry_plot.py --port COM5 --seconds 60 --save run1.csv
+#  @endcode
+#  Anything else printed on the port, such as a task's debugging output, is
+#  skipped. The program prints each task's average share of the processor
+#  for each value of the tag, busiest first, and plots the shares over time
+#  with @c matplotlib, with the times at which the tag changed marked. If the
+#  tag is the pathing task's state, the state names can be read from
+#  @c pathing_plan_task.py with @c --states.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import argparse
+import re
+import sys
+import time
+
+## A line of a Python file which gives a name to a whole number, such as a
+#  state constant in @c pathing_plan_task.py
+STATE_LINE = re.compile(r'^([A-Z][A-Z0-9_]*)\s*=\s*(\d+)\b')
+
+
+## @brief Read telemetry samples from lines of CSV.
+#
+#  Lines before the header, and lines which don't have a number in each
+#  column, are skipped. A second header starts the samples again, as it's
+#  written when the Romi starts sampling again.
+#  @param lines The lines of text
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary holding lists of the @c 'time', @c 'tag' and @c 'idle'
+#  columns, and under @c 'tasks' a dictionary of task name: dictionary of
+#  the task's @c 'cpu', @c 'runs' and @c 'late' columns
+def read_csv(lines):
+    data = None
+    for line in lines:
+        cols = line.strip().split(',')
+        if cols[0] == 'time_s':
+            names = [col[:-len(' cpu_pct')] for col in cols[3::3]]
+            data = {'time': [], 'tag': [], 'idle': [],
+                    'tasks': {name: {'cpu': [], 'runs': [], 'late': []}
+                              for name in names}}
+            continue
+        if data is None or len(cols) != 3 + 3 * len(data['tasks']):
+            continue
+        try:
+            values = [float(col) for col in cols]
+        except ValueError:
+            continue
+        data['time'].append(values[0])
+        data['tag'].append(int(values[1]))
+        data['idle'].append(values[2])
+        for idx, task in enumerate(data['tasks'].values()):
+            task['cpu'].append(values[3 + 3 * idx])
+            task['runs'].append(int(values[4 + 3 * idx]))
+            task['late'].append(values[5 + 3 * idx])
+    if data is None:
+        raise ValueError("No telemetry header was found")
+    return data
+
+
+## @brief Read the names of states from a Python file which defines them
+#         as constants.
+#  @param path The file, such as @c pathing_plan_task.py
+#  <b> Returns </b>
+#  <blockquote>
+#  A dictionary of state number: name
+def read_states(path):
+    states = {}
+    with open(path) as src_file:
+        for line in src_file:
+            match = STATE_LINE.match(line)
+            if match:
+                states.setdefault(int(match.group(2)), match.group(1))
+    return states
+
+
+## @brief Find each task's average share of the processor for each tag.
+#  @param data Samples as read by @c read_csv()
+#  <b> Returns </b>
+#  <blockquote>
+#  A list of (tag, number of samples, busy percentage, dictionary of task
+#  name: percentage), busiest first
+def by_tag(data):
+    rows = {}
+    for idx, tag in enumerate(data['tag']):
+        rows.setdefault(tag, []).append(idx)
+    summary = []
+    for tag, idxs in rows.items():
+        shares = {name: sum(task['cpu'][idx] for idx in idxs) / len(idxs)
+                  for name, task in data['tasks'].items()}
+        busy = sum(shares.values())
+        summary.append((tag, len(idxs), busy, shares))
+    summary.sort(key=lambda row: -row[2])
+    return summary
+
+
+## @brief Plot each task's share of the processor over time, stacked, with
+#         the changes of the tag marked.
+#  @param data Samples as read by @c read_csv()
+#  @param states A dictionary of tag: name for the labels
+#  @param out_name A file to save the plot in, or @c None to show it
+def plot(data, states, out_name=None):
+    from matplotlib import pyplot
+
+    times = data['time']
+    names = list(data['tasks'])
+    fig, axes = pyplot.subplots(figsize=(12, 6))
+    axes.stackplot(times, *[data['tasks'][name]['cpu'] for name in names],
+                   labels=names)
+    axes.plot(times, [100.0 - idle for idle in data['idle']], 'k--',
+              linewidth=1, label='not idle')
+
+    last = None
+    for time_s, tag in zip(times, data['tag']):
+        if tag != last:
+            axes.axvline(time_s, color='grey', linewidth=0.5)
+            axes.text(time_s, 101, states.get(tag, str(tag)), rotation=90,
+                      fontsize=7, va='bottom')
+            last = tag
+
+    axes.set_xlabel('Time (s)')
+    axes.set_ylabel('Processor time (%)')
+    axes.set_ylim(0, 100)
+    axes.legend(loc='upper left', fontsize=8)
+    fig.tight_layout()
+    if out_name:
+        fig.savefig(out_name)
+    else:
+        pyplot.show()
+
+
+## @brief Read the lines sent on a serial port for a number of seconds.
+#  @param port The name of the serial port
+#  @param baud The baud rate
+#  @param seconds How long to read
+#  <b> Returns </b>
+#  <blockquote>
+#  The lines as strings
+def read_port(port, baud, seconds):
+    from serial import Serial
+    lines = []
+    end = time.time() + seconds
+    with Serial(port, baud, timeout=1) as stream:
+        while time.time() < end:
+            line = stream.readline()
+            if line:
+                lines.append(line.decode(errors='replace'))
+    return lines
+
+
+## @brief Read telemetry from a file or serial port, print the busiest tags
+#         and plot the samples.
+#  @param argv The command line arguments; run with @c --help to list them
+def main(argv):
+    parser = argparse.ArgumentParser(description="Plot cotask telemetry")
+    parser.add_argument('csv', nargs='?', help="file of telemetry CSV")
+    parser.add_argument('--port', help="serial port to read instead")
+    parser.add_argument('--baud', type=int, default=115200)
+    parser.add_argument('--seconds', type=float, default=30.0,
+                        help="how long to read the serial port")
+    parser.add_argument('--save', help="file in which to save what was "
+                        "read from the serial port")
+    parser.add_argument('--states', help="Python file naming the tags, "
+                        "such as pathing_plan_task.py")
+    parser.add_argument('--out', help="image file for the plot instead of "
+                        "showing it")
+    parser.add_argument('--no-plot', action='store_true',
+                        help="only print the summary")
+    args = parser.parse_args(argv)
+
+    if args.port:
+        lines = read_port(args.port, args.baud, args.seconds)
+        if args.save:
+            with open(args.save, 'w') as save_file:
+                save_file.writelines(lines)
+    elif args.csv:
+        with open(args.csv) as csv_file:
+            lines = csv_file.readlines()
+    else:
+        parser.error("give a CSV file or --port")
+
+    try:
+        data = read_csv(lines)
+    except ValueError as err:
+        print(err)
+        return 1
+    states = read_states(args.states) if args.states else {}
+
+    print(f"{len(data['time'])} samples\n")
+    print(f"{'TAG':<24s}{'SAMPLES':>8s}{'BUSY %':>8s}  BUSIEST TASKS")
+    for tag, count, busy, shares in by_tag(data):
+        top = sorted(shares.items(), key=lambda item: -item[1])[:3]
+        print(f"{states.get(tag, str(tag)):<24s}{count: 8d}{busy: 8.1f}  "
+              + ', '.join(f"{name} {share:.1f}" for name, share in top))
+
+    if not args.no_plot and data['time']:
+        plot(data, states, args.out)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
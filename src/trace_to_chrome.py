@@ -0,0 +1,151 @@
+## @file trace_to_chrome.py
+#  This file contains a desktop program which converts a cotask trace buffer
+#  dump into a Chrome trace file, so that the runs of all traced tasks can be
+#  seen on one timeline in Chrome's @c about://tracing page or in Perfetto
+#  (https://ui.perfetto.dev).
+#
+#  A dump is made on the Romi with @c cotask.trace_buffer.dump(), either into
+#  a file on the flash drive which is then copied to the computer, or straight
+#  to the UART, in which case this program can read it from the serial port:
+#  @code
+#  python trace_to_chrome.py trace.bin trace.json
+#  python trace_to_chrome.py --port COM5 trace.json
+#  @endcode
+#
+#  Each run of a task becomes a slice on that task's row, named for the state
+#  which the task yielded; runs which changed state are also marked with an
+#  instant event showing the transition.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import json
+import struct
+import sys
+
+## The first bytes of a trace dump, as written by @c cotask.TraceBuffer.dump()
+TRACE_MAGIC = b'CTRC'
+
+## The version of the trace dump format which this program can read
+TRACE_VERSION = 1
+
+
+## @brief Read exactly the given number of bytes from a file or serial port.
+#  @param stream An object with a @c read() method
+#  @param count The number of bytes needed
+#  @return The bytes which were read
+def read_exactly(stream, count):
+    data = b''
+    while len(data) < count:
+        chunk = stream.read(count - len(data))
+        if not chunk:
+            raise EOFError(f"Trace dump ended after {len(data)} of {count} bytes")
+        data += chunk
+    return data
+
+
+## @brief Read a trace dump and unpack its records.
+#
+#  Start times in the dump wrap around with the microcontroller's tick count;
+#  they are unwrapped here so that they increase through the whole dump.
+#  @param stream A binary file or serial port positioned at the dump
+#  @return A dictionary holding the task names, the number of records made
+#          on the microcontroller and a list of records, each a tuple of
+#          (start time, duration, task number, from state, to state)
+def read_dump(stream):
+    magic = stream.read(len(TRACE_MAGIC))
+    # Skip anything printed to the serial port ahead of the dump
+    while magic != TRACE_MAGIC:
+        byte = stream.read(1)
+        if not byte:
+            raise ValueError("No cotask trace dump found")
+        magic = magic[1:] + byte
+
+    version, word, n_names, ticks_period, held, made = struct.unpack(
+        '<BBHIII', read_exactly(stream, 16))
+    if version != TRACE_VERSION or word != 4:
+        raise ValueError(f"Unsupported trace dump version {version}")
+
+    names = []
+    for _ in range(n_names):
+        length = read_exactly(stream, 1)[0]
+        names.append(read_exactly(stream, length).decode())
+
+    raw = struct.unpack(f'<{3 * held}i', read_exactly(stream, 12 * held))
+    records = []
+    offset = 0
+    last = None
+    for idx in range(0, len(raw), 3):
+        stime = raw[idx]
+        if last is not None and stime + offset < last - ticks_period // 2:
+            offset += ticks_period
+        stime += offset
+        last = stime
+        packed = raw[idx + 2]
+        records.append((stime, raw[idx + 1], packed >> 16,
+                        (packed >> 8) & 255, packed & 255))
+
+    return {'names': names, 'made': made, 'records': records}
+
+
+## @brief Convert an unpacked trace dump into Chrome trace events.
+#  @param dump A dictionary as returned by @c read_dump()
+#  @return A dictionary which can be written as a Chrome trace JSON file
+def to_chrome(dump):
+    events = []
+    for task_id, name in enumerate(dump['names']):
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': 0,
+                       'tid': task_id, 'args': {'name': name}})
+        events.append({'name': 'thread_sort_index', 'ph': 'M', 'pid': 0,
+                       'tid': task_id, 'args': {'sort_index': task_id}})
+
+    if dump['records']:
+        start = dump['records'][0][0]
+    for stime, dur, task_id, from_state, to_state in dump['records']:
+        events.append({'name': f"state {to_state}", 'ph': 'X', 'pid': 0,
+                       'tid': task_id, 'ts': stime - start, 'dur': dur,
+                       'args': {'from': from_state, 'to': to_state}})
+        if from_state != to_state:
+            events.append({'name': f"{from_state} -> {to_state}", 'ph': 'i',
+                           's': 't', 'pid': 0, 'tid': task_id,
+                           'ts': stime - start})
+
+    dropped = dump['made'] - len(dump['records'])
+    return {'traceEvents': events, 'displayTimeUnit': 'ms',
+            'otherData': {'records made': dump['made'],
+                          'records overwritten': dropped}}
+
+
+## @brief Read a trace dump from a file or serial port and write it out as
+#         a Chrome trace JSON file.
+#  @param argv The command line arguments, either <dump file> <json file> or
+#         --port <serial port> [--baud <rate>] <json file>
+def main(argv):
+    if len(argv) >= 3 and argv[0] == '--port':
+        from serial import Serial
+        baud = 115200
+        if argv[2] == '--baud':
+            baud = int(argv[3])
+            argv = argv[:2] + argv[4:]
+        with Serial(argv[1], baud, timeout=5) as stream:
+            dump = read_dump(stream)
+        out_name = argv[2]
+    elif len(argv) == 2:
+        with open(argv[0], 'rb') as stream:
+            dump = read_dump(stream)
+        out_name = argv[1]
+    else:
+        print("Usage: trace_to_chrome.py <dump file> <json file>\n"
+              "       trace_to_chrome.py --port <port> [--baud <rate>] "
+              "<json file>")
+        return 1
+
+    with open(out_name, 'w') as out_file:
+        json.dump(to_chrome(dump), out_file)
+    print(f"{len(dump['records'])} runs of {len(dump['names'])} tasks "
+          f"written to {out_name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
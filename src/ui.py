@@ -1,5 +1,9 @@
 from pyb import USB_VCP
 from pyb import UART
+
+## The most bytes one line of test data can take: an index, a comma and space, a signed value with three decimals, and a return and newline
+LINE_MAX = 32
+
 ## @brief Initializes User Interface
 #
 # UI task class which contains a generator finite state machine that starts tests and procedures on user input
@@ -48,7 +52,6 @@ class ui:
         self.uart = uart_obj
         self.headers_v = 0
         self.headers_p = 0
-        self.ui_delay = 0
         self.fwd_ref = fwd_ref
         self.msg_send = 0
         self.arc_ref = arc_ref
@@ -65,6 +68,71 @@ class ui:
         self.c_state.put(0)
         self.automatic_mode = automatic_mode
         self.imu_flg = imu_flg
+        self.line_buf = bytearray(16 * LINE_MAX)
+        self.line_view = memoryview(self.line_buf)
+
+    ## @brief Writes the samples in a test queue to the UART, one line of index and value per sample.
+    #
+    # The samples are read in place with view(), formatted into the line buffer without making any strings, and
+    # written a buffer at a time; then they are taken out of the queue with consume().
+    # @param queue The queue of test samples, which is emptied
+    def write_capture(self, queue):
+        pos = 0
+        count = 0
+        for part in queue.view():
+            for value in part:
+                if pos > len(self.line_buf) - LINE_MAX:
+                    self.uart.write(self.line_view[:pos])
+                    pos = 0
+                pos = self.put_line(pos, self.time_idx, value)
+                self.time_idx += 1
+                count += 1
+        if pos > 0:
+            self.uart.write(self.line_view[:pos])
+        queue.consume(count)
+
+    ## @brief Writes one line of test data, as index then value to three decimals, into the line buffer.
+    # @param pos The place in the line buffer at which the line starts
+    # @param idx The sample's index
+    # @param value The sample's value
+    # @return The place in the line buffer just after the line
+    def put_line(self, pos, idx, value):
+        buf = self.line_buf
+        pos = self.put_digits(pos, idx)
+        buf[pos] = 44       # ','
+        buf[pos + 1] = 32   # ' '
+        pos += 2
+        milli = int(round(value * 1000))
+        if milli < 0:
+            buf[pos] = 45   # '-'
+            pos += 1
+            milli = -milli
+        pos = self.put_digits(pos, milli // 1000)
+        frac = milli % 1000
+        buf[pos] = 46       # '.'
+        buf[pos + 1] = 48 + frac // 100
+        buf[pos + 2] = 48 + frac // 10 % 10
+        buf[pos + 3] = 48 + frac % 10
+        buf[pos + 4] = 13   # '\r'
+        buf[pos + 5] = 10   # '\n'
+        return pos + 6
+
+    ## @brief Writes the decimal digits of a whole number into the line buffer.
+    # @param pos The place in the line buffer at which the digits start
+    # @param num The number, which must not be negative
+    # @return The place in the line buffer just after the digits
+    def put_digits(self, pos, num):
+        end = pos + 1
+        left = num // 10
+        while left > 0:
+            end += 1
+            left //= 10
+        idx = end
+        while idx > pos:
+            idx -= 1
+            self.line_buf[idx] = 48 + num % 10
+            num //= 10
+        return end
     
     ## @brief Runs the various tasks in UI
     #
@@ -158,10 +226,8 @@ class ui:
                 # Send start commands
                 if self.m_state_l.get()==1 and self.m_state_r.get() ==1:
                     # Flush queues
-                    while self.velocity.any() == True:
-                        self.velocity.get()
-                    while self.position.any() == True:
-                        self.position.get()
+                    self.velocity.consume()
+                    self.position.consume()
                     # Set motors
                     self.PWM_l.put(self.output)
                     self.PWM_r.put(self.output)
@@ -185,13 +251,7 @@ class ui:
                         if self.output == 10 and self.headers_v == 0:
                             self.uart.write(b"Times, Velocity(mm/s)\r\n")
                             self.headers_v = 1
-                        while self.velocity.any() == True:
-                            self.uart.write(str(self.time_idx).encode())
-                            self.uart.write(", ")
-                            vel = (self.velocity.get())
-                            self.uart.write(f"{vel:.3f}".encode())
-                            self.uart.write(b"\r\n")
-                            self.time_idx += 1
+                        self.write_capture(self.velocity)
                         self.output += 10
                         #If that was the last test go to next test type
                         if self.output >= 110: 
@@ -208,13 +268,7 @@ class ui:
                         if self.output == 10 and self.headers_p == 0:
                             self.uart.write(b"Times, Position(mm)\r\n")
                             self.headers_p = 1
-                        while self.position.any() == True:
-                            self.uart.write(str(self.time_idx).encode())
-                            self.uart.write(", ")
-                            pos  = (self.position.get())
-                            self.uart.write(f"{pos:.3f}".encode())
-                            self.uart.write(b"\r\n")
-                            self.time_idx += 1
+                        self.write_capture(self.position)
                         self.output += 10 
                         self.time_idx = 0
                         # If that was the last test go to wait state
@@ -241,10 +295,8 @@ class ui:
                         self.state = 3
                         yield 2 
             elif self.state == 3:
-                self.ui_delay += 1
-                if self.ui_delay >= 10:
-                    self.state = 1
-                    self.ui_delay = 0
+                # Wait one 10 ms run of the UI task between tests
+                self.state = 1
                 yield 3
             # Go forward state
             elif self.state == 4:
@@ -316,10 +368,8 @@ class ui:
                     #if self.m_state_l.get()==1 and self.m_state_r.get() ==1:
                         # Flush queues
                         print("flsuh queues")
-                        while self.velocity.any() == True:
-                            self.velocity.get()
-                        while self.velocity2.any() == True:
-                            self.velocity2.get()
+                        self.velocity.consume()
+                        self.velocity2.consume()
                         print("setting testing flag")
                         self.testing_flg.put(6)
                     else:
@@ -344,25 +394,10 @@ class ui:
                 if (self.velocity.full() == True) & (self.velocity2.full() == True):
                     print("About to send headers")
                     self.uart.write(b"Times, Velocity(mm/s)\r\n")
-                    while self.velocity.any() == True:
-                        print("About to send left motor data")
-                        self.uart.write(str(self.time_idx).encode())
-                        self.uart.write(", ")
-                        vel = (self.velocity.get())
-                        self.uart.write(f"{vel:.3f}".encode())
-                        self.uart.write(b"\r\n")
-                        self.time_idx += 1
-                        print("Sent that bitch")
+                    # Left motor data, then right motor data
+                    self.write_capture(self.velocity)
                     self.time_idx = 0
-                    while self.velocity2.any() == True:
-                        print("About to send right motor data")
-                        self.uart.write(str(self.time_idx).encode())
-                        self.uart.write(", ")
-                        vel = (self.velocity2.get())
-                        self.uart.write(f"{vel:.3f}".encode())
-                        self.uart.write(b"\r\n")
-                        self.time_idx += 1
-                        print("Sent it")
+                    self.write_capture(self.velocity2)
                     self.time_idx = 0
                     self.delay.put(0)
                     self.testing_flg.put(0)
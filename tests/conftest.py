@@ -0,0 +1,53 @@
+## @file conftest.py
+#  This file contains the fixtures shared by the host tests of @c cotask.py
+#  and @c task_share.py. The tests run on a desktop computer with ordinary
+#  Python, using the stand-in MicroPython modules of @c sim_platform.py and a
+#  @c VirtualClock, so they give the same results on every run.
+#  @code
+#  python -m pytest -q tests
+#  @endcode
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import sim_platform
+
+# The stand-in modules must be in place before the test files import cotask
+sim_platform.install(sim_platform.VirtualClock())
+
+import cotask
+import task_share
+
+
+## @brief A fresh virtual clock, starting at zero, with @c cotask and
+#         @c task_share loaded again to use it, so that no task list, share
+#         or trace buffer is left over from another test.
+@pytest.fixture
+def clock():
+    clk = sim_platform.install(sim_platform.VirtualClock())
+    importlib.reload(cotask)
+    importlib.reload(task_share)
+    return clk
+
+
+## @brief Make a generator function for a task which notes its name in a log
+#         each time it runs, then yields.
+#  @param log The list to which the name is appended
+#  @param name The name noted in the log
+#  <b> Returns </b>
+#  <blockquote>
+#  A generator function which can be given to @c cotask.Task
+def logged(log, name):
+    def run():
+        while True:
+            log.append(name)
+            yield 0
+    return run
@@ -0,0 +1,68 @@
+## @file test_overrun.py
+#  This file contains host tests of what @c cotask.py does with the releases
+#  a timed task misses when it falls more than a period behind.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import pytest
+
+import cotask
+from conftest import logged
+
+
+## @brief Make a 10 ms task with the given overrun policy, first released at
+#         10 ms, and let 35 ms go by before the scheduler looks at it, so the
+#         releases at 20 and 30 ms are missed.
+#  @param clock The virtual clock of the test
+#  @param overrun The task's overrun policy
+#  @param sched The name of the scheduler method to use
+#  <b> Returns </b>
+#  <blockquote>
+#  The task and the number of runs made before nothing was due
+def run_late(clock, overrun, sched):
+    task_list = cotask.TaskList()
+    task = cotask.Task(logged([], 'late'), name='late', priority=1,
+                       period=10, overrun=overrun)
+    task_list.append(task)
+    task_list.align_releases(0)
+    clock.advance(35000)
+
+    sched_fun = getattr(task_list, sched)
+    runs = 0
+    while sched_fun():
+        runs += 1
+    return task, runs
+
+
+## @brief With CATCH_UP, the task runs once for each release, and each
+#         release found a period or more late counts as missed.
+@pytest.mark.parametrize('sched', ('pri_sched', 'heap_sched'))
+def test_catch_up_runs_every_release(clock, sched):
+    task, runs = run_late(clock, cotask.CATCH_UP, sched)
+
+    assert runs == 3
+    assert task._missed == 2
+    assert task._next_run == 40000
+
+
+## @brief With SKIP, the task runs once and its next release is a period
+#         after the time at which it was found late.
+@pytest.mark.parametrize('sched', ('pri_sched', 'heap_sched'))
+def test_skip_restarts_period_from_now(clock, sched):
+    task, runs = run_late(clock, cotask.SKIP, sched)
+
+    assert runs == 1
+    assert task._missed == 2
+    assert 45000 < task._next_run < 45100
+
+
+## @brief With COALESCE, the task runs once and keeps its original phase,
+#         going on from the first release still to come.
+@pytest.mark.parametrize('sched', ('pri_sched', 'heap_sched'))
+def test_coalesce_keeps_phase(clock, sched):
+    task, runs = run_late(clock, cotask.COALESCE, sched)
+
+    assert runs == 1
+    assert task._missed == 2
+    assert task._next_run == 40000
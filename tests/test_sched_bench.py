@@ -0,0 +1,71 @@
+## @file test_sched_bench.py
+#  This file contains host tests of the lateness which @c sched_bench.py
+#  measures for itself at the start of each task run.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import pytest
+
+import sched_bench
+from conftest import logged
+
+
+## @brief Make a bench use the test's clock, with which @c cotask was loaded,
+#         set back to zero as @c sched_bench.bench() sets it.
+@pytest.fixture
+def bench_clock(clock, monkeypatch):
+    monkeypatch.setattr(sched_bench, 'clock', clock)
+    clock._now = 0
+    return clock
+
+
+## @brief A run is late by the time since its release, and the releases it
+#         passed over without a run are missed.
+def test_lateness_against_nominal_release(bench_clock):
+    log = []
+    record = sched_bench.Lateness(10)
+    run = record.wrap(logged(log, 'task'))()
+
+    bench_clock.advance(10300)
+    next(run)
+    bench_clock.advance(25000)
+    next(run)
+
+    assert log == ['task', 'task']
+    assert record.runs == 2
+    assert record.served == 2
+    assert record.latest == 5300
+    assert record.late_sum == 300 + 5300
+    assert record.missed == 1
+
+
+## @brief A run which catches up on a missed release serves none, and a
+#         release left without a run by the end is missed.
+def test_catch_up_run_serves_no_release(bench_clock):
+    record = sched_bench.Lateness(10)
+    run = record.wrap(logged([], 'task'))()
+
+    bench_clock.advance(21000)
+    next(run)
+    next(run)
+    record.finish(50000)
+
+    assert record.runs == 2
+    assert record.served == 1
+    assert record.latest == 1000
+    assert record.missed == 1 + 2
+
+
+## @brief A light task set is run on time by every scheduler, as the bench
+#         measures it.
+@pytest.mark.parametrize('policy', ('pri_sched', 'rr_sched', 'heap_fp',
+                                    'heap_edf', 'tick_sched'))
+def test_light_task_set_is_on_time(bench_clock, policy):
+    task_set = [('fast', 2, 5, 100, 0.0), ('slow', 1, 20, 500, 0.0)]
+
+    result = sched_bench.bench(task_set, policy, seconds=0.5)
+
+    assert result['missed'] == 0
+    assert result['late_us_max'] < 1000
+    assert result['runs'] >= 100 + 25 - 2
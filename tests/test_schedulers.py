@@ -0,0 +1,237 @@
+## @file test_schedulers.py
+#  This file contains host tests of the order in which the schedulers of
+#  @c cotask.py run tasks.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import pytest
+
+import cotask
+import sim_platform
+import task_share
+from conftest import logged
+
+
+## @brief A generator function for a task which suspends itself from a given
+#         run, as @c data_collector and @c Bump_Task do when they go idle.
+def suspends_on(log, name, task_ref, run_no):
+    def run():
+        runs = 0
+        while True:
+            runs += 1
+            log.append(name)
+            if runs >= run_no:
+                task_ref[0].suspend()
+            yield 0
+    return run
+
+
+## @brief A task which suspends itself mustn't break the round-robin sweep of
+#         the other tasks at its priority, whichever order they were added in.
+@pytest.mark.parametrize('first', ('quits', 'stays'))
+def test_pri_sched_task_suspends_itself_at_shared_priority(clock, first):
+    log = []
+    ref = [None]
+    quits = cotask.Task(suspends_on(log, 'quits', ref, 3), name='quits',
+                        priority=2, period=5)
+    ref[0] = quits
+    stays = cotask.Task(logged(log, 'stays'), name='stays', priority=2,
+                        period=5)
+    task_list = cotask.TaskList()
+    for task in ((quits, stays) if first == 'quits' else (stays, quits)):
+        task_list.append(task)
+
+    sim_platform.run(task_list, clock, 0.1025)
+
+    assert log.count('quits') == 3
+    assert log.count('stays') == 20
+
+
+## @brief A task which suspended itself while sharing a priority is resumed by
+#         a share it subscribed to, and then runs with the others again.
+def test_pri_sched_resumed_by_share_after_suspending(clock):
+    log = []
+    ref = [None]
+    trigger = task_share.Share('b', name='trigger')
+    quits = cotask.Task(suspends_on(log, 'quits', ref, 1), name='quits',
+                        priority=2, period=5)
+    ref[0] = quits
+    stays = cotask.Task(logged(log, 'stays'), name='stays', priority=2,
+                        period=5)
+    trigger.subscribe(quits, resume=True)
+    task_list = cotask.TaskList()
+    task_list.append(stays)
+    task_list.append(quits)
+
+    sim_platform.run(task_list, clock, 0.0525)
+    assert log.count('quits') == 1
+    trigger.put(1)
+    sim_platform.run(task_list, clock, 0.0525)
+
+    assert log.count('quits') == 2
+    assert log.count('stays') == 21
+
+
+## The schedulers which run tasks by priority, as (task list policy, name of
+#  the scheduler method)
+PRIORITY_SCHEDULERS = ((cotask.FIXED_PRIORITY, 'pri_sched'),
+                       (cotask.FIXED_PRIORITY, 'rr_sched'),
+                       (cotask.FIXED_PRIORITY, 'heap_sched'))
+
+
+## @brief Tasks released together are run highest priority first, whatever
+#         order they were appended in.
+@pytest.mark.parametrize('policy, sched', PRIORITY_SCHEDULERS)
+def test_tasks_released_together_run_by_priority(clock, policy, sched):
+    log = []
+    task_list = cotask.TaskList(policy=policy)
+    for name, priority in (('low', 1), ('high', 5), ('mid', 3)):
+        task_list.append(cotask.Task(logged(log, name), name=name,
+                                     priority=priority, period=10))
+    task_list.align_releases()
+
+    sim_platform.run(task_list, clock, 0.025, sched)
+
+    assert log == ['high', 'mid', 'low'] * 2
+
+
+## @brief Under EDF, of two tasks released together, the one whose period
+#         ends first is run first, even if its priority is lower.
+def test_heap_sched_edf_runs_earliest_deadline_first(clock):
+    log = []
+    task_list = cotask.TaskList(policy=cotask.EDF)
+    task_list.append(cotask.Task(logged(log, 'slow'), name='slow',
+                                 priority=5, period=20))
+    task_list.append(cotask.Task(logged(log, 'fast'), name='fast',
+                                 priority=1, period=15, phase=20))
+    task_list.align_releases(0)
+    clock.advance(20001)
+
+    task_list.heap_sched()
+    task_list.heap_sched()
+
+    assert log == ['fast', 'slow']
+
+
+## @brief A task suspended by another during a sweep isn't run until it is
+#         resumed, and then runs at its period again.
+@pytest.mark.parametrize('policy, sched', PRIORITY_SCHEDULERS)
+def test_task_suspended_and_resumed_by_another(clock, policy, sched):
+    log = []
+    task_list = cotask.TaskList(policy=policy)
+    quiet = cotask.Task(logged(log, 'quiet'), name='quiet', priority=1,
+                        period=10)
+
+    def boss():
+        runs = 0
+        while True:
+            runs += 1
+            log.append('boss')
+            if runs == 2:
+                quiet.suspend()
+            elif runs == 5:
+                quiet.resume()
+            yield 0
+
+    task_list.append(cotask.Task(boss, name='boss', priority=5, period=10))
+    task_list.append(quiet)
+    task_list.align_releases()
+
+    sim_platform.run(task_list, clock, 0.0705, sched)
+
+    # The boss suspends the quiet task in the sweep in which both are due at
+    # 20 ms, and resumes it at 50 ms
+    assert log == ['boss', 'quiet', 'boss', 'boss', 'boss', 'boss', 'quiet',
+                   'boss', 'quiet', 'boss', 'quiet']
+
+
+## @brief A task which suspends itself at a priority shared with another
+#         task doesn't disturb that task under any of the schedulers.
+@pytest.mark.parametrize('policy, sched', PRIORITY_SCHEDULERS)
+def test_task_suspends_itself_mid_sweep(clock, policy, sched):
+    log = []
+    ref = [None]
+    task_list = cotask.TaskList(policy=policy)
+    ref[0] = cotask.Task(suspends_on(log, 'quits', ref, 2), name='quits',
+                         priority=2, period=5)
+    task_list.append(ref[0])
+    task_list.append(cotask.Task(logged(log, 'stays'), name='stays',
+                                 priority=2, period=5))
+
+    sim_platform.run(task_list, clock, 0.0525, sched)
+
+    assert log.count('quits') == 2
+    assert log.count('stays') == 10
+
+
+## @brief The lateness of a low priority task includes the time it waited
+#         while a long run of a higher priority task went on.
+@pytest.mark.parametrize('policy, sched',
+                         PRIORITY_SCHEDULERS
+                         + ((cotask.EDF, 'heap_sched'),))
+def test_lateness_includes_wait_behind_other_tasks(clock, policy, sched):
+    def idle():
+        while True:
+            yield 0
+
+    task_list = cotask.TaskList(policy=policy)
+    task_list.append(cotask.Task(sim_platform.costed(clock, idle, 3000),
+                                 name='long', priority=5, period=10))
+    low = cotask.Task(idle, name='low', priority=1, period=10, profile=True)
+    task_list.append(low)
+    task_list.align_releases()
+
+    sim_platform.run(task_list, clock, 0.1, sched)
+
+    assert 3000 <= low._latest < 3100
+
+
+## @brief A critical task which keeps waiting behind a long run makes the
+#         task list shed load, whichever scheduler finds it late.
+@pytest.mark.parametrize('policy, sched', PRIORITY_SCHEDULERS)
+def test_late_critical_task_sheds_load(clock, policy, sched):
+    def idle():
+        while True:
+            yield 0
+
+    task_list = cotask.TaskList(policy=policy)
+    task_list.append(cotask.Task(sim_platform.costed(clock, idle, 3000),
+                                 name='long', priority=5, period=10))
+    task_list.append(cotask.Task(idle, name='critical', priority=3,
+                                 period=10, critical=True))
+    spare = cotask.Task(idle, name='spare', priority=1, period=10,
+                        sheddable=True)
+    task_list.append(spare)
+    task_list.align_releases()
+    task_list.shed_load(late_ms=2, count=4, window_ms=100, max_level=1)
+
+    sim_platform.run(task_list, clock, 0.1, sched)
+
+    assert task_list.shed_level == 1
+    assert spare.period == 20000
+
+
+## @brief Calling go() on a timed task runs it right away under heap_sched(),
+#         as under pri_sched(), without moving its next release.
+@pytest.mark.parametrize('sched', ('pri_sched', 'heap_sched'))
+def test_go_runs_timed_task_early(clock, sched):
+    log = []
+    task_list = cotask.TaskList()
+    task = cotask.Task(logged(log, 'timed'), name='timed', priority=1,
+                       period=50)
+    task_list.append(task)
+    task_list.align_releases()
+
+    sched_fun = getattr(task_list, sched)
+
+    clock.advance(12000)
+    assert not sched_fun()
+    task.go()
+    assert sched_fun()
+    assert log == ['timed']
+
+    clock.advance(40000)
+    assert sched_fun()
+    assert log == ['timed', 'timed']
+    assert task_list.time_to_next() > 45000
@@ -0,0 +1,37 @@
+## @file test_task_list_repr.py
+#  This file contains host tests of the diagnostic text printed for a
+#  @c cotask.TaskList.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import cotask
+from conftest import logged
+
+## The start of the header of the table of run time and lateness percentiles
+HIST_HEADER = 'TASK              RUN P50'
+
+
+## @brief The percentile table is left out when no task keeps histograms.
+def test_no_percentile_header_without_profiled_tasks(clock):
+    task_list = cotask.TaskList()
+    task_list.append(cotask.Task(logged([], 'plain'), name='plain',
+                                 period=10))
+
+    assert HIST_HEADER not in repr(task_list)
+
+
+## @brief The percentile table is printed, with a line for each profiled
+#         task only, when a task keeps histograms.
+def test_percentile_header_with_a_profiled_task(clock):
+    task_list = cotask.TaskList()
+    task_list.append(cotask.Task(logged([], 'plain'), name='plain',
+                                 period=10))
+    task_list.append(cotask.Task(logged([], 'profiled'), name='profiled',
+                                 period=10, profile=True))
+
+    text = repr(task_list)
+    table = text[text.index(HIST_HEADER):].splitlines()
+
+    assert table[1].startswith('profiled')
+    assert not any(line.startswith('plain') for line in table)
@@ -0,0 +1,122 @@
+## @file test_task_share.py
+#  This file contains host tests of the queues and shares of
+#  @c task_share.py.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import array
+
+import pytest
+
+import task_share
+
+
+## @brief try_put() drops an item which there's no room for and counts it as
+#         an overflow, and try_get() gives @c None from an empty queue.
+def test_try_put_and_try_get_never_wait(clock):
+    queue = task_share.Queue('h', 3, name='q')
+
+    assert [queue.try_put(num) for num in range(5)] == [True] * 3 + [False] * 2
+    assert queue.overflows() == 2
+    assert [queue.try_get() for _ in range(4)] == [0, 1, 2, None]
+
+
+## @brief A queue which overwrites old data keeps the newest items when it
+#         overflows.
+def test_overwriting_queue_keeps_newest_items(clock):
+    queue = task_share.Queue('h', 3, overwrite=True, name='q')
+
+    for num in range(5):
+        queue.put(num)
+
+    assert queue.overflows() == 2
+    assert [queue.get() for _ in range(3)] == [2, 3, 4]
+
+
+## @brief put_many() and get_into() move items in order across the end of
+#         the buffer, and put_many() counts what it had no room for.
+def test_put_many_and_get_into_wrap_around(clock):
+    queue = task_share.Queue('h', 5, name='q')
+    buf = array.array('h', range(4))
+    queue.put_many((10, 11, 12))
+    assert queue.get_into(buf) == 3
+
+    assert queue.put_many(range(20, 27)) == 5
+    assert queue.overflows() == 2
+    assert queue.get_into(buf) == 4
+    assert list(buf) == [20, 21, 22, 23]
+    assert queue.get_into(buf) == 1
+    assert buf[0] == 24
+    assert queue.empty()
+
+
+## @brief view() shows the items in two pieces when they wrap around, and
+#         consume() takes out only as many as it's asked to.
+def test_view_then_consume(clock):
+    queue = task_share.Queue('h', 4, name='q')
+    queue.put_many((1, 2, 3))
+    queue.consume(2)
+    queue.put_many((4, 5, 6))
+
+    parts = queue.view()
+
+    assert [list(part) for part in parts] == [[3, 4], [5, 6]]
+    assert queue.consume(3) == 3
+    assert [list(part) for part in queue.view()] == [[6]]
+    assert queue.consume() == 1
+    assert queue.view() == ()
+
+
+## @brief get_if_newer() gives the value only after a write which the task
+#         hasn't seen, even if the value is the same.
+def test_get_if_newer(clock):
+    share = task_share.Share('f', name='yaw', versioned=True)
+    assert share.get_if_newer(0) is None
+    assert share.age_us() is None
+
+    share.put(1.5)
+    seen, value = share.get_if_newer(0)
+    assert value == 1.5
+    assert share.get_if_newer(seen) is None
+
+    clock.advance(250)
+    assert 250 <= share.age_us() < 260
+    share.put(1.5)
+    assert share.get_if_newer(seen) == (seen + 1, 1.5)
+
+
+## @brief A share which isn't versioned can't be asked for newer data.
+def test_get_if_newer_needs_versioned_share(clock):
+    share = task_share.Share('f', name='plain')
+
+    with pytest.raises(ValueError):
+        share.get_if_newer(0)
+
+
+## @brief A versioned record counts writes of the whole record and of single
+#         fields, and read_if_newer() copies it only after a write.
+def test_record_versioning(clock):
+    record = task_share.RecordShare('f', ('pos', 'vel'), name='wheel',
+                                    versioned=True)
+    snap = array.array('f', (0.0, 0.0))
+    assert record.read_if_newer(snap, 0) is None
+
+    record.put((1.0, 2.0))
+    seen = record.read_if_newer(snap, 0)
+    assert seen == record.seq() == 1
+    assert list(snap) == [1.0, 2.0]
+
+    record.field('vel').put(3.0)
+    assert record.read_if_newer(snap, seen) == 2
+    assert list(snap) == [1.0, 3.0]
+    assert record.age_us() is not None
+
+
+## @brief Queues aren't versioned, so they have none of the methods for it.
+def test_queue_has_no_versioning(clock):
+    queue = task_share.Queue('h', 4, name='q')
+
+    assert not hasattr(queue, 'seq')
+    assert not hasattr(queue, 'age_us')
+    assert not hasattr(queue, '_versioned')
@@ -0,0 +1,65 @@
+## @file test_trace.py
+#  This file contains host tests of the trace buffer of @c cotask.py and of
+#  converting its dump into a Chrome trace with @c trace_to_chrome.py.
+#
+#  @author Alex Power, Lucas Heuchert, Erik Heuchert
+#  @date   2026-Oct-18 Approximate date of creation of file
+
+import io
+
+import cotask
+import sim_platform
+import trace_to_chrome
+
+
+## @brief A generator function for a task which goes from state 0 to 1 to 2
+#         and then stays in state 2.
+def stepping():
+    yield 0
+    yield 1
+    while True:
+        yield 2
+
+
+## @brief Runs of traced tasks which went on across a wrap of the tick count
+#         come out of a dump, and of the Chrome conversion, in order with
+#         their states, the oldest records having been overwritten.
+def test_dump_to_chrome_round_trip(clock):
+    cotask.trace_buffer = cotask.TraceBuffer(8)
+    task_list = cotask.TaskList()
+    task_list.append(cotask.Task(sim_platform.costed(clock, stepping, 200),
+                                 name='stepper', priority=2, period=10,
+                                 trace=True))
+    task_list.append(cotask.Task(sim_platform.costed(clock, stepping, 100),
+                                 name='other', priority=1, period=10,
+                                 trace=True))
+    clock._now = sim_platform.TICKS_PERIOD - 25000
+    task_list.align_releases()
+    sim_platform.run(task_list, clock, 0.055)
+
+    stream = io.BytesIO()
+    cotask.trace_buffer.dump(stream)
+    stream.seek(0)
+    dump = trace_to_chrome.read_dump(stream)
+
+    assert dump['names'] == ['stepper', 'other']
+    assert dump['made'] == 10
+    records = dump['records']
+    assert len(records) == 8
+    starts = [record[0] for record in records]
+    assert starts == sorted(starts)
+    assert starts[0] < sim_platform.TICKS_PERIOD < starts[-1]
+    assert [record[2] for record in records] == [0, 1] * 4
+    assert [record[3:] for record in records] == \
+        [(0, 1), (0, 1), (1, 2), (1, 2)] + [(2, 2)] * 4
+
+    chrome = trace_to_chrome.to_chrome(dump)
+    slices = [event for event in chrome['traceEvents'] if event['ph'] == 'X']
+    marks = [event for event in chrome['traceEvents'] if event['ph'] == 'i']
+    assert len(slices) == 8
+    assert slices[0]['ts'] == 0
+    assert 200 <= slices[0]['dur'] < 210
+    assert 100 <= slices[1]['dur'] < 110
+    assert [event['name'] for event in marks] == \
+        ['0 -> 1', '0 -> 1', '1 -> 2', '1 -> 2']
+    assert chrome['otherData']['records overwritten'] == 2